@@ -2,6 +2,27 @@
 ASGI config for DigiTrackProject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Production runs it under gunicorn with uvicorn workers (see the Procfile):
+
+    gunicorn DigiTrackProject.DigiTrackProject.asgi:application -k uvicorn_worker.UvicornWorker
+
+Async views (the search, chart and calendar APIs, the event stream) run on the
+worker's event loop; sync views run in a thread per request.
+
+Async ORM calls run in short-lived threads, so persistent database connections
+are off by default here (DB_CONN_MAX_AGE=0). On PostgreSQL, settings.py then
+gives each worker a psycopg 3 connection pool (DB_POOL_MIN_SIZE,
+DB_POOL_MAX_SIZE). Keep workers x DB_POOL_MAX_SIZE under the server's
+max_connections.
+
+Middleware written for this project (e.g. tourism/static_files.py) are
+native sync/async classes and run on the event loop. Django's session,
+auth, CSRF, messages and other built-in middleware are MiddlewareMixin
+subclasses: under ASGI their process_request/process_response hooks run
+through sync_to_async(thread_sensitive=True), so every request, async views
+included, still makes short trips to the worker's single sync thread. Those
+hooks are cheap, but add new middleware as native sync/async classes rather
+than MiddlewareMixin, so the trips do not grow.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -11,6 +32,7 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DigiTrackProject.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DigiTrackProject.DigiTrackProject.settings')
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
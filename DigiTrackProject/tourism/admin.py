@@ -17,7 +17,7 @@ class RoomAdmin(admin.ModelAdmin):
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
-    list_display = ['homestay', 'date', 'status', 'guest_name', 'num_people']
+    list_display = ['homestay', 'date', 'check_out', 'status', 'guest_name', 'num_people']
     list_filter = ['status', 'homestay', 'date']
     search_fields = ['guest_name', 'homestay__name']
     date_hierarchy = 'date'
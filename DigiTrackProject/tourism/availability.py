@@ -0,0 +1,81 @@
+"""
+Availability grid used by the public home page calendar.
+
+The grid maps each homestay to ``{date_str: [{room_number, status}, ...]}``
+for a date window. Rooms and bookings for every requested homestay are loaded
+with one query each and the per-date room statuses are computed in memory, so
+the number of queries does not grow with homestays, rooms or booked dates.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date as dt_date, timedelta
+
+from .models import Booking, Room
+
+
+# Longest window a single availability request may ask for
+MAX_WINDOW_DAYS = 92
+
+
+def default_window(today=None):
+    """The current and next month, which the home page calendar opens on."""
+    today = today or dt_date.today()
+    start = today.replace(day=1)
+    month = (today.month % 12) + 1
+    year = today.year + (1 if today.month == 12 else 0)
+    end = dt_date(year, month, calendar.monthrange(year, month)[1])
+    return start, end
+
+
+def build_availability(homestay_ids, start, end):
+    """
+    Return ``{homestay_id: {date_str: [{room_number, status}, ...]}}`` for
+    every date from ``start`` to ``end`` inclusive.
+
+    A room's status on a date is the status of its first booking (by id) whose
+    stay covers that date, otherwise 'maintenance' if the room is under maintenance,
+    otherwise 'available'.
+    """
+    homestay_ids = list(homestay_ids)
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    rooms_by_homestay = defaultdict(list)
+    rooms = (
+        Room.objects.filter(homestay_id__in=homestay_ids)
+        .order_by('id')
+        .values_list('homestay_id', 'id', 'room_number', 'is_under_maintenance')
+    )
+    for homestay_id, room_id, room_number, is_under_maintenance in rooms:
+        rooms_by_homestay[homestay_id].append((room_id, room_number, is_under_maintenance))
+
+    # (room_id, date) -> status of the first booking covering that date
+    room_date_status = {}
+    bookings = (
+        Booking.objects.filter(homestay_id__in=homestay_ids, room__isnull=False, date__lte=end, check_out__gte=start)
+        .order_by('id')
+        .values_list('room_id', 'date', 'check_out', 'status')
+    )
+    for room_id, check_in, check_out, status in bookings:
+        day = max(check_in, start)
+        last = min(check_out, end)
+        while day <= last:
+            room_date_status.setdefault((room_id, day), status)
+            day += timedelta(days=1)
+
+    availability = {}
+    for homestay_id in homestay_ids:
+        homestay_rooms = rooms_by_homestay.get(homestay_id, [])
+        availability[homestay_id] = {
+            date.strftime('%Y-%m-%d'): [
+                {
+                    'room_number': room_number,
+                    'status': room_date_status.get(
+                        (room_id, date),
+                        'maintenance' if is_under_maintenance else 'available',
+                    ),
+                }
+                for room_id, room_number, is_under_maintenance in homestay_rooms
+            ]
+            for date in dates
+        }
+    return availability
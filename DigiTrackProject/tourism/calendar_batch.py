@@ -0,0 +1,195 @@
+"""
+Bulk calendar edits behind /api/calendar/bulk/.
+
+One request sets the status (and guest details) of every room/date cell in a
+set of rooms times a list of date ranges, e.g. blocking a week for three
+rooms. A cell is the room's single-day 'calendar' booking for that date: it
+is updated when it exists and created otherwise. The whole request is
+validated first. Then, in one transaction holding the homestay lock (see
+reservations.py), existing bookings are read with one query and the changes
+written with one bulk_create and one bulk_update, so the cost grows with the
+batch size rather than per cell. The lock makes booking_api edits and other
+batches of the homestay wait: none can change a cell between the read and
+the write and have its edit overwritten, or the DailyArrival deltas computed
+from stale values.
+
+A cell already covered by another reserved booking of the room (a different
+stay) is reported as a conflict and left alone. bulk_create/bulk_update skip
+Booking.save() and the model signals, so this module fills the search
+columns, applies the DailyArrival deltas and, once the transaction commits,
+invalidates the home page cache, bumps the data version stamps and publishes a
+dashboard event itself.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .calendar_sync import next_sync_seq
+from .events import publish_event
+from .home_cache import invalidate_home_context
+from .versions import bump_versions
+from .models import Booking, Room
+from .reservations import lock_homestay
+from .rollups import apply_deltas, booking_key
+
+# Largest number of room/date cells one request may touch
+MAX_BATCH_CELLS = 1000
+UPDATE_FIELDS = ['status', 'guest_name', 'num_people', 'contact_number', 'search_name', 'search_contact',
+                 'updated_at', 'sync_seq']
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _parse_day(value):
+    try:
+        day = parse_date(value) if isinstance(value, str) else None
+    except ValueError:
+        day = None
+    if day is None:
+        raise BatchError(f'Invalid date: {value!r}.')
+    return day
+
+
+def parse_batch(homestay, data):
+    """
+    Validate a batch request body. Returns ``(rooms, dates, fields)``: the homestay's
+    rooms by id, the sorted distinct dates and the booking fields to set.
+    """
+    if not isinstance(data, dict):
+        raise BatchError('Expected a JSON object.')
+    status = data.get('status')
+    if status not in dict(Booking.BOOKING_STATUS_CHOICES):
+        raise BatchError(f"status must be one of: {', '.join(dict(Booking.BOOKING_STATUS_CHOICES))}.")
+    room_ids = data.get('room_ids')
+    if not isinstance(room_ids, list) or not room_ids:
+        raise BatchError('room_ids must be a non-empty list.')
+    try:
+        room_ids = {int(room_id) for room_id in room_ids}
+    except (TypeError, ValueError):
+        raise BatchError('Invalid room ID.')
+    rooms = Room.objects.filter(homestay=homestay).in_bulk(room_ids)
+    missing = sorted(room_ids - set(rooms))
+    if missing:
+        raise BatchError(f'Rooms not found: {", ".join(map(str, missing))}.')
+
+    ranges = data.get('ranges')
+    if not isinstance(ranges, list) or not ranges:
+        raise BatchError('ranges must be a non-empty list of {start, end}.')
+    dates = set()
+    for item in ranges:
+        if not isinstance(item, dict):
+            raise BatchError('ranges must be a non-empty list of {start, end}.')
+        start = _parse_day(item.get('start'))
+        end = _parse_day(item.get('end') or item.get('start'))
+        if end < start:
+            raise BatchError('end must not be before start.')
+        if len(room_ids) * ((end - start).days + 1) > MAX_BATCH_CELLS:
+            raise BatchError(f'A batch may change at most {MAX_BATCH_CELLS} room/date cells.')
+        dates.update(start + timedelta(days=i) for i in range((end - start).days + 1))
+    if len(room_ids) * len(dates) > MAX_BATCH_CELLS:
+        raise BatchError(f'A batch may change at most {MAX_BATCH_CELLS} room/date cells.')
+
+    num_people = data.get('num_people')
+    if num_people not in (None, ''):
+        try:
+            num_people = int(num_people)
+        except (TypeError, ValueError):
+            raise BatchError('num_people must be a number.')
+        if num_people < 1:
+            raise BatchError('num_people must be at least 1.')
+    else:
+        num_people = 1
+    fields = {
+        'status': status,
+        'guest_name': (data.get('guest_name') or '').strip(),
+        'num_people': num_people,
+        'contact_number': (data.get('contact_number') or '').strip() or None,
+    }
+    return rooms, sorted(dates), fields
+
+
+def apply_batch(homestay, rooms, dates, fields):
+    """
+    Apply parsed batch changes. Returns one ``{room_id, date, result, booking_id}`` per
+    cell, result being 'created', 'updated' or 'conflict'.
+    """
+    with transaction.atomic():
+        lock_homestay(homestay.id)
+        results, to_create, to_update, deltas = _plan(homestay, rooms, dates, fields)
+        if to_create or to_update:
+            # One calendar sync step for the whole batch (see calendar_sync.py)
+            sync_seq = next_sync_seq(homestay.id)
+            for booking in (*to_create, *to_update):
+                booking.sync_seq = sync_seq
+        # The unique reservation constraint still guards against reservations made without
+        # the lock (reserve_room): an IntegrityError here rolls the whole batch back.
+        Booking.objects.bulk_create(to_create)
+        Booking.objects.bulk_update(to_update, UPDATE_FIELDS)
+        apply_deltas(deltas)
+        if to_create or to_update:
+            transaction.on_commit(invalidate_home_context)
+            bump_versions(homestay.id)
+            publish_event('booking', 'bulk', homestay.id, count=len(to_create) + len(to_update))
+
+    for result in results:
+        if 'booking' in result:
+            result['booking_id'] = result.pop('booking').id
+    return results
+
+
+def _plan(homestay, rooms, dates, fields):
+    """Read the cells and work out ``(results, to_create, to_update, deltas)``."""
+    existing = Booking.objects.filter(room_id__in=list(rooms), date__lte=dates[-1], check_out__gte=dates[0]) \
+        .order_by('id')
+    cells = {}                       # (room_id, date) -> the cell's own calendar booking
+    blocked = set()                  # (room_id, date) covered by some reserved booking
+    reserved_by = {}                 # (room_id, date) -> id of that reserved booking
+    wanted = set(dates)
+    for booking in existing:
+        if booking.source == 'calendar' and booking.date == booking.check_out:
+            cells.setdefault((booking.room_id, booking.date), booking)
+        if booking.status == 'reserved':
+            day = max(booking.date, dates[0])
+            while day <= booking.check_out and day <= dates[-1]:
+                if day in wanted:
+                    blocked.add((booking.room_id, day))
+                    reserved_by.setdefault((booking.room_id, day), booking.id)
+                day += timedelta(days=1)
+
+    now = timezone.now()
+    results, to_create, to_update = [], [], []
+    deltas = defaultdict(lambda: [0, 0])
+    for room_id in sorted(rooms):
+        for day in dates:
+            own = cells.get((room_id, day))
+            if (room_id, day) in blocked and (own is None or reserved_by[(room_id, day)] != own.id):
+                results.append({'room_id': room_id, 'date': day.isoformat(), 'result': 'conflict',
+                                'booking_id': reserved_by[(room_id, day)]})
+                continue
+            if own is None:
+                booking = Booking(homestay_id=homestay.id, room_id=room_id, date=day, check_out=day,
+                                  source='calendar', **fields)
+                booking.fill_search_fields()
+                to_create.append(booking)
+                key, people = booking_key(booking)
+                deltas[key][0] += people
+                deltas[key][1] += 1
+                results.append({'room_id': room_id, 'date': day.isoformat(), 'result': 'created', 'booking': booking})
+            else:
+                old_key, old_people = booking_key(own)
+                for name, value in fields.items():
+                    setattr(own, name, value)
+                own.fill_search_fields()
+                own.updated_at = now
+                to_update.append(own)
+                key, people = booking_key(own)
+                deltas[old_key][0] += people - old_people
+                results.append({'room_id': room_id, 'date': day.isoformat(), 'result': 'updated',
+                                'booking_id': own.id})
+
+    return results, to_create, to_update, deltas
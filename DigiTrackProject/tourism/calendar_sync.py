@@ -0,0 +1,99 @@
+"""
+Delta sync for the owner calendar (/api/calendar-data/).
+
+Without ?since= the response is a full snapshot of the homestay's bookings,
+optionally limited to stays overlapping ?start=&end=. Every response carries a
+``watermark``; passing it back as ?since= returns only the bookings written
+after it, plus the ids of bookings deleted since then (BookingTombstone rows
+written by the post_delete signal). Deltas ignore the window so a booking
+moved out of it still reaches the client.
+
+"After" is in commit order, not by timestamp: updated_at is set when a row is
+saved, which can be well before its transaction commits, so a slow writer
+could land behind a watermark a client already has. Each homestay has a
+CalendarSequence counter instead. Every booking write and tombstone takes the
+next value with next_sync_seq() inside its own transaction; the counter row
+stays locked until that transaction commits, so a homestay's writes commit in
+sequence order. A poll reads the committed counter first and returns it as the
+watermark; every row at or below it is visible to the booking query that
+follows. Rows written meanwhile may be sent twice; clients merge by id.
+
+Tombstones are kept for TOMBSTONE_RETENTION; a watermark older than that gets
+a full snapshot (``full: true``) instead. Old tombstones are removed by
+`manage.py purge_tombstones`.
+"""
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import Booking, BookingTombstone, CalendarSequence
+from .pagination import PageError, decode_cursor, encode_cursor
+from .tourist_list import parse_filters
+
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+
+def next_sync_seq(homestay_id):
+    """Advance the homestay's CalendarSequence and return the new value. Call inside the write's transaction."""
+    table = connection.ops.quote_name(CalendarSequence._meta.db_table)
+    with connection.cursor() as cursor:
+        # One statement on both PostgreSQL and SQLite (3.35+): creates the counter on first use
+        cursor.execute(f'INSERT INTO {table} (homestay_id, value) VALUES (%s, 1) '
+                       f'ON CONFLICT (homestay_id) DO UPDATE SET value = {table}.value + 1 RETURNING value',
+                       [homestay_id])
+        return cursor.fetchone()[0]
+
+
+def make_watermark(sequence):
+    """The watermark for a committed counter value read by a poll (None: nothing written yet)."""
+    return encode_cursor([sequence or 0, timezone.now().isoformat()])
+
+
+def parse_since(params):
+    """``(sequence, issued_at)`` from ?since= (None when absent)."""
+    if not params.get('since'):
+        return None
+    try:
+        sequence, issued_at = decode_cursor(params['since'])
+        sequence, issued_at = int(sequence), datetime.fromisoformat(issued_at)
+    except (TypeError, ValueError):
+        raise PageError('Invalid since watermark.')
+    if timezone.is_naive(issued_at):
+        raise PageError('Invalid since watermark.')
+    return sequence, issued_at
+
+
+def booking_changes(homestay, params):
+    """
+    ``(bookings, deleted_ids, sequence, full)`` for ?since=&start=&end=: a Booking
+    queryset to serialise, a queryset of the ids of deleted bookings, a queryset of
+    the homestay's counter and whether this is a full snapshot. Read the counter
+    first, pass it to make_watermark(), then read the others. All three are lazy,
+    so async views can evaluate them with the async ORM.
+    """
+    since = parse_since(params)
+    filters = parse_filters(params)
+    sequence = CalendarSequence.objects.filter(homestay_id=homestay.id).values_list('value', flat=True)
+    bookings = Booking.objects.filter(homestay=homestay)
+    deleted = BookingTombstone.objects.values_list('booking_id', flat=True)
+    if since is None or since[1] < timezone.now() - TOMBSTONE_RETENTION:
+        if filters['start']:
+            bookings = bookings.filter(check_out__gte=filters['start'])
+        if filters['end']:
+            bookings = bookings.filter(date__lte=filters['end'])
+        return bookings, deleted.none(), sequence, True
+    deleted = deleted.filter(homestay_id=homestay.id, sync_seq__gt=since[0])
+    return bookings.filter(sync_seq__gt=since[0]), deleted, sequence, False
+
+
+def record_deletion(booking):
+    """Write the tombstone for a deleted booking (inside the delete's transaction)."""
+    BookingTombstone.objects.create(booking_id=booking.pk, homestay_id=booking.homestay_id,
+                                    sync_seq=next_sync_seq(booking.homestay_id))
+
+
+def purge_tombstones(now=None):
+    """Delete tombstones older than TOMBSTONE_RETENTION. Returns the number deleted."""
+    cutoff = (now or timezone.now()) - TOMBSTONE_RETENTION
+    return BookingTombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
@@ -0,0 +1,153 @@
+"""
+Negotiated response compression (brotli or gzip).
+
+CompressionMiddleware compresses text responses (HTML, JSON, CSV, JS, SVG)
+of at least COMPRESSION_MIN_BYTES with the best coding the client accepts:
+brotli when the ``brotli`` package is installed, otherwise gzip. Smaller
+bodies are sent as they are, since framing and CPU cost more than they save.
+HTML is always gzipped (see below).
+Streamed bodies (the CSV exports) are compressed chunk by chunk as they are
+produced; the event stream is never touched, so events are not held back.
+
+HTML pages mix reflected input with per-user secrets. Like Django's
+GZipMiddleware, gzipped bodies therefore carry random padding against
+BREACH. Brotli output has no such padding, so pages are never sent as
+brotli. CSRF tokens are masked per response either way.
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Fast enough to run on every response; higher levels cost far more CPU for a few % less
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+NEVER_COMPRESSED = ('text/event-stream',)
+# Gzip only: BREACH padding (see above)
+PADDED_ONLY = ('text/html',)
+
+_coding_re = _lazy_re_compile(r'^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def choose_encoding(accept_encoding, available=None):
+    """The coding of ``available`` (best first) the Accept-Encoding header likes most, or None."""
+    if available is None:
+        available = ('br', 'gzip') if brotli else ('gzip',)
+    weights = {}
+    for part in accept_encoding.split(','):
+        match = _coding_re.match(part)
+        if match:
+            try:
+                weights[match[1].lower()] = float(match[2]) if match[2] else 1.0
+            except ValueError:
+                continue
+    best, best_q = None, 0
+    for coding in available:
+        q = weights.get(coding, weights.get('*', 0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _content_type(response):
+    return response.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def _compressible(response):
+    content_type = _content_type(response)
+    return content_type.startswith(COMPRESSIBLE_TYPES) and content_type not in NEVER_COMPRESSED
+
+
+def _stream_compressor(encoding):
+    """(compress, flush, finish) functions of a new ``encoding`` stream."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def compress_chunks(chunks, encoding):
+    compress, flush, finish = _stream_compressor(encoding)
+    for chunk in chunks:
+        # Flush per chunk: whatever the view has produced goes out now
+        data = compress(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_chunks(chunks, encoding):
+    compress, flush, finish = _stream_compressor(encoding)
+    async for chunk in chunks:
+        data = compress(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, as negotiated with Accept-Encoding.
+
+    Sync and async capable like MetricsMiddleware: a MiddlewareMixin would run
+    process_response through the thread-sensitive executor on every ASGI request.
+    """
+    sync_capable = True
+    async_capable = True
+    max_random_bytes = GZipMiddleware.max_random_bytes
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not _compressible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''),
+                                   ('gzip',) if _content_type(response) in PADDED_ONLY else None)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compress = acompress_chunks if response.is_async else compress_chunks
+            response.streaming_content = compress(response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            else:
+                # Padded: the HTML pages can only be compressed this way
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # A compressed body is not byte-for-byte the resource the strong ETag was computed for
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,76 @@
+"""
+Homestay directory behind the MTO admin user list and homestay search.
+
+Guest totals are read from the DailyArrival rollup (see rollups.py) in the same
+query that lists the homestays, so a page costs two queries (count + rows)
+however many homestays or bookings there are.
+"""
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Lower
+
+from .models import Homestay
+from .pagination import PageError, parse_page
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# ?sort= values (prefix with '-' for descending) -> order_by expressions
+SORT_FIELDS = {
+    'guests': 'total_guests',
+    'name': 'name_lower',
+    'status': 'is_active_rank',
+}
+
+
+def directory_queryset(q='', sort='name'):
+    """Homestays with owner and ``total_guests``, filtered by ``q`` and ordered by ``sort``."""
+    descending = sort.startswith('-')
+    key = sort.lstrip('-')
+    if key not in SORT_FIELDS:
+        raise PageError(f"sort must be one of: {', '.join(SORT_FIELDS)}.")
+    homestays = (
+        Homestay.objects.select_related('owner')
+        .annotate(
+            total_guests=Coalesce(Sum('daily_arrivals__arrivals'), 0),
+            name_lower=Lower('name'),
+            is_active_rank=Case(When(owner__is_active=True, then=Value(0)), default=Value(1),
+                                output_field=IntegerField()),
+        )
+    )
+    if q:
+        homestays = homestays.filter(Q(name__icontains=q) | Q(owner__name__icontains=q) | Q(owner__username__icontains=q))
+    field = SORT_FIELDS[key]
+    return homestays.order_by(f'-{field}' if descending else field, 'id')
+
+
+def directory_row(h):
+    return {
+        'homestayName': h.name,
+        'ownerName': h.owner.name if h.owner else '',
+        'address': h.address,
+        'username': h.owner.username if h.owner else '',
+        'status': 'Active' if h.owner and h.owner.is_active else 'Inactive',
+        'totalGuests': h.total_guests,
+    }
+
+
+def _page(params):
+    limit, offset = parse_page(params, DEFAULT_LIMIT, MAX_LIMIT)
+    homestays = directory_queryset((params.get('q') or '').strip(), params.get('sort') or 'name')
+    return homestays, limit, offset
+
+
+def directory_page(params):
+    """The JSON body for one page of the directory, driven by ?q=&sort=&limit=&offset=."""
+    homestays, limit, offset = _page(params)
+    total = homestays.order_by().count()
+    rows = [directory_row(h) for h in homestays[offset:offset + limit]]
+    return {'users': rows, 'total': total, 'limit': limit, 'offset': offset}
+
+
+async def adirectory_page(params):
+    """directory_page() on the async ORM, for async views."""
+    homestays, limit, offset = _page(params)
+    total = await homestays.order_by().acount()
+    rows = [directory_row(h) async for h in homestays[offset:offset + limit]]
+    return {'users': rows, 'total': total, 'limit': limit, 'offset': offset}
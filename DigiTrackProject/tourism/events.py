@@ -0,0 +1,195 @@
+"""
+Server-sent events for the owner and MTO dashboards (/api/events/).
+
+Model signals publish a small event whenever a booking, registration or room
+changes; dashboards connected to the stream re-fetch just what changed
+(the owner calendar through its ?since= delta sync) instead of re-reading
+whole tables on a timer. Owners receive the events of their own homestay
+(channel ``homestay:<id>``), staff every event (channel ``staff``).
+
+Events are published after the transaction commits, through the broker named
+by EVENTS_BROKER. LocalBroker keeps subscribers in memory and reaches the
+connections of its own process only, which suits a single worker. RedisBroker
+(the default when REDIS_URL is set) publishes on a Redis channel. In each
+process with connected streams, a listener thread hands the messages to that
+process's subscriptions. If the listener loses Redis, it reconnects and tells
+its streams to resync, because events may have been missed in between.
+
+The stream is an async generator, so each idle connection costs a queue and
+a suspended coroutine rather than a thread: it must be served by the ASGI
+application. Under WSGI the view answers 503.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Events a slow client may fall behind by before it is told to reload everything
+QUEUE_SIZE = 100
+RESYNC = {'type': 'resync'}
+REDIS_CHANNEL = 'digitrack:events'
+# Seconds between attempts to reach Redis again
+REDIS_RETRY_SECONDS = 1
+
+
+class Subscription:
+    """One connected stream: its channels and the queue its events are put on."""
+    def __init__(self, channels, loop):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def put(self, event):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog: the client re-fetches everything on 'resync'
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class Broker(ABC):
+    """Fan-out of published events to the subscriptions of this process."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, channels):
+        """Register a subscription for ``channels``; call from the stream's event loop."""
+        subscription = Subscription(channels, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    def deliver(self, channels, event):
+        """
+        Hand ``event`` to every local subscription listening on one of ``channels``
+        (all of them when None). Thread-safe.
+        """
+        channels = None if channels is None else set(channels)
+        with self._lock:
+            targets = [s for s in self._subscriptions if channels is None or s.channels & channels]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Event loop already closed: the connection is going away
+                self.unsubscribe(subscription)
+
+    @abstractmethod
+    def publish(self, channels, event):
+        """Send ``event`` to ``channels`` on every worker. Subclasses route it through shared pub/sub."""
+
+
+class LocalBroker(Broker):
+    def publish(self, channels, event):
+        self.deliver(channels, event)
+
+
+class RedisBroker(Broker):
+    """Pub/sub through Redis (REDIS_URL), so events reach the streams of every worker."""
+    def __init__(self, url=None):
+        super().__init__()
+        import redis
+        self._redis = redis.Redis.from_url(url or settings.REDIS_URL)
+        self._listener = None
+
+    def publish(self, channels, event):
+        self._redis.publish(REDIS_CHANNEL, json.dumps({'channels': list(channels), 'event': event}))
+
+    def subscribe(self, channels):
+        # Only processes serving streams need the listener
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='events-redis', daemon=True)
+                self._listener.start()
+        return super().subscribe(channels)
+
+    def _listen(self):
+        reconnected = False
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+                if reconnected:
+                    # Whatever was published while the listener was away is lost: make every
+                    # stream re-fetch, now that new events reach it again
+                    reconnected = False
+                    self.deliver(None, RESYNC)
+                for message in pubsub.listen():
+                    data = json.loads(message['data'])
+                    self.deliver(data['channels'], data['event'])
+            except Exception:
+                logger.warning('Event listener lost Redis; reconnecting', exc_info=True)
+                reconnected = True
+                time.sleep(REDIS_RETRY_SECONDS)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def channels_for(homestay_id):
+    return ['staff'] if homestay_id is None else [f'homestay:{homestay_id}', 'staff']
+
+
+def publish_event(type_, action, homestay_id, **data):
+    """Publish ``{type, action, homestay_id, ...}`` once the current transaction commits."""
+    event = {'type': type_, 'action': action, 'homestay_id': homestay_id, **data}
+    transaction.on_commit(lambda: get_broker().publish(channels_for(homestay_id), event))
+
+
+def format_event(event):
+    """One SSE frame for ``event``."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_frames(channels, heartbeat=None):
+    """
+    The SSE byte stream for ``channels``: a retry hint, then one frame per event
+    and a comment line every ``heartbeat`` seconds so proxies keep the connection open
+    and a disconnected client is noticed.
+    """
+    heartbeat = heartbeat or settings.EVENTS_HEARTBEAT_SECONDS
+    broker = get_broker()
+    # Subscribed here, not in the view: a client gone before the stream starts never
+    # runs this generator, and so never leaves a subscription behind
+    subscription = broker.subscribe(channels)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
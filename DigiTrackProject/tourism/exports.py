@@ -0,0 +1,122 @@
+"""
+Streaming CSV exports of registered tourists.
+
+Rows are read with values_list().iterator(), so neither model instances nor the
+whole result set are held in memory, and the homestay name comes from the SQL
+join. The CSV is produced in ~64 KB chunks as the rows arrive, optionally
+gzip-compressed on the fly, so the first bytes leave before the query has been
+fully read and memory stays flat however many rows are exported.
+
+Under ASGI a StreamingHttpResponse over a sync iterator is read into a list
+before the first byte is sent, so there the chunks come from async generators
+instead (``asynchronous=True``), fetching CHUNK_ROWS rows at a time in a worker
+thread.
+"""
+import csv
+import zlib
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+HEADER = ['guest_name', 'contact_number', 'homestay_name', 'date', 'check_out', 'num_people', 'status']
+FIELDS = ('guest_name', 'contact_number', 'homestay__name', 'date', 'check_out', 'num_people', 'status')
+CHUNK_ROWS = 2000
+CHUNK_BYTES = 64 * 1024
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def _line(writer, row):
+    guest_name, contact, homestay_name, date, check_out, num_people, status = row
+    return writer.writerow([
+        guest_name or '',
+        contact or '',
+        homestay_name or '',
+        date.isoformat() if date else '',
+        check_out.isoformat() if check_out else '',
+        num_people or '',
+        status or '',
+    ])
+
+
+def csv_chunks(queryset):
+    """Encoded CSV chunks (header first) for the FIELDS of ``queryset``."""
+    writer = csv.writer(_Echo())
+    buffer = [writer.writerow(HEADER)]
+    size = len(buffer[0])
+    for row in queryset.values_list(*FIELDS).iterator(chunk_size=CHUNK_ROWS):
+        line = _line(writer, row)
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    yield ''.join(buffer).encode('utf-8')
+
+
+def gzip_chunks(chunks):
+    """Compress an iterable of byte chunks into a single gzip stream."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _arows(queryset):
+    # Not values_list().aiterator(): on Django 5.2 it runs the query on the event loop.
+    # The generator is only created here; each slice is fetched in the thread of the
+    # request's connection, so a server-side cursor stays on it.
+    rows = queryset.values_list(*FIELDS).iterator(chunk_size=CHUNK_ROWS)
+    fetch = sync_to_async(lambda: list(islice(rows, CHUNK_ROWS)))
+    while chunk := await fetch():
+        for row in chunk:
+            yield row
+
+
+async def acsv_chunks(queryset):
+    """csv_chunks() for ASGI."""
+    writer = csv.writer(_Echo())
+    buffer = [writer.writerow(HEADER)]
+    size = len(buffer[0])
+    async for row in _arows(queryset):
+        line = _line(writer, row)
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    yield ''.join(buffer).encode('utf-8')
+
+
+async def agzip_chunks(chunks):
+    """gzip_chunks() over an async iterable."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def streaming_csv_response(queryset, filename, gzip=False, asynchronous=False):
+    """
+    A StreamingHttpResponse downloading ``queryset`` as ``filename``.csv (or .csv.gz);
+    pass ``asynchronous=True`` when serving an ASGI request.
+    """
+    chunks = acsv_chunks(queryset) if asynchronous else csv_chunks(queryset)
+    if gzip:
+        compressed = agzip_chunks(chunks) if asynchronous else gzip_chunks(chunks)
+        response = StreamingHttpResponse(compressed, content_type='application/gzip')
+        filename += '.csv.gz'
+    else:
+        response = StreamingHttpResponse(chunks, content_type='text/csv; charset=utf-8')
+        filename += '.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,113 @@
+"""
+Cached payload for the public home page.
+
+The payload (homestay list, features, dynamic features, rankings) only
+changes when a booking, room, feature, homestay or owner account changes, so
+it is stored in Django's cache under a versioned key. Model signals (see
+signals.py) bump the version once the write commits, which makes every worker
+rebuild the payload on its next request. Per-session values such as the login flags are never cached.
+Room availability is not part of the payload; the calendar fetches it per
+homestay from homestay_availability_api.
+"""
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum, Count, Case, When, IntegerField
+
+from .models import Homestay, HomestayFeature, Booking
+
+HOME_CONTEXT_VERSION_KEY = 'home_context:version'
+HOME_CONTEXT_KEY = 'home_context:v{version}'
+
+
+def _current_version():
+    version = cache.get(HOME_CONTEXT_VERSION_KEY)
+    if version is None:
+        cache.add(HOME_CONTEXT_VERSION_KEY, 1, None)
+        version = cache.get(HOME_CONTEXT_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_home_context():
+    """Bump the payload version so all workers rebuild it on next use."""
+    try:
+        cache.incr(HOME_CONTEXT_VERSION_KEY)
+    except ValueError:
+        # Key missing (first write or evicted): any fresh value invalidates old payloads
+        cache.add(HOME_CONTEXT_VERSION_KEY, 1, None)
+        cache.incr(HOME_CONTEXT_VERSION_KEY)
+
+
+def build_home_payload():
+    """Assemble the home page payload from the database."""
+    homestays = list(
+        Homestay.objects.filter(owner__isnull=False, owner__is_active=True)
+        .order_by('id')
+        .values('id', 'name', 'max_guests', 'wifi_available', 'videoke_available', 'pet_friendly', 'beach_front')
+    )
+    homestay_ids = [h['id'] for h in homestays]
+    homestay_features = {
+        h['id']: {
+            'max_guests': h['max_guests'],
+            'wifi_available': h['wifi_available'],
+            'videoke_available': h['videoke_available'],
+            'pet_friendly': h['pet_friendly'],
+            'beach_front': h['beach_front'],
+        }
+        for h in homestays
+    }
+    homestay_dynamic_features = {homestay_id: [] for homestay_id in homestay_ids}
+    features = (
+        HomestayFeature.objects.filter(homestay_id__in=homestay_ids)
+        .order_by('id')
+        .values('homestay_id', 'id', 'name', 'type', 'value')
+    )
+    for f in features:
+        homestay_id = f.pop('homestay_id')
+        homestay_dynamic_features[homestay_id].append(f)
+
+    # --- Homestay Performance Rankings ---
+    rankings = (
+        Homestay.objects.filter(owner__isnull=False, owner__is_active=True)
+        .annotate(
+            total_arrivals=Sum(
+                Case(
+                    When(bookings__source='registration', then='bookings__num_people'),
+                    default=0,
+                    output_field=IntegerField()
+                )
+            )
+        )
+        .order_by('-total_arrivals')
+        .values('id', 'name', 'total_arrivals')
+    )
+    homestay_rankings = list(rankings)
+    # If num_people is null, fallback to count of bookings with source='registration'
+    missing = [h['id'] for h in homestay_rankings if h['total_arrivals'] is None]
+    if missing:
+        counts = dict(
+            Booking.objects.filter(homestay_id__in=missing, source='registration')
+            .values_list('homestay_id')
+            .annotate(total=Count('id'))
+        )
+        for h in homestay_rankings:
+            if h['total_arrivals'] is None:
+                h['total_arrivals'] = counts.get(h['id'], 0)
+
+    return {
+        'homestays': [{'id': h['id'], 'name': h['name']} for h in homestays],
+        'features_json': json.dumps(homestay_features),
+        'dynamic_features_json': json.dumps(homestay_dynamic_features),
+        'homestay_rankings': homestay_rankings,
+    }
+
+
+def get_home_payload():
+    """Return the home page payload, rebuilding it when the cached version is stale."""
+    key = HOME_CONTEXT_KEY.format(version=_current_version())
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_home_payload()
+        cache.set(key, payload, getattr(settings, 'HOME_CONTEXT_CACHE_TIMEOUT', 600))
+    return payload
@@ -0,0 +1,126 @@
+"""
+Username-based login lockout shared by every worker process.
+
+After LOGIN_LOCK_THRESHOLD failed logins within LOGIN_LOCK_TIMEOUT seconds a
+username is locked for LOGIN_LOCK_TIMEOUT seconds. The counter must be shared
+and incremented atomically, otherwise each gunicorn worker (or two concurrent
+requests) counts on its own and the lock trips late or never. Two backends,
+selected by LOGIN_LOCKOUT_BACKEND:
+
+* CacheLockoutBackend: cache.add() + cache.incr() on a cache whose incr is
+  atomic (Redis, Memcached; LocMemCache within one process).
+* DatabaseLockoutBackend: a LoginLockout row per username incremented with a
+  single UPDATE, for deployments without Redis. Django's database and
+  file-based caches implement incr as get-then-set, so they cannot back the
+  cache backend.
+
+register_failure() returns the remaining lock time, so exactly the request
+that reaches the threshold, and every one after it, sees the lock.
+"""
+import time
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class LockoutBackend(ABC):
+    def __init__(self, threshold=None, timeout=None):
+        self.threshold = threshold or settings.LOGIN_LOCK_THRESHOLD
+        self.timeout = timeout or settings.LOGIN_LOCK_TIMEOUT
+
+    @abstractmethod
+    def locked_for(self, key):
+        """Seconds left on the lock for ``key`` (0 when not locked)."""
+
+    @abstractmethod
+    def register_failure(self, key):
+        """Count a failed login; returns the seconds left on the lock (0 when not locked)."""
+
+    @abstractmethod
+    def reset(self, key):
+        """Forget failures and any lock for ``key`` (after a successful login)."""
+
+
+class CacheLockoutBackend(LockoutBackend):
+    def __init__(self, cache_alias='default', **kwargs):
+        super().__init__(**kwargs)
+        self.cache = caches[cache_alias]
+        if type(self.cache).incr is BaseCache.incr:
+            raise ImproperlyConfigured(
+                f'{type(self.cache).__name__} has no atomic incr(); use a Redis or Memcached cache '
+                f'or DatabaseLockoutBackend.')
+
+    def _keys(self, key):
+        return f'login_count_user:{key}', f'login_block_until_user:{key}'
+
+    def locked_for(self, key):
+        until = self.cache.get(self._keys(key)[1])
+        return max(0, int(until - time.time())) if until else 0
+
+    def register_failure(self, key):
+        count_key, until_key = self._keys(key)
+        if self.cache.add(count_key, 1, self.timeout):
+            count = 1
+        else:
+            try:
+                count = self.cache.incr(count_key)
+            except ValueError:
+                # The window expired between add() and incr(): start a new one
+                self.cache.add(count_key, 1, self.timeout)
+                count = 1
+        if count < self.threshold:
+            return 0
+        if count == self.threshold:
+            self.cache.set(until_key, time.time() + self.timeout, self.timeout)
+            return self.timeout
+        return self.locked_for(key) or self.timeout
+
+    def reset(self, key):
+        self.cache.delete_many(self._keys(key))
+
+
+class DatabaseLockoutBackend(LockoutBackend):
+    def locked_for(self, key):
+        from .models import LoginLockout
+        until = LoginLockout.objects.filter(key=key).values_list('locked_until', flat=True).first()
+        return max(0, int((until - timezone.now()).total_seconds())) if until else 0
+
+    def register_failure(self, key):
+        from .models import LoginLockout
+        now = timezone.now()
+        window_end = now + timedelta(seconds=self.timeout)
+        _, created = LoginLockout.objects.get_or_create(key=key, defaults={'window_expires': window_end})
+        if created:
+            # Drop rows of usernames whose window and lock are both over
+            LoginLockout.objects.filter(window_expires__lt=now).filter(
+                Q(locked_until__isnull=True) | Q(locked_until__lt=now)).delete()
+        with transaction.atomic():
+            rows = LoginLockout.objects.filter(key=key)
+            # The first UPDATE takes the row (PostgreSQL) or database (SQLite) write lock,
+            # so the increments of concurrent requests are serialised and each reads its own count.
+            rows.filter(window_expires__lte=now).filter(Q(locked_until__isnull=True) | Q(locked_until__lte=now)) \
+                .update(failures=0, window_expires=window_end, locked_until=None)
+            rows.update(failures=F('failures') + 1)
+            failures, locked_until = rows.values_list('failures', 'locked_until').get()
+            if failures < self.threshold:
+                return 0
+            if failures == self.threshold:
+                rows.update(locked_until=window_end)
+                return self.timeout
+        return max(0, int((locked_until - now).total_seconds())) if locked_until else self.timeout
+
+    def reset(self, key):
+        from .models import LoginLockout
+        LoginLockout.objects.filter(key=key).delete()
+
+
+def get_lockout_backend():
+    return import_string(settings.LOGIN_LOCKOUT_BACKEND)()
@@ -0,0 +1,110 @@
+"""
+Logging plumbing used by the LOGGING setting.
+
+- JsonFormatter writes one JSON object per record. Values passed with
+  ``extra=`` become fields of their own, so log lines can be filtered by
+  user, homestay, etc. without parsing the message.
+- RateLimitFilter lets through at most ``rate`` records per ``per`` seconds
+  for each message template, up to ``max_level``; warnings and errors always
+  pass. The next record let through carries the number dropped in between
+  (``suppressed``). Use %-style arguments (``logger.info('... %s', x)``), not
+  f-strings: the template is the rate-limit key, and the message is only
+  formatted when a record is actually emitted. Records passed
+  ``extra={'rate_key': ...}`` get a budget of their own per value, e.g. per
+  username for authentication events, so one noisy key cannot silence the rest.
+- QueueingHandler hands records to a background thread that does the
+  formatting and the write, so request threads never wait on stdout.
+"""
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'rate_key'}
+# RateLimitFilter drops expired windows once it tracks this many keys
+MAX_WINDOWS = 10000
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, rate=10, per=60, max_level='INFO'):
+        super().__init__()
+        self.rate = rate
+        self.per = per
+        self.max_level = logging.getLevelName(max_level) if isinstance(max_level, str) else max_level
+        self._lock = threading.Lock()
+        # (logger, template, rate_key) -> [window start, records let through, records dropped]
+        self._windows = {}
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg, getattr(record, 'rate_key', None))
+        now = time.monotonic()
+        with self._lock:
+            if len(self._windows) >= MAX_WINDOWS:
+                # Per-key budgets (e.g. one per username tried) would otherwise grow without bound
+                self._windows = {k: w for k, w in self._windows.items() if now - w[0] < self.per}
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.rate:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class QueueingHandler(QueueHandler):
+    """Write records to ``stream`` (stdout by default) from a background thread."""
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self._target = logging.StreamHandler(stream or sys.stdout)
+        self.listener = QueueListener(self.queue, self._target, respect_handler_level=False)
+        self.listener.start()
+
+    def close(self):
+        # Called by logging.shutdown() at exit: write out what is still queued
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+    def setFormatter(self, fmt):
+        # The formatter runs in the listener thread
+        self._target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Merge the arguments now (they may change once the caller moves on) and
+        # keep the traceback as text; the listener does the rest of the formatting
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
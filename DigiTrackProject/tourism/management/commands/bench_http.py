@@ -0,0 +1,264 @@
+import asyncio
+import json
+import platform
+import resource
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from DigiTrackProject.tourism.models import Booking, CustomUser
+from DigiTrackProject.tourism.seeding import delete_seeded, seed_load, seeded_owners
+from .bench_servers import SERVERS, load, login_session, percentile, start_server, stop_server, tree_rss_mb
+
+# name -> (url name, who asks, query parameters)
+ENDPOINTS = {
+    'home': ('home', 'anon', {}),
+    'calendar_data_api': ('calendar_data_api', 'owner', {}),
+    'api_tourist_list': ('api-tourist-list', 'staff', {'limit': '200'}),
+    'api_tourist_search': ('api_tourist_search', 'staff', {'q': 'dela cruz'}),
+    'export_tourists_csv': ('export_tourists_csv', 'owner', {}),
+    'export_tourists_all_csv': ('export_tourists_all_csv', 'staff', {}),
+}
+# Endpoints that also answer ?format=columns
+COLUMNAR = ('calendar_data_api', 'api_tourist_list', 'api_tourist_search')
+# Response body sizes: (field, Accept-Encoding, ?format=columns)
+SIZES = (('bytes', '', False), ('gzip_bytes', 'gzip', False), ('br_bytes', 'br', False),
+         ('columns_bytes', '', True), ('columns_br_bytes', 'br', True))
+PREFIX = 'bench'
+STAFF_USERNAME = 'bench-staff'
+# Compared with the baseline: (field, True when a higher value is worse)
+GATED = (('p50_ms', True), ('p95_ms', True), ('rps', False), ('peak_rss_mb', True), ('bytes', True),
+         ('br_bytes', True))
+
+
+def compare(results, baseline, threshold, min_ms=1.0):
+    """
+    The regressions of ``results`` against ``baseline`` (both as written by this command):
+    a latency, throughput, memory or response size figure more than ``threshold`` (a fraction) worse, or
+    any extra query per request. Latencies are only compared from ``min_ms`` up.
+    """
+    regressions = []
+    for endpoint, scales in results['results'].items():
+        for scale, current in scales.items():
+            before = baseline.get('results', {}).get(endpoint, {}).get(scale)
+            if before is None:
+                continue
+            where = f'{endpoint} at {scale} homestays'
+            if current['queries'] > before['queries']:
+                regressions.append(f"{where}: {current['queries']} queries per request, baseline {before['queries']}")
+            for field, higher_is_worse in GATED:
+                old, new = before.get(field), current.get(field)
+                if not old or new is None:
+                    continue
+                if field.endswith('_ms') and max(old, new) < min_ms:
+                    continue
+                change = (new - old) / old if higher_is_worse else (old - new) / old
+                if change > threshold:
+                    regressions.append(f'{where}: {field} {new:.1f}, baseline {old:.1f} ({change:+.0%} worse)')
+    return regressions
+
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM (Linux); elsewhere the peak is the process's
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _consume(response):
+    """Read the whole body; returns its size in bytes (as sent, so compressed if it was)."""
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the home page, calendar, tourist search and CSV export endpoints at several '
+            'data scales. For each --scales value the configured database is seeded with that many '
+            'homestays (owners named bench<n>, see seed_load; other data is left alone, so use an '
+            'empty database for comparable numbers) and each endpoint is measured with the Django '
+            'test client in this process (--server client) or over HTTP against gunicorn. Reports '
+            'p50/p95/p99 latency, requests per second, queries per request, peak RSS and the bytes '
+            'on the wire (plain, gzip, brotli and, where supported, ?format=columns), writes them '
+            'to --output, and with --baseline fails when a figure is more than --threshold worse. '
+            'p99 is reported but not compared: it is too noisy for a pass/fail gate.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[10, 50, 200], help='Homestays to seed')
+        parser.add_argument('--years', type=int, default=2, help='Years of booking history per homestay')
+        parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument('--server', choices=['client', *SERVERS], default='client')
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per endpoint (client)')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per endpoint first')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds of load per endpoint (gunicorn)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight (gunicorn)')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='bench_http.json')
+        parser.add_argument('--baseline', default='', help='Results of an earlier run to compare with')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed regression, as a fraction')
+        parser.add_argument('--min-ms', type=float, default=1.0, help='Ignore latency changes below this')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data of the largest scale')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = json.loads(Path(options['baseline']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read the baseline: {e}')
+        if seeded_owners(PREFIX).exists():
+            raise CommandError(f'Owners named {PREFIX}<n> already exist (an interrupted run?); delete them with '
+                               f'`seed_load --prefix {PREFIX} --replace --homestays 1` or drop the database')
+        staff, _ = CustomUser.objects.get_or_create(username=STAFF_USERNAME,
+                                                    defaults={'name': 'Benchmark', 'is_staff': True})
+        results = {}
+        try:
+            for scale in sorted(options['scales']):
+                delete_seeded(PREFIX)
+                seed_load(homestays=scale, years=options['years'], seed=options['seed'], prefix=PREFIX)
+                bookings = Booking.objects.filter(homestay__owner__username__startswith=PREFIX).count()
+                self.stdout.write(f'{scale} homestays, {bookings} bookings')
+                users = {'anon': None, 'owner': CustomUser.objects.get(username=f'{PREFIX}0'), 'staff': staff}
+                measured = self.measure(options, users)
+                for endpoint, figures in measured.items():
+                    results.setdefault(endpoint, {})[str(scale)] = {'bookings': bookings, **figures}
+        finally:
+            if not options['keep']:
+                delete_seeded(PREFIX)
+                staff.delete()
+
+        report = {
+            'meta': {'server': options['server'], 'years': options['years'], 'seed': options['seed'],
+                     'requests': options['requests'], 'duration': options['duration'],
+                     'concurrency': options['concurrency'], 'workers': options['workers'],
+                     'database': connection.vendor, 'python': platform.python_version(),
+                     'django': django.get_version(), 'created': timezone.now().isoformat()},
+            'results': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+        self.print_table(results)
+        self.stdout.write(f"Results written to {options['output']}")
+        if baseline is not None:
+            regressions = compare(report, baseline, options['threshold'], options['min_ms'])
+            if regressions:
+                raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+    def measure(self, options, users):
+        """endpoint -> figures, for the data currently seeded."""
+        clients = {}
+        for who, user in users.items():
+            clients[who] = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+            if user is not None:
+                clients[who].force_login(user)
+        measured = {}
+        for endpoint in options['endpoints']:
+            url_name, who, params = ENDPOINTS[endpoint]
+            client, path = clients[who], reverse(url_name)
+            for _ in range(options['warmup']):
+                _consume(client.get(path, params))
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path, params)
+                _consume(response)
+            if response.status_code != 200:
+                raise CommandError(f'{endpoint} answered {response.status_code}')
+            measured[endpoint] = {'queries': len(queries), **self.sizes(client, endpoint, path, params)}
+        if options['server'] == 'client':
+            for endpoint in options['endpoints']:
+                measured[endpoint].update(self.run_client(clients, endpoint, options['requests']))
+        else:
+            cookies = {who: f'{settings.SESSION_COOKIE_NAME}={login_session(user)}' if user else ''
+                       for who, user in users.items()}
+            process = start_server(options['server'], options['workers'], options['port'])
+            try:
+                for endpoint in options['endpoints']:
+                    measured[endpoint].update(self.run_server(process, cookies, endpoint, options))
+            finally:
+                stop_server(process)
+        return measured
+
+    def sizes(self, client, endpoint, path, params):
+        sizes = {}
+        for field, encoding, columns in SIZES:
+            if columns and endpoint not in COLUMNAR:
+                continue
+            query = {**params, 'format': 'columns'} if columns else params
+            sizes[field] = _consume(client.get(path, query, HTTP_ACCEPT_ENCODING=encoding))
+        return sizes
+
+    def run_client(self, clients, endpoint, requests):
+        url_name, who, params = ENDPOINTS[endpoint]
+        client, path = clients[who], reverse(url_name)
+        latencies = []
+        _reset_peak_rss()
+        started = time.perf_counter()
+        for _ in range(requests):
+            sent = time.perf_counter()
+            _consume(client.get(path, params))
+            latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - started
+        return self.figures(sorted(latencies), requests / elapsed, _peak_rss_mb())
+
+    def run_server(self, process, cookies, endpoint, options):
+        url_name, who, params = ENDPOINTS[endpoint]
+        query = '&'.join(f'{k}={v.replace(" ", "+")}' for k, v in params.items())
+        path = reverse(url_name) + (f'?{query}' if query else '')
+        port = options['port']
+        asyncio.run(load('127.0.0.1', port, [path], cookies[who], options['workers'] * 2, 1))
+        peak = tree_rss_mb(process.pid)
+
+        async def sampled():
+            nonlocal peak
+            task = asyncio.create_task(load('127.0.0.1', port, [path], cookies[who],
+                                            options['concurrency'], options['duration']))
+            while not task.done():
+                peak = max(peak, tree_rss_mb(process.pid))
+                await asyncio.sleep(0.5)
+            return task.result()
+
+        started = time.monotonic()
+        latencies, statuses = asyncio.run(sampled())
+        elapsed = time.monotonic() - started
+        if set(statuses) != {200}:
+            raise CommandError(f'{endpoint} answered {statuses}')
+        return self.figures(sorted(latencies), len(latencies) / elapsed, peak)
+
+    def figures(self, latencies, rps, peak):
+        return {'p50_ms': percentile(latencies, 0.5) * 1000, 'p95_ms': percentile(latencies, 0.95) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000, 'rps': rps, 'peak_rss_mb': peak,
+                'samples': len(latencies)}
+
+    def print_table(self, results):
+        self.stdout.write(f"\n{'endpoint':<26}{'scale':>6}{'bookings':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                          f"{'req/s':>9}{'queries':>9}{'peak MB':>9}{'KB':>9}{'gzip KB':>9}{'br KB':>9}"
+                          f"{'cols KB':>9}{'cols br':>9}")
+        for endpoint, scales in results.items():
+            for scale, r in scales.items():
+                self.stdout.write(f"{endpoint:<26}{scale:>6}{r['bookings']:>10}{r['p50_ms']:>9.1f}"
+                                  f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['rps']:>9.1f}{r['queries']:>9}"
+                                  f"{r['peak_rss_mb']:>9.0f}"
+                                  + ''.join(f'{r[field] / 1024:>9.1f}' if field in r else f"{'-':>9}"
+                                            for field, _, _ in SIZES))
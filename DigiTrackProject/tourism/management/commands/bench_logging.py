@@ -0,0 +1,70 @@
+import logging
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...logs import JsonFormatter, QueueingHandler, RateLimitFilter
+
+
+class Command(BaseCommand):
+    help = ('Per-request cost of logging in the request thread: the stdout prints the homestay '
+            'dashboard used to make (one line per registration booking) against the logging now '
+            'used (disabled DEBUG records, INFO records through the queueing JSON handler, and '
+            'INFO records dropped by the rate limit). Output goes to a line-buffered file, like '
+            'unbuffered container logs.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--bookings', type=int, default=200, help='Registration bookings of the homestay')
+        parser.add_argument('--output', default='', help='File to write the log lines to (default: a temp file)')
+
+    def handle(self, *args, **options):
+        path = options['output'] or tempfile.mkstemp(prefix='bench_logging_')[1]
+        requests, bookings = options['requests'], options['bookings']
+        rows = [(i, f'Guest {i}', 2, 'checked_in') for i in range(bookings)]
+        results = []
+        with open(path, 'w', buffering=1) as stream:
+            results.append(('prints (before)', self.time(requests, lambda: self.legacy_prints(stream, rows))))
+            logger = logging.getLogger('bench_logging')
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            handler = QueueingHandler(stream)
+            handler.setFormatter(JsonFormatter())
+            # Lets the first loop of INFO records through and drops the second
+            handler.addFilter(RateLimitFilter(rate=requests, per=3600))
+            logger.addHandler(handler)
+            try:
+                results.append(('DEBUG record, disabled', self.time(requests, lambda: logger.debug(
+                    'Homestay dashboard for homestay %s: %d tourists', 1, bookings))))
+                results.append(('INFO record, queued JSON', self.time(requests, lambda: logger.info(
+                    'Login succeeded', extra={'username': 'owner1', 'staff': False}))))
+                results.append(('INFO record, rate-limited', self.time(requests, lambda: logger.info(
+                    'Login succeeded', extra={'username': 'owner1', 'staff': False}))))
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+        size = os.path.getsize(path)
+        if not options['output']:
+            os.remove(path)
+        self.stdout.write(f'{requests} requests, {bookings} bookings; {size / 1024:.0f} KB written')
+        for name, seconds in results:
+            self.stdout.write(f'{name:<28}{seconds / requests * 1e6:>10.1f} µs/request')
+
+    def time(self, requests, call):
+        started = time.perf_counter()
+        for _ in range(requests):
+            call()
+        return time.perf_counter() - started
+
+    def legacy_prints(self, stream, rows):
+        # What homestay_view printed on every dashboard load
+        print('DEBUG: Entered homestay_view for user owner1 (ID: 1)', file=stream)
+        print('[DEBUG] All bookings for total_tourists:', file=stream)
+        for booking_id, guest_name, num_people, status in rows:
+            print(f'  Booking ID: {booking_id}, guest_name: {guest_name}, num_people: {num_people}, '
+                  f'status: {status}', file=stream)
+        print(f'[DEBUG] Computed total_tourists: {len(rows) * 2}', file=stream)
+        print('[DEBUG] Bookings passed to template:', rows[:21], file=stream)
+        print('[DEBUG] Total tourists:', len(rows) * 2, file=stream)
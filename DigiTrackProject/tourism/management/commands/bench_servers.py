@@ -0,0 +1,209 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from importlib import import_module
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+# Directory holding manage.py: gunicorn imports the project from there
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+
+SERVERS = {
+    'sync': ('DigiTrackProject.DigiTrackProject.wsgi:application', 'sync'),
+    'async': ('DigiTrackProject.DigiTrackProject.asgi:application', 'uvicorn_worker.UvicornWorker'),
+}
+PUBLIC_PATHS = [
+    '/api/tourist-search/?q=an',
+    '/api/homestay-search/?q=a',
+    '/api/tourist-chart-data/',
+]
+OWNER_PATHS = [
+    '/api/calendar-data/',
+    '/api/my-tourist-chart-data/',
+]
+
+
+def tree_rss_mb(pid):
+    """Resident memory of ``pid`` and all its descendants, in MB (Linux /proc)."""
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+        except FileNotFoundError:
+            continue
+    return total / 1024
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def login_session(user):
+    """A session key logged in as ``user``, stored where a server process will find it."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session.session_key
+
+
+def start_server(name, workers, port):
+    """Start gunicorn serving SERVERS[name] on ``port`` and wait until it accepts connections."""
+    app, worker_class = SERVERS[name]
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', app, '-k', worker_class, '--workers', str(workers),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        cwd=PROJECT_ROOT, env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f'{name} server exited with code {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise CommandError(f'{name} server did not start listening on port {port}')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def fetch(host, port, path, cookie):
+    """One GET on a fresh connection; returns the status code."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        request = f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n'
+        if cookie:
+            request += f'Cookie: {cookie}\r\n'
+        writer.write((request + '\r\n').encode())
+        await writer.drain()
+        status = await reader.readline()
+        await reader.read()
+        return int(status.split()[1])
+    finally:
+        writer.close()
+
+
+async def load(host, port, paths, cookie, concurrency, duration):
+    """Keep ``concurrency`` requests in flight for ``duration`` seconds; returns (latencies, status counts)."""
+    latencies, statuses = [], {}
+    stop_at = time.monotonic() + duration
+
+    async def client(offset):
+        i = offset
+        while time.monotonic() < stop_at:
+            started = time.monotonic()
+            try:
+                status = await fetch(host, port, paths[i % len(paths)], cookie)
+            except (OSError, IndexError, ValueError):
+                status = 'error'
+            latencies.append(time.monotonic() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            i += 1
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return latencies, statuses
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the read-heavy JSON APIs under sync gunicorn workers (WSGI) and uvicorn '
+            'workers (ASGI) given the same memory budget. Each server is started with one worker '
+            'to measure its footprint, then with as many workers as fit in --memory-mb, and '
+            'loaded with --concurrency requests in flight. Uses the configured database; seed it '
+            'first (e.g. `manage.py seed_load`).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--memory-mb', type=int, default=512, help='Memory budget for each server')
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--duration', type=float, default=20, help='Seconds of load per server')
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--username', default='', help='Homestay owner to also load the owner APIs as')
+        parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+
+    def handle(self, *args, **options):
+        if not Path('/proc/self/status').exists():
+            raise CommandError('Measuring worker memory needs Linux /proc')
+        paths, cookie = list(PUBLIC_PATHS), ''
+        if options['username']:
+            cookie = f"{settings.SESSION_COOKIE_NAME}={self.session_for(options['username'])}"
+            paths += OWNER_PATHS
+        results = []
+        for name in options['servers']:
+            per_worker, base = self.measure_worker(name, options, paths, cookie)
+            workers = max(1, int((options['memory_mb'] - base) // per_worker))
+            self.stdout.write(f'{name}: {per_worker:.0f} MB per worker, {base:.0f} MB master -> {workers} workers')
+            results.append((name, workers, *self.run(name, workers, options, paths, cookie)))
+        self.stdout.write(f"\n{'server':<8}{'workers':>8}{'peak MB':>9}{'req/s':>9}{'p50 ms':>8}"
+                          f"{'p95 ms':>8}{'p99 ms':>8}  statuses")
+        for name, workers, peak, rate, latencies, statuses in results:
+            self.stdout.write(
+                f'{name:<8}{workers:>8}{peak:>9.0f}{rate:>9.1f}{percentile(latencies, 0.5) * 1000:>8.1f}'
+                f'{percentile(latencies, 0.95) * 1000:>8.1f}{percentile(latencies, 0.99) * 1000:>8.1f}  {statuses}')
+
+    def session_for(self, username):
+        try:
+            return login_session(get_user_model().objects.get(username=username))
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user named {username!r}')
+
+    def warm_up(self, port, paths, cookie, workers):
+        # Every worker imports views and opens its DB connection before it is measured
+        asyncio.run(load('127.0.0.1', port, paths, cookie, workers * 2, 2))
+
+    def measure_worker(self, name, options, paths, cookie):
+        """``(MB per warmed-up worker, MB for the master)`` of server ``name``."""
+        process = start_server(name, 1, options['port'])
+        try:
+            self.warm_up(options['port'], paths, cookie, 1)
+            with open(f'/proc/{process.pid}/task/{process.pid}/children') as f:
+                worker = sum(tree_rss_mb(int(child)) for child in f.read().split())
+            return worker, tree_rss_mb(process.pid) - worker
+        finally:
+            stop_server(process)
+
+    def run(self, name, workers, options, paths, cookie):
+        """Load server ``name`` with ``workers`` workers: ``(peak MB, req/s, sorted latencies, statuses)``."""
+        process = start_server(name, workers, options['port'])
+        try:
+            self.warm_up(options['port'], paths, cookie, workers)
+            peak = tree_rss_mb(process.pid)
+
+            async def sampled():
+                nonlocal peak
+                task = asyncio.create_task(load('127.0.0.1', options['port'], paths, cookie,
+                                                options['concurrency'], options['duration']))
+                while not task.done():
+                    peak = max(peak, tree_rss_mb(process.pid))
+                    await asyncio.sleep(0.5)
+                return task.result()
+
+            started = time.monotonic()
+            latencies, statuses = asyncio.run(sampled())
+            elapsed = time.monotonic() - started
+        finally:
+            stop_server(process)
+        return peak, len(latencies) / elapsed, sorted(latencies), statuses
@@ -0,0 +1,91 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from DigiTrackProject.tourism.models import Homestay, Room, Booking, DailyArrival
+from DigiTrackProject.tourism.search import matching_bookings
+
+
+def endpoint_queries(homestay_id, year):
+    """The Booking/Room querysets behind the hot endpoints, keyed by a readable label."""
+    registration = Booking.objects.filter(num_people__gt=0, source='registration')
+    return [
+        ('api_tourist_list', registration.order_by('-created_at', '-id').values(
+            'guest_name', 'contact_number', 'homestay__name', 'date', 'check_out', 'num_people', 'status')),
+        ('api_tourist_search', matching_bookings('maria 0917', registration)
+            .order_by('-search_rank', '-created_at', '-id').values('guest_name', 'homestay__name', 'date')),
+        ('api_my_tourists', Booking.objects.filter(homestay_id=homestay_id, source='registration').order_by('-date')),
+        ('calendar_data_api (rooms)', Room.objects.filter(homestay_id=homestay_id)),
+        ('calendar_data_api (bookings)', Booking.objects.filter(homestay_id=homestay_id)),
+        ('reserve_room_api (conflict check)', Booking.objects.filter(
+            room_id=0, date__lte=datetime.date(year, 1, 1), check_out__gte=datetime.date(year, 1, 1), status='reserved')),
+        ('api_register_tourist (overlap check)', Booking.objects.filter(
+            homestay_id=homestay_id, date__lte=datetime.date(year, 1, 3), check_out__gte=datetime.date(year, 1, 1))),
+        ('api_tourist_chart_data (monthly)', DailyArrival.objects.filter(
+            date__year=year, arrivals__gt=0, source='registration')
+            .values_list('date__month').annotate(total=Sum('arrivals'))),
+        ('api_my_tourist_chart_data (monthly)', DailyArrival.objects.filter(
+            homestay_id=homestay_id, date__year=year, arrivals__gt=0)
+            .values_list('date__month').annotate(total=Sum('arrivals'))),
+        ('export_tourists_csv', Booking.objects.filter(homestay_id=homestay_id, source='registration').order_by('-date')),
+        ('export_tourists_all_csv', Booking.objects.filter(source='registration').order_by('-date')),
+    ]
+
+
+def sequential_scans(plan, tables):
+    """Plan lines that read one of ``tables`` without an index (SQLite and PostgreSQL wording)."""
+    found = []
+    for line in plan.splitlines():
+        text = line.strip()
+        for table in tables:
+            if connection.vendor == 'postgresql' and f'Seq Scan on {table}' in text:
+                found.append(text)
+            elif connection.vendor == 'sqlite' and (text.startswith(f'SCAN {table}') or f'--SCAN {table}' in text) \
+                    and 'USING' not in text:
+                found.append(text)
+    return found
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the queries behind the tourist list/search, calendar, chart and CSV endpoints and report sequential scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--homestay', type=int, help='Homestay id used for owner endpoints (default: first homestay)')
+        parser.add_argument('--year', type=int, default=datetime.date.today().year)
+        parser.add_argument('--tables', nargs='+', default=[Booking._meta.db_table, DailyArrival._meta.db_table],
+                            help='Tables whose sequential scans are reported')
+        parser.add_argument('--no-seqscan', action='store_true',
+                            help='PostgreSQL only: SET enable_seqscan = off so small tables still show whether an index can serve the query')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every full plan')
+        parser.add_argument('--fail', action='store_true', help='Exit with an error if any sequential scan is found')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Unsupported database vendor: {connection.vendor}')
+        homestay_id = options['homestay'] or Homestay.objects.order_by('id').values_list('id', flat=True).first() or 0
+        if options['no_seqscan'] and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        problems = 0
+        for label, queryset in endpoint_queries(homestay_id, options['year']):
+            plan = queryset.explain()
+            scans = sequential_scans(plan, options['tables'])
+            if scans:
+                problems += 1
+                self.stdout.write(self.style.WARNING(f'{label}: sequential scan'))
+                for line in scans:
+                    self.stdout.write(f'    {line}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{label}: ok'))
+            if options['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if problems:
+            message = f'{problems} queries scan {", ".join(options["tables"])} without an index ({connection.vendor}).'
+            if options['fail']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'No sequential scans on {", ".join(options["tables"])} ({connection.vendor}).'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from DigiTrackProject.tourism.calendar_sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete booking tombstones older than the calendar sync retention (30 days).'
+
+    def handle(self, *args, **options):
+        count = purge_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Purged {count} booking tombstones'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from DigiTrackProject.tourism.rollups import rebuild_daily_arrivals
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyArrival chart rollup from all bookings.'
+
+    def handle(self, *args, **options):
+        count = rebuild_daily_arrivals()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily arrivals rollup: {count} rows'))
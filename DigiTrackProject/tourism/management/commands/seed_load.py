@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from DigiTrackProject.tourism.seeding import CURVES, delete_seeded, parse_curve, seed_load, seeded_owners
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with synthetic homestays, rooms, features and years of bookings for '
+            'performance work and benchmarks. Existing data is left alone; --replace deletes the '
+            'data of an earlier run with the same --prefix first. Owners can log in with --password.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--homestays', type=int, default=50)
+        parser.add_argument('--rooms', type=int, default=5, help='Rooms per homestay')
+        parser.add_argument('--years', type=int, default=3, help='Years of booking history')
+        parser.add_argument('--days-ahead', type=int, default=90, help='Days of upcoming bookings')
+        parser.add_argument('--curve', default='tropical',
+                            help=f'Monthly occupancy: {", ".join(CURVES)}, or 12 comma-separated values '
+                                 f'between 0 and 1 (January first)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--prefix', default='seed', help='Owner usernames are <prefix>0, <prefix>1, ...')
+        parser.add_argument('--password', default='seedpass', help='Password of every seeded owner')
+        parser.add_argument('--replace', action='store_true', help='Delete the owners of an earlier run first')
+
+    def handle(self, *args, **options):
+        try:
+            curve = parse_curve(options['curve'])
+        except ValueError as e:
+            raise CommandError(f'--curve: {e}')
+        if options['homestays'] < 1 or options['rooms'] < 0 or options['years'] < 0 or options['days_ahead'] < 0:
+            raise CommandError('--homestays must be positive; --rooms, --years and --days-ahead not negative')
+        if seeded_owners(options['prefix']).exists():
+            if not options['replace']:
+                raise CommandError(f"Owners named {options['prefix']}<n> already exist; use --replace or another "
+                                   f"--prefix")
+            self.stdout.write(f"Deleted {delete_seeded(options['prefix'])} seeded owners and their data")
+        started = time.perf_counter()
+        counts = seed_load(homestays=options['homestays'], rooms=options['rooms'], years=options['years'],
+                           curve=curve, seed=options['seed'], prefix=options['prefix'],
+                           password=options['password'], days_ahead=options['days_ahead'])
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {time.perf_counter() - started:.1f}s'))
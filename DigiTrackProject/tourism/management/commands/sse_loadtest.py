@@ -0,0 +1,92 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def hold_stream(host, port, path, cookie, stats, stop_at):
+    """Open one event stream and keep reading it until ``stop_at``."""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats['refused'] += 1
+        return
+    try:
+        request = f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n'
+        if cookie:
+            request += f'Cookie: {cookie}\r\n'
+        writer.write((request + '\r\n').encode())
+        await writer.drain()
+        status = await reader.readline()
+        if b' 200 ' not in status:
+            stats['rejected'] += 1
+            stats['last_status'] = status.decode(errors='replace').strip()
+            return
+        stats['open'] += 1
+        stats['peak'] = max(stats['peak'], stats['open'])
+        try:
+            while True:
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    stats['held'] += 1
+                    return
+                try:
+                    line = await asyncio.wait_for(reader.readline(), remaining)
+                except asyncio.TimeoutError:
+                    continue
+                if not line:
+                    stats['dropped'] += 1
+                    return
+                if line.startswith(b'event:'):
+                    stats['events'] += 1
+                elif line.startswith(b': keep-alive'):
+                    stats['heartbeats'] += 1
+        finally:
+            stats['open'] -= 1
+    finally:
+        writer.close()
+
+
+class Command(BaseCommand):
+    help = ('Hold many idle connections to the dashboard event stream (/api/events/) of a running '
+            'ASGI server and report how many stayed open, e.g. '
+            '`uvicorn DigiTrackProject.DigiTrackProject.asgi:application --workers 1` then '
+            '`manage.py sse_loadtest --connections 500 --cookie sessionid=...`.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/events/')
+        parser.add_argument('--connections', type=int, default=500)
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to hold the connections')
+        parser.add_argument('--ramp', type=float, default=5, help='Seconds over which connections are opened')
+        parser.add_argument('--cookie', default='', help='Cookie header of a logged-in session (sessionid=...)')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('--url must be a plain http:// URL')
+        stats = dict(open=0, peak=0, held=0, dropped=0, refused=0, rejected=0, events=0, heartbeats=0, last_status='')
+        started = time.monotonic()
+        asyncio.run(self.run(url, options, stats))
+        self.stdout.write(
+            f"{options['connections']} connections over {time.monotonic() - started:.1f}s: "
+            f"peak open {stats['peak']}, held to the end {stats['held']}, dropped {stats['dropped']}, "
+            f"refused {stats['refused']}, rejected {stats['rejected']}; "
+            f"{stats['events']} events, {stats['heartbeats']} heartbeats received")
+        if stats['rejected']:
+            self.stdout.write(f"Last rejection: {stats['last_status']}")
+        if stats['held'] == options['connections']:
+            self.stdout.write(self.style.SUCCESS('All connections held'))
+        else:
+            raise CommandError('Not every connection was held for the full duration')
+
+    async def run(self, url, options, stats):
+        count = options['connections']
+        stop_at = time.monotonic() + options['ramp'] + options['duration']
+        path = url.path + (f'?{url.query}' if url.query else '')
+        tasks = []
+        for i in range(count):
+            tasks.append(asyncio.create_task(
+                hold_stream(url.hostname, url.port or 80, path, options['cookie'], stats, stop_at)))
+            await asyncio.sleep(options['ramp'] / count)
+        await asyncio.gather(*tasks)
@@ -0,0 +1,234 @@
+"""
+Per-view request metrics: request count, latency histogram, DB query count and
+DB time, and response size, keyed by URL name.
+
+MetricsMiddleware times each request. Queries are counted by an execute
+wrapper installed on every database connection (see install_query_counter),
+which reports to the stats of the request running in the current context, so
+ORM calls made by async views through sync_to_async are counted too. Staff
+responses carry a ``Server-Timing`` header with the same numbers.
+
+Each worker accumulates its totals in memory and every METRICS_FLUSH_SECONDS
+writes them, as one snapshot, to the shared cache under a per-worker key.
+/metrics/ renders the snapshots of all workers in the Prometheus text
+exposition format, one series per view and worker (``worker`` label). Totals
+are cumulative per worker process. They are not summed across workers here:
+when a stopped worker's snapshot expired, the sum would drop and Prometheus
+would read the drop as a reset. Instead a restarted worker starts a new
+series of its own, and the series of a stopped one ends. Add the workers up
+in the query, e.g. ``sum by (view) (rate(digitrack_http_requests_total[5m]))``.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+WORKERS_KEY = 'metrics:workers'
+WORKER_KEY = 'metrics:worker:{worker}'
+# Snapshots of workers that stopped flushing are dropped after this long
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+UNMATCHED = '<unmatched>'
+
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+_lock = threading.Lock()
+_totals = {}
+_last_flush = time.monotonic()
+_request_stats = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+def _count_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """connection_created receiver: count this connection's queries."""
+    if _count_query not in connection.execute_wrappers:
+        # Outermost, and below any connection.execute_wrapper() block open while the
+        # connection is created, whose exit pops the last wrapper
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+def _empty():
+    return {'count': 0, 'buckets': [0] * len(LATENCY_BUCKETS), 'latency': 0.0, 'queries': 0, 'db_time': 0.0,
+            'bytes': 0}
+
+
+def record(view, latency, queries, db_time, size):
+    """Add one request to this worker's totals."""
+    with _lock:
+        totals = _totals.setdefault(view, _empty())
+        totals['count'] += 1
+        totals['latency'] += latency
+        totals['queries'] += queries
+        totals['db_time'] += db_time
+        totals['bytes'] += size
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                totals['buckets'][i] += 1
+                break
+
+
+def flush():
+    """Write this worker's totals to the shared cache."""
+    global _last_flush
+    with _lock:
+        snapshot = {view: {**totals, 'buckets': list(totals['buckets'])} for view, totals in _totals.items()}
+        _last_flush = time.monotonic()
+    cache.set(WORKER_KEY.format(worker=WORKER_ID), snapshot, SNAPSHOT_TIMEOUT)
+    # Not atomic: a worker lost to a concurrent first flush re-adds itself next time
+    workers = cache.get(WORKERS_KEY) or []
+    if WORKER_ID not in workers:
+        cache.set(WORKERS_KEY, workers + [WORKER_ID], None)
+
+
+def _flush_due():
+    return time.monotonic() - _last_flush >= settings.METRICS_FLUSH_SECONDS
+
+
+def _safe_flush():
+    # Metrics must never fail the request that happens to flush them
+    try:
+        flush()
+    except Exception:
+        logger.warning('Could not flush request metrics', exc_info=True)
+
+
+def collect():
+    """{worker: {view: totals}} for every worker whose snapshot has not expired."""
+    workers = cache.get(WORKERS_KEY) or []
+    snapshots = cache.get_many([WORKER_KEY.format(worker=w) for w in workers])
+    live = [w for w in workers if WORKER_KEY.format(worker=w) in snapshots]
+    if len(live) != len(workers):
+        cache.set(WORKERS_KEY, live, None)
+    return {w: snapshots[WORKER_KEY.format(worker=w)] for w in live}
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(metrics):
+    """``metrics`` (as returned by collect()) in the Prometheus text format."""
+    lines = []
+    series = [(f'view="{_label(v)}",worker="{_label(w)}"', totals)
+              for w in sorted(metrics) for v, totals in sorted(metrics[w].items())]
+
+    def family(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(samples)
+
+    family('digitrack_http_requests_total', 'counter', 'Requests handled, by URL name and worker.',
+           [f'digitrack_http_requests_total{{{labels}}} {t["count"]}' for labels, t in series])
+    histogram = []
+    for labels, t in series:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, t['buckets']):
+            cumulative += count
+            histogram.append(f'digitrack_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        histogram.append(f'digitrack_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {t["count"]}')
+        histogram.append(f'digitrack_http_request_duration_seconds_sum{{{labels}}} {t["latency"]}')
+        histogram.append(f'digitrack_http_request_duration_seconds_count{{{labels}}} {t["count"]}')
+    family('digitrack_http_request_duration_seconds', 'histogram', 'Time to produce the response.', histogram)
+    family('digitrack_db_queries_total', 'counter', 'Database queries run while handling requests.',
+           [f'digitrack_db_queries_total{{{labels}}} {t["queries"]}' for labels, t in series])
+    family('digitrack_db_query_seconds_total', 'counter', 'Time spent in database queries.',
+           [f'digitrack_db_query_seconds_total{{{labels}}} {t["db_time"]}' for labels, t in series])
+    family('digitrack_http_response_bytes_total', 'counter', 'Response body bytes (streamed bodies excluded).',
+           [f'digitrack_http_response_bytes_total{{{labels}}} {t["bytes"]}' for labels, t in series])
+    return '\n'.join(lines) + '\n'
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNMATCHED
+
+
+def _response_size(response):
+    if response.streaming:
+        return 0
+    return len(response.content)
+
+
+def _server_timing(latency, stats):
+    return (f'app;dur={latency * 1000:.1f}, '
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"')
+
+
+def _is_staff(request):
+    # Only a user the request already loaded (request.user or request.auser()), so the
+    # header never costs a query; views serving staff always load the user
+    user = getattr(request, '_cached_user', None) or getattr(request, '_acached_user', None)
+    return user is not None and user.is_staff
+
+
+class MetricsMiddleware:
+    """Record per-view metrics for every request; add Server-Timing for staff."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        latency = time.perf_counter() - started
+        record(_view_name(request), latency, stats.queries, stats.db_time, _response_size(response))
+        if _is_staff(request):
+            response['Server-Timing'] = _server_timing(latency, stats)
+        if _flush_due():
+            _safe_flush()
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        latency = time.perf_counter() - started
+        record(_view_name(request), latency, stats.queries, stats.db_time, _response_size(response))
+        if _is_staff(request):
+            response['Server-Timing'] = _server_timing(latency, stats)
+        if _flush_due():
+            await sync_to_async(_safe_flush)()
+        return response
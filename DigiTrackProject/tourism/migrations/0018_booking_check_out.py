@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0017_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='check_out',
+            field=models.DateField(null=True),
+        ),
+    ]
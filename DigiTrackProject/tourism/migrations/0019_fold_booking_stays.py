@@ -0,0 +1,81 @@
+"""
+Fold the one-row-per-day registration bookings into single stay rows.
+
+Consecutive days with the same homestay, room, guest, contact, party size and
+status, written by the same registration, become one Booking whose `date` is
+the first day and `check_out` the last day. A registration wrote its rows in one
+request, so rows created more than SAME_REGISTRATION apart belong to separate
+registrations and stay separate even when their dates touch. Calendar bookings
+stay single-day (check_out = date).
+"""
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import F
+
+BATCH_SIZE = 1000
+SAME_REGISTRATION = timedelta(seconds=5)
+
+
+def fold_stays(apps, schema_editor):
+    Booking = apps.get_model('tourism', 'Booking')
+    Booking.objects.filter(check_out__isnull=True).update(check_out=F('date'))
+
+    rows = (
+        Booking.objects.filter(source='registration')
+        .order_by('homestay_id', 'room_id', 'guest_name', 'contact_number', 'num_people', 'status', 'date', 'id')
+        .values_list('id', 'homestay_id', 'room_id', 'guest_name', 'contact_number', 'num_people', 'status', 'date',
+                     'created_at')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    # Collect changes first and write them after the scan, so the cursor never
+    # iterates over rows that are being modified.
+    stay_ends = {}  # stay booking id -> last day
+    folded_ids = []
+    current_key = None
+    stay_id = None
+    last_created = None
+    for booking_id, homestay_id, room_id, guest_name, contact_number, num_people, status, date, created_at in rows:
+        key = (homestay_id, room_id, guest_name, contact_number, num_people, status)
+        if (key == current_key and date <= stay_ends[stay_id] + timedelta(days=1)
+                and abs(created_at - last_created) <= SAME_REGISTRATION):
+            # Same registration on the next (or a duplicated) day: extend the stay
+            stay_ends[stay_id] = max(stay_ends[stay_id], date)
+            last_created = created_at
+            folded_ids.append(booking_id)
+            continue
+        current_key, stay_id, last_created = key, booking_id, created_at
+        stay_ends[stay_id] = date
+
+    for i in range(0, len(folded_ids), BATCH_SIZE):
+        Booking.objects.filter(id__in=folded_ids[i:i + BATCH_SIZE]).delete()
+    for booking_id, check_out in stay_ends.items():
+        Booking.objects.filter(id=booking_id).exclude(check_out=check_out).update(check_out=check_out)
+
+
+def expand_stays(apps, schema_editor):
+    Booking = apps.get_model('tourism', 'Booking')
+    new_rows = []
+    for b in Booking.objects.filter(check_out__gt=F('date')).iterator(chunk_size=BATCH_SIZE):
+        day = b.date + timedelta(days=1)
+        while day <= b.check_out:
+            new_rows.append(Booking(
+                homestay_id=b.homestay_id, room_id=b.room_id, date=day, check_out=day, status=b.status,
+                guest_name=b.guest_name, num_people=b.num_people, contact_number=b.contact_number,
+                source=b.source,
+            ))
+            day += timedelta(days=1)
+    for i in range(0, len(new_rows), BATCH_SIZE):
+        Booking.objects.bulk_create(new_rows[i:i + BATCH_SIZE])
+    Booking.objects.update(check_out=F('date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0018_booking_check_out'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_stays, expand_stays),
+    ]
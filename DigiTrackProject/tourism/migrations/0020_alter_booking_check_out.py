@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0019_fold_booking_stays'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='check_out',
+            field=models.DateField(),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0020_alter_booking_check_out'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['homestay', 'source', 'date'], name='booking_homestay_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['homestay', 'date', 'check_out'], name='booking_homestay_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'date', 'status'], name='booking_room_date_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('source', 'registration')), fields=['created_at'], name='booking_reg_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('source', 'registration')), fields=['date'], name='booking_reg_date_idx'),
+        ),
+    ]
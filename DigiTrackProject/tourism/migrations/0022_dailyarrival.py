@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0021_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyArrival',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('registration', 'Registration'), ('calendar', 'Calendar')], max_length=20)),
+                ('date', models.DateField()),
+                ('arrivals', models.IntegerField(default=0)),
+                ('bookings', models.IntegerField(default=0)),
+                ('homestay', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_arrivals', to='tourism.homestay')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['source', 'date'], name='daily_arrival_source_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('homestay', 'source', 'date'), name='daily_arrival_unique')],
+            },
+        ),
+    ]
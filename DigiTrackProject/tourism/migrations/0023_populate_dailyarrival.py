@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+BATCH_SIZE = 1000
+
+
+def populate(apps, schema_editor):
+    Booking = apps.get_model('tourism', 'Booking')
+    DailyArrival = apps.get_model('tourism', 'DailyArrival')
+    totals = (
+        Booking.objects.values('homestay_id', 'source', 'date')
+        .annotate(arrivals=Sum('num_people', filter=Q(num_people__gt=0)), bookings=Count('id'))
+        .order_by()
+    )
+    batch = []
+    for row in totals.iterator(chunk_size=BATCH_SIZE):
+        batch.append(DailyArrival(homestay_id=row['homestay_id'], source=row['source'], date=row['date'],
+                                  arrivals=row['arrivals'] or 0, bookings=row['bookings']))
+        if len(batch) >= BATCH_SIZE:
+            DailyArrival.objects.bulk_create(batch)
+            batch = []
+    DailyArrival.objects.bulk_create(batch)
+
+
+def clear(apps, schema_editor):
+    apps.get_model('tourism', 'DailyArrival').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0022_dailyarrival'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, clear),
+    ]
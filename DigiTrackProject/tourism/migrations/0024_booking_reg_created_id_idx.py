@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0023_populate_dailyarrival'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_reg_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('source', 'registration')), fields=['created_at', 'id'], name='booking_reg_created_idx'),
+        ),
+    ]
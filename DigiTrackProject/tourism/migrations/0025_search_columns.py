@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0024_booking_reg_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='search_contact',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='homestay',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,63 @@
+"""
+Fill the search columns added in 0025 and, on PostgreSQL, index them with
+pg_trgm GIN indexes so the tourist search's substring matches (LIKE '%q%')
+are served by an index. The SQLite FTS5 table is installed by search.py on
+post_migrate instead, because SQLite table rebuilds drop its triggers.
+"""
+from django.db import migrations
+
+from DigiTrackProject.tourism.normalize import fold_text, digits_only
+
+BATCH_SIZE = 1000
+
+TRGM_INDEXES = [
+    ('booking_search_name_trgm', 'tourism_booking', 'search_name', "WHERE source = 'registration'"),
+    ('booking_search_contact_trgm', 'tourism_booking', 'search_contact', "WHERE source = 'registration'"),
+    ('homestay_search_name_trgm', 'tourism_homestay', 'search_name', ''),
+]
+
+
+def populate(apps, schema_editor):
+    Booking = apps.get_model('tourism', 'Booking')
+    Homestay = apps.get_model('tourism', 'Homestay')
+    homestays = list(Homestay.objects.only('id', 'name'))
+    for h in homestays:
+        h.search_name = fold_text(h.name)
+    Homestay.objects.bulk_update(homestays, ['search_name'], batch_size=BATCH_SIZE)
+
+    batch = []
+    for b in Booking.objects.only('id', 'guest_name', 'contact_number').iterator(chunk_size=BATCH_SIZE):
+        b.search_name = fold_text(b.guest_name)
+        b.search_contact = digits_only(b.contact_number)
+        batch.append(b)
+        if len(batch) >= BATCH_SIZE:
+            Booking.objects.bulk_update(batch, ['search_name', 'search_contact'])
+            batch = []
+    Booking.objects.bulk_update(batch, ['search_name', 'search_contact'])
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column, where in TRGM_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops) {where}')
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _, _ in TRGM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0025_search_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0026_search_backfill_and_trgm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginLockout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('window_expires', models.DateTimeField(db_index=True)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
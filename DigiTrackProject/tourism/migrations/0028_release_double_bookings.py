@@ -0,0 +1,30 @@
+"""
+Prepare for the one-reservation-per-room-and-day constraint added in 0029.
+Rooms already double-booked keep their first reservation; later ones stay on
+the homestay but lose the room, so the owner can re-assign them.
+"""
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def release_double_bookings(apps, schema_editor):
+    Booking = apps.get_model('tourism', 'Booking')
+    reserved = Booking.objects.filter(status='reserved', room__isnull=False)
+    duplicates = (
+        reserved.values('room_id', 'date')
+        .annotate(n=Count('id'), first_id=Min('id'))
+        .filter(n__gt=1)
+    )
+    for dup in duplicates:
+        reserved.filter(room_id=dup['room_id'], date=dup['date']).exclude(id=dup['first_id']).update(room=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0027_loginlockout'),
+    ]
+
+    operations = [
+        migrations.RunPython(release_double_bookings, migrations.RunPython.noop),
+    ]
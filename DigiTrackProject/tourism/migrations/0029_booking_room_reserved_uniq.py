@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0028_release_double_bookings'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'reserved')), fields=('room', 'date'), name='booking_room_reserved_uniq'),
+        ),
+    ]
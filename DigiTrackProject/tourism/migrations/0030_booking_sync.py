@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0029_booking_room_reserved_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.IntegerField()),
+                ('homestay_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('sync_seq', models.BigIntegerField(db_default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CalendarSequence',
+            fields=[
+                ('homestay_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='sync_seq',
+            field=models.BigIntegerField(db_default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['homestay', 'sync_seq'], name='booking_homestay_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingtombstone',
+            index=models.Index(fields=['homestay_id', 'sync_seq'], name='tombstone_homestay_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 
+from .normalize import fold_text, digits_only
+
 # Custom user model
 class CustomUser(AbstractUser):
     name = models.CharField(max_length=255)
@@ -29,8 +31,16 @@ class Homestay(models.Model):
     videoke_available = models.BooleanField(default=False)
     pet_friendly = models.BooleanField(default=False)
     beach_front = models.BooleanField(default=False)
+    # fold_text(name), kept by save(); matched by the tourist search (see search.py)
+    search_name = models.CharField(max_length=255, blank=True, default='', editable=False)
 
     # Add other homestay-specific fields like contact info, description, etc.
+    def save(self, *args, **kwargs):
+        self.search_name = fold_text(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
     def __str__(self):
         return self.name
 
@@ -78,7 +88,10 @@ class Booking(models.Model):
     ]
     homestay = models.ForeignKey('Homestay', on_delete=models.CASCADE, related_name='bookings')
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='bookings', null=True, blank=True)
+    # A booking covers a stay from `date` (check-in) to `check_out`, both inclusive.
+    # Calendar cells are single-day bookings where check_out == date.
     date = models.DateField()
+    check_out = models.DateField()
     status = models.CharField(max_length=20, choices=BOOKING_STATUS_CHOICES, default='available')
     guest_name = models.CharField(max_length=255, blank=True, null=True)
     num_people = models.IntegerField(blank=True, null=True)
@@ -86,9 +99,98 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     source = models.CharField(max_length=20, choices=BOOKING_SOURCE_CHOICES, default='registration')
+    # Normalised copies of guest_name / contact_number for the tourist search (see search.py).
+    # Kept by save(); bulk writes must call fill_search_fields() themselves.
+    search_name = models.CharField(max_length=255, blank=True, default='', editable=False)
+    search_contact = models.CharField(max_length=20, blank=True, default='', editable=False)
+    # The homestay's CalendarSequence value when this row was last written (see calendar_sync.py)
+    sync_seq = models.BigIntegerField(db_default=0, editable=False)
     class Meta:
-        pass  # Only one Meta class, no unique_together
+        # No unique_together (dropped in 0012); indexes follow the view access patterns
+        indexes = [
+            # Owner tourist list / CSV export: homestay + source, newest stay first
+            models.Index(fields=['homestay', 'source', 'date'], name='booking_homestay_source_idx'),
+            # Calendar, availability and overlap checks: homestay + stay range
+            models.Index(fields=['homestay', 'date', 'check_out'], name='booking_homestay_date_idx'),
+            # Room reservation conflict checks
+            models.Index(fields=['room', 'date', 'status'], name='booking_room_date_status_idx'),
+            # MTO tourist list / search (newest first, keyset on created_at, id) and all-homestay export / charts
+            models.Index(fields=['created_at', 'id'], name='booking_reg_created_idx', condition=models.Q(source='registration')),
+            models.Index(fields=['date'], name='booking_reg_date_idx', condition=models.Q(source='registration')),
+            # Calendar delta sync (?since=): a homestay's bookings changed after a watermark
+            models.Index(fields=['homestay', 'sync_seq'], name='booking_homestay_sync_idx'),
+        ]
+        constraints = [
+            # A room is reserved at most once per day (see reservations.py); also serves the conflict lookups
+            models.UniqueConstraint(fields=['room', 'date'], condition=models.Q(status='reserved'),
+                                    name='booking_room_reserved_uniq'),
+        ]
+    def save(self, *args, **kwargs):
+        if self.check_out is None:
+            self.check_out = self.date
+        self.fill_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'guest_name', 'contact_number'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_name', 'search_contact'}
+        if update_fields is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'sync_seq'}
+        # The pre_save signal takes the sync_seq; it must commit together with the row
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+    def fill_search_fields(self):
+        self.search_name = fold_text(self.guest_name)
+        self.search_contact = digits_only(self.contact_number)
     def __str__(self):
         return f"{self.homestay.name} - {self.date} - {self.status}"
+    @property
+    def nights(self):
+        """Number of days covered by the stay (check-in and check-out inclusive)."""
+        return (self.check_out - self.date).days + 1
+
+# Daily arrivals rollup for the dashboard charts (maintained by rollups.py)
+class DailyArrival(models.Model):
+    homestay = models.ForeignKey('Homestay', on_delete=models.CASCADE, related_name='daily_arrivals')
+    source = models.CharField(max_length=20, choices=Booking.BOOKING_SOURCE_CHOICES)
+    date = models.DateField()  # check-in date of the counted bookings
+    arrivals = models.IntegerField(default=0)  # sum of num_people > 0
+    bookings = models.IntegerField(default=0)
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['homestay', 'source', 'date'], name='daily_arrival_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['source', 'date'], name='daily_arrival_source_date_idx'),
+        ]
+    def __str__(self):
+        return f"{self.homestay_id} - {self.source} - {self.date}: {self.arrivals}"
 
+# Failed-login counter per username for DatabaseLockoutBackend (see lockout.py)
+class LoginLockout(models.Model):
+    key = models.CharField(max_length=255, unique=True)  # lower-cased username
+    failures = models.PositiveIntegerField(default=0)
+    window_expires = models.DateTimeField(db_index=True)  # failures older than this no longer count
+    locked_until = models.DateTimeField(null=True, blank=True)
+    def __str__(self):
+        return f"{self.key}: {self.failures}"
 
+# Deleted bookings, so calendar clients syncing with ?since= can drop them (see calendar_sync.py).
+# Plain ids rather than foreign keys: the booking is gone, and its homestay may be being deleted too.
+class BookingTombstone(models.Model):
+    booking_id = models.IntegerField()
+    homestay_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    sync_seq = models.BigIntegerField(db_default=0)
+    class Meta:
+        indexes = [
+            models.Index(fields=['homestay_id', 'sync_seq'], name='tombstone_homestay_idx'),
+        ]
+    def __str__(self):
+        return f"{self.homestay_id} - booking {self.booking_id} deleted {self.deleted_at}"
+
+# Per-homestay change counter behind the calendar sync watermarks (see calendar_sync.py).
+# Only ever advanced in SQL by calendar_sync.next_sync_seq().
+class CalendarSequence(models.Model):
+    homestay_id = models.IntegerField(primary_key=True)
+    value = models.BigIntegerField(default=0)
+    def __str__(self):
+        return f"{self.homestay_id}: {self.value}"
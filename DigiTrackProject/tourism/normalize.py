@@ -0,0 +1,23 @@
+"""
+Text normalisation for the search columns (Booking.search_name/search_contact,
+Homestay.search_name) and for the queries matched against them.
+"""
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_NON_DIGIT = re.compile(r'\D+')
+
+
+def fold_text(value):
+    """Lower-case, accent-folded words separated by single spaces: ' Peña,  JOSÉ ' -> 'pena jose'."""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    ascii_text = ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(' ', ascii_text).strip()
+
+
+def digits_only(value):
+    """Contact numbers compared digits-only: '+63 917-123' -> '63917123'."""
+    return _NON_DIGIT.sub('', str(value)) if value else ''
@@ -0,0 +1,95 @@
+"""
+The logged-in owner's homestay, resolved once per request.
+
+Owner dashboard APIs all start from the homestay of request.user. It is looked
+up lazily on first use and memoised on the request as ``request.homestay``,
+so helpers and the view share one lookup. Between requests it is kept in the
+cache for OWNER_HOMESTAY_CACHE_TIMEOUT seconds (0 disables this); the Homestay
+save/delete signals drop the entry for the old and new owner.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+from .models import Homestay
+
+OWNER_HOMESTAY_KEY = 'owner_homestay:{user_id}'
+# Cached in place of None, so owners without a homestay are not re-queried either
+_NO_HOMESTAY = 'none'
+
+
+def _load_homestay(user_id):
+    timeout = settings.OWNER_HOMESTAY_CACHE_TIMEOUT
+    key = OWNER_HOMESTAY_KEY.format(user_id=user_id)
+    if timeout:
+        cached = cache.get(key)
+        if cached is not None:
+            return None if cached == _NO_HOMESTAY else cached
+    homestay = Homestay.objects.filter(owner_id=user_id).order_by('id').first()
+    if timeout:
+        cache.set(key, _NO_HOMESTAY if homestay is None else homestay, timeout)
+    return homestay
+
+
+def get_request_homestay(request):
+    """The homestay owned by request.user (None when anonymous or without one)."""
+    if not hasattr(request, 'homestay'):
+        user = request.user
+        request.homestay = _load_homestay(user.pk) if user.is_authenticated else None
+    return request.homestay
+
+
+async def _aload_homestay(user_id):
+    timeout = settings.OWNER_HOMESTAY_CACHE_TIMEOUT
+    key = OWNER_HOMESTAY_KEY.format(user_id=user_id)
+    if timeout:
+        cached = await cache.aget(key)
+        if cached is not None:
+            return None if cached == _NO_HOMESTAY else cached
+    homestay = await Homestay.objects.filter(owner_id=user_id).order_by('id').afirst()
+    if timeout:
+        await cache.aset(key, _NO_HOMESTAY if homestay is None else homestay, timeout)
+    return homestay
+
+
+async def aget_request_homestay(request):
+    """get_request_homestay() for async views."""
+    if not hasattr(request, 'homestay'):
+        user = await request.auser()
+        request.homestay = await _aload_homestay(user.pk) if user.is_authenticated else None
+    return request.homestay
+
+
+def invalidate_owner_homestay(*user_ids):
+    """Forget the cached homestay of these owners."""
+    keys = [OWNER_HOMESTAY_KEY.format(user_id=user_id) for user_id in user_ids if user_id is not None]
+    if keys and settings.OWNER_HOMESTAY_CACHE_TIMEOUT:
+        cache.delete_many(keys)
+
+
+def homestay_required(view):
+    """
+    Resolve request.homestay before calling ``view`` (sync or async): 403 JSON when
+    not logged in, 404 JSON when the user owns no homestay.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not (await request.auser()).is_authenticated:
+                return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
+            if await aget_request_homestay(request) is None:
+                return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
+            return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
+        if get_request_homestay(request) is None:
+            return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
+        return view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,80 @@
+"""
+Pagination helpers shared by the JSON list endpoints.
+
+Offset pages (limit/offset) suit small, sortable lists such as the homestay
+directory. Keyset cursors suit large append-mostly lists such as registered
+tourists: the next page starts strictly after the last row seen, so its cost
+does not grow with the page number and rows inserted meanwhile do not shift it.
+
+Large lists can also be asked for in columns (?format=columns): one array per
+field instead of one object per row, so each field name is sent once, not once
+per row. List responses are encoded without the spaces json.dumps adds.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+# json_dumps_params for JsonResponse: no space after separators
+COMPACT_JSON = {'separators': (',', ':')}
+FORMATS = ('rows', 'columns')
+
+
+class PageError(ValueError):
+    pass
+
+
+def parse_page(params, default_limit, max_limit):
+    """Read ``limit``/``offset`` from a QueryDict. Raises PageError on bad values."""
+    try:
+        limit = int(params.get('limit') or default_limit)
+        offset = int(params.get('offset') or 0)
+    except (TypeError, ValueError):
+        raise PageError('limit and offset must be integers.')
+    if limit < 1 or offset < 0:
+        raise PageError('limit must be positive and offset non-negative.')
+    return min(limit, max_limit), offset
+
+
+def encode_cursor(values):
+    """Opaque cursor for a list of JSON-serialisable key values."""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """The key values of a cursor from encode_cursor(). Raises PageError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise PageError('Invalid cursor.')
+    if not isinstance(values, list):
+        raise PageError('Invalid cursor.')
+    return values
+
+
+def keyset_after(fields, values, descending=True):
+    """Q for rows strictly after ``values`` in (``fields``) order, e.g. (created_at, id) newest first."""
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for i in reversed(range(len(fields))):
+        step = Q(**{f'{fields[i]}__{lookup}': values[i]})
+        if i < len(fields) - 1:
+            step |= Q(**{fields[i]: values[i]}) & condition
+        condition = step
+    return condition
+
+
+def parse_format(params):
+    """True for ``?format=columns``, False for rows (the default). Raises PageError on other values."""
+    value = params.get('format') or 'rows'
+    if value not in FORMATS:
+        raise PageError(f'format must be one of {", ".join(FORMATS)}.')
+    return value == 'columns'
+
+
+def to_columns(rows, fields):
+    """``rows`` (dicts) as {field: [value of each row]} for each of ``fields``."""
+    return {field: [row[field] for row in rows] for field in fields}
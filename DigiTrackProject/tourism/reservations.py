@@ -0,0 +1,56 @@
+"""
+Race-free creation of room reservations and tourist registrations.
+
+Checking for a conflict and then inserting lets two concurrent requests both
+pass the check. Instead:
+
+* A room reservation is a single-day, status 'reserved' booking. The partial
+  unique constraint booking_room_reserved_uniq (room, date WHERE reserved)
+  makes the database reject the second one; the IntegrityError becomes
+  ReservationConflict.
+* A self-registration must not overlap any booking of the homestay, which is a
+  range rule no unique constraint expresses (and staff registrations through
+  the form may overlap by design). The homestay row is locked with SELECT ...
+  FOR UPDATE for the check and insert, so registrations for the same homestay
+  queue behind each other while other homestays are unaffected.
+
+Calendar edits (views.booking_api, calendar_batch.apply_batch) take the same
+homestay lock around their read-modify-write.
+"""
+from django.db import IntegrityError, transaction
+
+from .models import Booking, Homestay
+
+
+class ReservationConflict(Exception):
+    pass
+
+
+def lock_homestay(homestay_id):
+    """SELECT ... FOR UPDATE the homestay row; call inside transaction.atomic()."""
+    list(Homestay.objects.select_for_update().filter(pk=homestay_id).values_list('pk', flat=True))
+
+
+def reserve_room(room, date, **fields):
+    """Create a 'reserved' calendar booking of ``room`` on ``date``, or raise ReservationConflict."""
+    try:
+        with transaction.atomic():
+            return Booking.objects.create(homestay_id=room.homestay_id, room=room, date=date, check_out=date,
+                                          status='reserved', source='calendar', **fields)
+    except IntegrityError:
+        if Booking.objects.filter(room=room, date=date, status='reserved').exists():
+            raise ReservationConflict('Room already reserved for this date.')
+        raise
+
+
+def register_stay(homestay, date, check_out, **fields):
+    """
+    Create a registration-sourced booking for the stay, or raise ReservationConflict
+    when any booking of the homestay overlaps it.
+    """
+    with transaction.atomic():
+        lock_homestay(homestay.pk)
+        if Booking.objects.filter(homestay=homestay, date__lte=check_out, check_out__gte=date).exists():
+            raise ReservationConflict('A booking for this homestay and date already exists. Please choose another date.')
+        return Booking.objects.create(homestay=homestay, date=date, check_out=check_out,
+                                      status='reserved', source='registration', **fields)
@@ -0,0 +1,120 @@
+"""
+Daily arrivals rollup behind the dashboard charts.
+
+DailyArrival keeps, per homestay, booking source and check-in date, the number
+of bookings and the sum of their positive num_people. Booking signals (see
+signals.py) apply the difference of every create, update and delete, so the
+chart APIs read one row per day instead of aggregating every booking ever
+recorded. Writes that bypass signals (QuerySet.update, bulk_create) must
+apply their own deltas with apply_deltas(), or be followed by
+rebuild_daily_arrivals() or `manage.py rebuild_arrivals`.
+"""
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Booking, DailyArrival
+
+BATCH_SIZE = 1000
+
+
+def _people(value):
+    """num_people as counted by the charts (num_people > 0, otherwise 0)."""
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return 0
+    return n if n > 0 else 0
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+
+def booking_key(booking):
+    """The rollup row and contribution of a booking: ((homestay_id, source, date), people)."""
+    return (booking.homestay_id, booking.source, _as_date(booking.date)), _people(booking.num_people)
+
+
+def apply_delta(key, arrivals, bookings):
+    """Add ``arrivals``/``bookings`` to the rollup row for ``key`` = (homestay_id, source, date)."""
+    homestay_id, source, date = key
+    if homestay_id is None or date is None:
+        return
+    rows = DailyArrival.objects.filter(homestay_id=homestay_id, source=source, date=date)
+    if rows.update(arrivals=F('arrivals') + arrivals, bookings=F('bookings') + bookings):
+        return
+    if bookings <= 0:
+        # Nothing to subtract from: the row was removed with its homestay or by a rebuild
+        return
+    try:
+        with transaction.atomic():
+            DailyArrival.objects.create(homestay_id=homestay_id, source=source, date=date,
+                                        arrivals=arrivals, bookings=bookings)
+    except IntegrityError:
+        # Another worker created the row first
+        rows.update(arrivals=F('arrivals') + arrivals, bookings=F('bookings') + bookings)
+
+
+def apply_deltas(deltas):
+    """
+    apply_delta() for many keys at once: ``deltas`` maps (homestay_id, source, date) to
+    (arrivals, bookings). Existing rows are locked and read with one query and written
+    with one bulk_update; missing rows are added with one bulk_create. Call inside a
+    transaction.
+    """
+    deltas = {key: d for key, d in deltas.items() if key[0] is not None and key[2] is not None and any(d)}
+    if not deltas:
+        return
+    homestay_ids = {key[0] for key in deltas}
+    dates = [key[2] for key in deltas]
+    rows = DailyArrival.objects.select_for_update().filter(
+        homestay_id__in=homestay_ids, date__gte=min(dates), date__lte=max(dates))
+    changed = []
+    for row in rows:
+        delta = deltas.pop((row.homestay_id, row.source, row.date), None)
+        if delta:
+            row.arrivals += delta[0]
+            row.bookings += delta[1]
+            changed.append(row)
+    DailyArrival.objects.bulk_update(changed, ['arrivals', 'bookings'], batch_size=BATCH_SIZE)
+    new_rows = [
+        DailyArrival(homestay_id=homestay_id, source=source, date=date, arrivals=arrivals, bookings=bookings)
+        for (homestay_id, source, date), (arrivals, bookings) in deltas.items() if bookings > 0
+    ]
+    try:
+        with transaction.atomic():
+            DailyArrival.objects.bulk_create(new_rows, batch_size=BATCH_SIZE)
+    except IntegrityError:
+        # Another worker created some of the rows first
+        for row in new_rows:
+            apply_delta((row.homestay_id, row.source, row.date), row.arrivals, row.bookings)
+
+
+def rebuild_daily_arrivals():
+    """Recompute the whole rollup from Booking. Returns the number of rollup rows."""
+    totals = (
+        Booking.objects.values('homestay_id', 'source', 'date')
+        .annotate(arrivals=Sum('num_people', filter=Q(num_people__gt=0)), bookings=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        DailyArrival.objects.all().delete()
+        batch = []
+        count = 0
+        for row in totals.iterator(chunk_size=BATCH_SIZE):
+            batch.append(DailyArrival(homestay_id=row['homestay_id'], source=row['source'], date=row['date'],
+                                      arrivals=row['arrivals'] or 0, bookings=row['bookings']))
+            if len(batch) >= BATCH_SIZE:
+                DailyArrival.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        DailyArrival.objects.bulk_create(batch)
+        count += len(batch)
+    return count
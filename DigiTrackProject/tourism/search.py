@@ -0,0 +1,205 @@
+"""
+Tourist search behind /api/tourist-search/.
+
+Queries are matched against the normalised Booking.search_name (guest name),
+Booking.search_contact (contact digits) and Homestay.search_name columns, never
+against the raw text, so every backend can use an index:
+
+* PostgreSQL: substring matches on pg_trgm GIN indexes (migration 0026).
+* SQLite: an FTS5 trigram table kept in step with tourism_booking by triggers
+  (install_sqlite_fts, run on post_migrate). Names shorter than three
+  characters cannot use trigrams and fall back to LIKE.
+
+Contact numbers are only matched from three digits up.
+
+Results are ranked the same way everywhere (exact, then prefix, then substring
+matches, newest first within a rank), paged with limit/offset, and every search
+runs under a TOURIST_SEARCH_BUDGET_MS latency budget.
+"""
+import time
+from contextlib import contextmanager
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Booking, Homestay
+from .normalize import digits_only, fold_text
+from .pagination import parse_format, parse_page, to_columns
+
+FTS_TABLE = 'tourism_booking_search'
+TRIGRAM_MIN = 3
+DEFAULT_PAGE_SIZE = 50
+FIELDS = ('id', 'guest_name', 'contact_number', 'homestay__name', 'date', 'check_out', 'num_people', 'status')
+
+_SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"search_name, search_contact, content='tourism_booking', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tourism_booking BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_name, search_contact) VALUES (new.id, new.search_name, new.search_contact); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tourism_booking BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_name, search_contact) "
+    f"VALUES ('delete', old.id, old.search_name, old.search_contact); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_name, search_contact ON tourism_booking BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_name, search_contact) "
+    f"VALUES ('delete', old.id, old.search_name, old.search_contact); "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_name, search_contact) VALUES (new.id, new.search_name, new.search_contact); END",
+]
+
+
+# Database alias -> whether the SQLite FTS path is usable in this process
+_fts_available = {}
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def _sqlite_fts_ready(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                       [f'{FTS_TABLE}_a_'])
+        return cursor.fetchone()[0] == 3
+
+
+def install_sqlite_fts(using='default'):
+    """
+    Create the FTS5 table and its triggers if missing, and rebuild the index when
+    they were (re)created. Returns True when the FTS path is available.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    available = True
+    if not _sqlite_fts_ready(connection):
+        try:
+            with connection.cursor() as cursor:
+                for statement in _SQLITE_FTS:
+                    cursor.execute(statement)
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        except OperationalError:
+            # SQLite built without FTS5 or the trigram tokenizer (< 3.34): LIKE fallback
+            available = False
+    _fts_available[using] = available
+    return available
+
+
+@contextmanager
+def deferred_fts_index(using='default'):
+    """
+    Index the bookings inserted inside the block (SQLite) with one statement at the end
+    instead of row by row from the insert trigger, which is many times slower for bulk
+    loads. Use inside a transaction; does nothing on other databases.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not _sqlite_fts_ready(connection):
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT coalesce(max(id), 0) FROM tourism_booking')
+        last_id = cursor.fetchone()[0]
+        cursor.execute(f'DROP TRIGGER {FTS_TABLE}_ai')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO {FTS_TABLE}(rowid, search_name, search_contact) '
+                           f'SELECT id, search_name, search_contact FROM tourism_booking WHERE id > %s', [last_id])
+            cursor.execute(_SQLITE_FTS[1])
+
+
+@contextmanager
+def query_budget(ms, using='default'):
+    """Abort the queries run inside the block once ``ms`` milliseconds have passed."""
+    connection = connections[using]
+    if not ms:
+        yield
+        return
+    deadline = time.monotonic() + ms / 1000
+    try:
+        if connection.vendor == 'postgresql':
+            with transaction.atomic(using=using):
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL statement_timeout = %s', [int(ms)])
+                yield
+        elif connection.vendor == 'sqlite':
+            connection.ensure_connection()
+            raw = connection.connection
+            raw.set_progress_handler(lambda: int(time.monotonic() > deadline), 1000)
+            try:
+                yield
+            finally:
+                raw.set_progress_handler(None, 0)
+        else:
+            yield
+    except OperationalError:
+        if time.monotonic() >= deadline:
+            raise SearchTimeout(f'Search exceeded its {ms} ms budget.')
+        raise
+
+
+def _fts_match(name_q, contact_q):
+    """FTS5 query for the trigram table; None when the name is too short for trigrams."""
+    if name_q and len(name_q) < TRIGRAM_MIN:
+        return None
+    terms = [f'{column} : "{value}"' for column, value in
+             (('search_name', name_q), ('search_contact', contact_q)) if value]
+    return ' OR '.join(terms)
+
+
+def matching_bookings(q, bookings, using='default'):
+    """``bookings`` narrowed to matches for ``q`` and annotated with ``search_rank``."""
+    name_q = fold_text(q)
+    contact_q = digits_only(q)
+    if len(contact_q) < TRIGRAM_MIN:
+        contact_q = ''
+    if not name_q and not contact_q:
+        return bookings.annotate(search_rank=Value(0, output_field=IntegerField()))
+
+    match = _fts_match(name_q, contact_q) if connections[using].vendor == 'sqlite' else None
+    if match and (_fts_available[using] if using in _fts_available else install_sqlite_fts(using)):
+        condition = Q(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+    else:
+        condition = Q()
+        if name_q:
+            condition |= Q(search_name__contains=name_q)
+        if contact_q:
+            condition |= Q(search_contact__contains=contact_q)
+    if name_q:
+        # Homestay names live on the (small) homestay table
+        condition |= Q(homestay_id__in=Homestay.objects.filter(search_name__contains=name_q).values('id'))
+
+    exact, prefix = [], []
+    if name_q:
+        exact.append(Q(search_name=name_q))
+        prefix += [Q(search_name__startswith=name_q), Q(search_name__contains=f' {name_q}')]
+    if contact_q:
+        exact.append(Q(search_contact=contact_q))
+        prefix.append(Q(search_contact__startswith=contact_q))
+    rank = Case(When(reduce(or_, exact), then=Value(3)), When(reduce(or_, prefix), then=Value(2)),
+                default=Value(1), output_field=IntegerField())
+    return bookings.filter(condition).annotate(search_rank=rank)
+
+
+def search_tourists(params, homestay_id=None):
+    """The JSON body for one page of ranked results for ?q=&limit=&offset=."""
+    limit, offset = parse_page(params, DEFAULT_PAGE_SIZE, settings.TOURIST_LIST_MAX_PAGE_SIZE)
+    columns = parse_format(params)
+    bookings = Booking.objects.filter(num_people__gt=0, source='registration')
+    if homestay_id is not None:
+        bookings = bookings.filter(homestay_id=homestay_id)
+    q = (params.get('q') or '').strip()
+    with query_budget(settings.TOURIST_SEARCH_BUDGET_MS):
+        ranked = matching_bookings(q, bookings).order_by('-search_rank', '-created_at', '-id')
+        rows = list(ranked.values(*FIELDS)[offset:offset + limit + 1])
+    has_more = len(rows) > limit
+    results = []
+    for row in rows[:limit]:
+        row['date'] = row['date'].isoformat() if row['date'] else ''
+        row['check_out'] = row['check_out'].isoformat() if row['check_out'] else ''
+        results.append(row)
+    return {'results': to_columns(results, FIELDS) if columns else results, 'has_more': has_more, 'limit': limit, 'offset': offset}
+
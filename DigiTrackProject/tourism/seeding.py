@@ -0,0 +1,217 @@
+"""
+Synthetic data for performance work and benchmarks (see `manage.py seed_load`).
+
+seed_load() creates owners, homestays, rooms, features and years of bookings
+in batches. Occupancy follows a monthly curve (CURVES, or
+twelve values of your own) with busier weekends. Each day a homestay is
+either taken whole by a registered group for a stay of a few days, like
+register_stay() allows, or has some of its rooms reserved on the calendar,
+one 'reserved' cell per room and day, like reserve_room(). The same seed
+gives the same data.
+
+Bookings are inserted as plain rows, without save() and the model signals,
+so everything those maintain is done here: the search fields, created_at and
+updated_at (noon of the check-in day; the current time for upcoming stays),
+the DailyArrival rollup rows of the new homestays, the SQLite search index
+(once, at the end), the home page cache version and the data version stamp.
+"""
+import datetime
+import random
+import re
+
+from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .home_cache import invalidate_home_context
+from .models import Booking, BookingTombstone, CustomUser, DailyArrival, Homestay, HomestayFeature, Room
+from .normalize import digits_only, fold_text
+from .owner import invalidate_owner_homestay
+from .search import deferred_fts_index
+from .versions import bump_versions
+
+BATCH_SIZE = 2000
+
+# Share of room-days booked, January to December
+CURVES = {
+    'flat': (0.5,) * 12,
+    # Dry season (March to May) and the Christmas holidays
+    'tropical': (0.45, 0.5, 0.7, 0.85, 0.8, 0.45, 0.35, 0.35, 0.3, 0.35, 0.45, 0.75),
+    # Northern summer holidays
+    'summer': (0.2, 0.2, 0.3, 0.4, 0.5, 0.7, 0.9, 0.9, 0.6, 0.4, 0.25, 0.35),
+}
+WEEKEND_FACTOR = 1.25
+# Share of a homestay's booked days taken by a registered group
+REGISTRATION_SHARE = 0.3
+MAX_STAY_DAYS = 4
+BOOKING_FIELDS = ('homestay', 'room', 'date', 'check_out', 'status', 'source', 'num_people', 'guest_name',
+                  'search_name', 'contact_number', 'search_contact', 'created_at', 'updated_at')
+ROLLUP_FIELDS = ('homestay', 'source', 'date', 'arrivals', 'bookings')
+
+FIRST_NAMES = ('Juan', 'Maria', 'José', 'Ana', 'Carlos', 'Elena', 'Miguel', 'Sofía', 'Paolo', 'Andrea',
+               'Ramón', 'Liza', 'Mark', 'Joy', 'Angelo', 'Kristine', 'Noël', 'Grace', 'Rafael', 'Bea')
+LAST_NAMES = ('Dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Peña', 'Mendoza', 'Bautista', 'Villanueva',
+              'Ramos', 'Aquino', 'Castillo', 'Fernández', 'Navarro', 'Domingo', 'Lim', 'Tan')
+HOMESTAY_WORDS = ('Casa', 'Villa', 'Bahay', 'Balai', 'Kubo', 'Lodge', 'Haven', 'Nest')
+HOMESTAY_NAMES = ('Amihan', 'Habagat', 'Bituin', 'Dagat', 'Bukid', 'Sampaguita', 'Narra', 'Alon',
+                  'Tala', 'Luntian')
+FEATURES = (('Parking', 'boolean', ('yes', 'no')), ('Breakfast', 'boolean', ('yes', 'no')),
+            ('Aircon rooms', 'number', ('1', '2', '3')), ('Check-in time', 'text', ('12:00', '14:00')),
+            ('Kitchen', 'boolean', ('yes', 'no')), ('Distance to beach (m)', 'number', ('50', '300', '1200')))
+
+
+def parse_curve(value):
+    """A CURVES name or twelve comma-separated monthly occupancies between 0 and 1."""
+    if value in CURVES:
+        return CURVES[value]
+    try:
+        curve = tuple(float(v) for v in value.split(','))
+    except ValueError:
+        curve = ()
+    if len(curve) != 12 or not all(0 <= v <= 1 for v in curve):
+        raise ValueError(f'Expected one of {", ".join(CURVES)} or 12 comma-separated values between 0 and 1')
+    return curve
+
+
+def seeded_owners(prefix):
+    """Owners created by seed_load(prefix=``prefix``): ``prefix`` followed by a number."""
+    return CustomUser.objects.filter(username__regex=rf'^{re.escape(prefix)}[0-9]+$', is_staff=False)
+
+
+def delete_seeded(prefix):
+    """Delete the seeded owners of ``prefix`` and everything they own. Returns the number of owners."""
+    owners = list(seeded_owners(prefix).values_list('pk', flat=True))
+    homestays = Homestay.objects.filter(owner_id__in=owners)
+    with transaction.atomic():
+        # Raw deletes: per-row signals (tombstones, events, rollup deltas) are pointless for
+        # homestays that are going away, and far too slow for this many bookings
+        bookings = Booking.objects.filter(homestay__in=homestays)
+        bookings._raw_delete(bookings.db)
+        BookingTombstone.objects.filter(homestay_id__in=homestays.values('pk')).delete()
+        DailyArrival.objects.filter(homestay__in=homestays).delete()
+        CustomUser.objects.filter(pk__in=owners).delete()
+    invalidate_owner_homestay(*owners)
+    bump_versions()
+    return len(owners)
+
+
+class _RowWriter:
+    """
+    Inserts rows (tuples in ``fields`` order) into ``model``'s table BATCH_SIZE at a time
+    with executemany: building a model instance and letting bulk_create prepare every
+    value costs more than generating the row, hundreds of thousands of times over.
+    """
+    def __init__(self, model, fields):
+        columns = ', '.join(connection.ops.quote_name(model._meta.get_field(f).column) for f in fields)
+        self.sql = (f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) '
+                    f'VALUES ({", ".join(["%s"] * len(fields))})')
+        self.pending = []
+        self.count = 0
+
+    def add(self, row):
+        self.pending.append(row)
+        if len(self.pending) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            with connection.cursor() as cursor:
+                cursor.executemany(self.sql, self.pending)
+        self.count += len(self.pending)
+        self.pending = []
+
+
+def _noon(date):
+    value = datetime.datetime.combine(date, datetime.time(12))
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def _guests(rng, count):
+    """``count`` (guest_name, search_name, contact_number, search_contact) tuples, folded once."""
+    guests = []
+    for _ in range(count):
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        contact = f'09{rng.randrange(10 ** 9):09d}'
+        guests.append((name, fold_text(name), contact, digits_only(contact)))
+    return guests
+
+
+def seed_load(homestays=50, rooms=5, years=3, curve=CURVES['tropical'], seed=0, prefix='seed',
+              password='seedpass', days_ahead=90, today=None):
+    """
+    Create ``homestays`` homestays owned by ``prefix``0, ``prefix``1, ..., each with
+    ``rooms`` rooms and bookings from ``years`` years ago to ``days_ahead`` days ahead.
+    Returns a dict of row counts.
+    """
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    start = today - datetime.timedelta(days=365 * years)
+    days = (today - start).days + days_ahead + 1
+    guests = _guests(rng, 500)
+    hashed = make_password(password)
+    bookings, rollup = _RowWriter(Booking, BOOKING_FIELDS), _RowWriter(DailyArrival, ROLLUP_FIELDS)
+    adapt_date, adapt_datetime = connection.ops.adapt_datefield_value, connection.ops.adapt_datetimefield_value
+    with transaction.atomic(), deferred_fts_index():
+        owners = CustomUser.objects.bulk_create([
+            CustomUser(username=f'{prefix}{i}', name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                       password=hashed)
+            for i in range(homestays)
+        ], batch_size=BATCH_SIZE)
+        homes = []
+        for i, owner in enumerate(owners):
+            name = f'{rng.choice(HOMESTAY_WORDS)} {rng.choice(HOMESTAY_NAMES)} {i + 1}'
+            homes.append(Homestay(owner=owner, name=name, search_name=fold_text(name),
+                                  address=f'{rng.randint(1, 300)} Purok {rng.randint(1, 7)}',
+                                  max_guests=rng.randint(2, 12), wifi_available=rng.random() < 0.8,
+                                  videoke_available=rng.random() < 0.4, pet_friendly=rng.random() < 0.3,
+                                  beach_front=rng.random() < 0.25))
+        homes = Homestay.objects.bulk_create(homes, batch_size=BATCH_SIZE)
+        all_rooms = Room.objects.bulk_create([
+            Room(homestay=h, room_number=str(n + 1), capacity=rng.randint(1, 6),
+                 is_under_maintenance=rng.random() < 0.05)
+            for h in homes for n in range(rooms)
+        ], batch_size=BATCH_SIZE)
+        features = HomestayFeature.objects.bulk_create([
+            HomestayFeature(homestay=h, name=name, type=kind, value=rng.choice(values))
+            for h in homes for name, kind, values in rng.sample(FEATURES, rng.randint(2, len(FEATURES)))
+        ], batch_size=BATCH_SIZE)
+
+        now = timezone.now()
+        for i, homestay in enumerate(homes):
+            own_rooms = [(room.pk, room.capacity) for room in all_rooms[i * rooms:(i + 1) * rooms]
+                         if not room.is_under_maintenance]
+            day = 0
+            while day < days:
+                date = start + datetime.timedelta(days=day)
+                occupancy = curve[date.month - 1] * (WEEKEND_FACTOR if date.weekday() >= 5 else 1)
+                # Registered at check-in (upcoming stays: now)
+                registered = min(_noon(date), now)
+                db_date, db_registered = adapt_date(date), adapt_datetime(registered)
+                if rng.random() < occupancy * REGISTRATION_SHARE:
+                    stay = min(rng.randint(1, MAX_STAY_DAYS), days - day)
+                    people = rng.randint(1, homestay.max_guests)
+                    bookings.add((homestay.pk, None, db_date, adapt_date(date + datetime.timedelta(days=stay - 1)),
+                                  'reserved', 'registration', people, *rng.choice(guests), db_registered, db_registered))
+                    rollup.add((homestay.pk, 'registration', db_date, people, 1))
+                    day += stay
+                    continue
+                arrivals = reserved = 0
+                for room_id, capacity in own_rooms:
+                    if rng.random() < occupancy:
+                        people = rng.randint(1, capacity)
+                        bookings.add((homestay.pk, room_id, db_date, db_date, 'reserved', 'calendar',
+                                      people, *rng.choice(guests), db_registered, db_registered))
+                        arrivals += people
+                        reserved += 1
+                if reserved:
+                    rollup.add((homestay.pk, 'calendar', db_date, arrivals, reserved))
+                day += 1
+        bookings.flush()
+        rollup.flush()
+    invalidate_home_context()
+    bump_versions()
+    # A replaced owner's id can be reused, along with its cached "no homestay"
+    invalidate_owner_homestay(*(owner.pk for owner in owners))
+    return {'owners': len(owners), 'homestays': len(homes), 'rooms': len(all_rooms), 'features': len(features),
+            'bookings': bookings.count, 'rollup rows': rollup.count}
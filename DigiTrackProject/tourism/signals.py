@@ -0,0 +1,156 @@
+"""
+Model signal handlers for the tourism app.
+
+Connected in TourismConfig.ready().
+"""
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .models import CustomUser, Homestay, HomestayFeature, Room, Booking
+from .calendar_sync import next_sync_seq, record_deletion
+from .events import publish_event
+from .home_cache import invalidate_home_context
+from .owner import invalidate_owner_homestay
+from .rollups import apply_delta, booking_key
+from .search import install_sqlite_fts
+from .versions import bump_versions
+
+ROLLUP_FIELDS = {'homestay_id', 'source', 'date', 'num_people'}
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=HomestayFeature)
+@receiver(post_delete, sender=HomestayFeature)
+@receiver(post_save, sender=Homestay)
+@receiver(post_delete, sender=Homestay)
+def home_data_changed(sender, instance, **kwargs):
+    # After commit: a request rebuilding the payload in between would cache the
+    # pre-commit data under the new version
+    transaction.on_commit(invalidate_home_context)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=HomestayFeature)
+@receiver(post_delete, sender=HomestayFeature)
+@receiver(post_save, sender=Homestay)
+@receiver(post_delete, sender=Homestay)
+def data_version_changed(sender, instance, **kwargs):
+    # Homestay too: api_my_tourists shows its name
+    bump_versions(instance.pk if sender is Homestay else instance.homestay_id)
+
+
+@receiver(post_init, sender=Homestay)
+def remember_owner(sender, instance, **kwargs):
+    instance._initial_owner_id = instance.__dict__.get('owner_id')
+
+
+@receiver(post_save, sender=Homestay)
+@receiver(post_delete, sender=Homestay)
+def owner_homestay_changed(sender, instance, **kwargs):
+    # Both the previous and the current owner may have this homestay cached
+    invalidate_owner_homestay(getattr(instance, '_initial_owner_id', None), instance.owner_id)
+    instance._initial_owner_id = instance.owner_id
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_is_active(sender, instance, **kwargs):
+    instance._initial_is_active = instance.is_active
+
+
+@receiver(post_save, sender=CustomUser)
+def user_active_changed(sender, instance, created, **kwargs):
+    # Only owner suspension/reactivation changes what the home page shows;
+    # logins (last_login updates) and profile edits do not.
+    if not created and instance.is_active != getattr(instance, '_initial_is_active', instance.is_active):
+        transaction.on_commit(invalidate_home_context)
+    instance._initial_is_active = instance.is_active
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_home_context)
+
+
+@receiver(post_init, sender=Booking)
+def remember_rollup_key(sender, instance, **kwargs):
+    # Snapshot what this booking contributes to DailyArrival, so saves and
+    # deletes can apply the difference without re-reading the row.
+    if instance.get_deferred_fields() & ROLLUP_FIELDS:
+        instance._rollup_key = None
+    else:
+        instance._rollup_key = booking_key(instance)
+
+
+@receiver(pre_save, sender=Booking)
+def load_rollup_key(sender, instance, **kwargs):
+    if getattr(instance, '_rollup_key', None) is None and instance.pk and not instance._state.adding:
+        # Loaded with deferred fields: read the stored values once
+        stored = Booking.objects.filter(pk=instance.pk).first()
+        instance._rollup_key = booking_key(stored) if stored else None
+
+
+@receiver(pre_save, sender=Booking)
+def take_sync_seq(sender, instance, raw=False, **kwargs):
+    # Booking.save() runs this in the row's transaction (see calendar_sync.py)
+    if not raw:
+        instance.sync_seq = next_sync_seq(instance.homestay_id)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved_rollup(sender, instance, created, **kwargs):
+    new_key, new_people = booking_key(instance)
+    old = None if created else getattr(instance, '_rollup_key', None)
+    if old is None:
+        apply_delta(new_key, new_people, 1)
+    else:
+        old_key, old_people = old
+        if old_key == new_key:
+            if new_people != old_people:
+                apply_delta(new_key, new_people - old_people, 0)
+        else:
+            apply_delta(old_key, -old_people, -1)
+            apply_delta(new_key, new_people, 1)
+    instance._rollup_key = (new_key, new_people)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted_rollup(sender, instance, **kwargs):
+    old = getattr(instance, '_rollup_key', None) or booking_key(instance)
+    old_key, old_people = old
+    apply_delta(old_key, -old_people, -1)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted_tombstone(sender, instance, **kwargs):
+    # Lets calendar clients polling with ?since= drop the booking
+    record_deletion(instance)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_event(sender, instance, created=False, **kwargs):
+    type_ = 'registration' if instance.source == 'registration' else 'booking'
+    action = 'deleted' if kwargs['signal'] is post_delete else 'saved'
+    publish_event(type_, action, instance.homestay_id, id=instance.pk)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_event(sender, instance, **kwargs):
+    action = 'deleted' if kwargs['signal'] is post_delete else 'saved'
+    publish_event('room', action, instance.homestay_id, id=instance.pk)
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using='default', **kwargs):
+    # SQLite rebuilds tourism_booking on many ALTERs, dropping the FTS triggers;
+    # re-create them (and re-index) after every migrate. No-op on other databases.
+    if sender.label == 'tourism':
+        install_sqlite_fts(using)
@@ -0,0 +1,38 @@
+"""
+WhiteNoise static file serving that also runs natively under ASGI.
+
+whitenoise.middleware.WhiteNoiseMiddleware is sync-only. Under ASGI, Django
+would adapt it with sync_to_async, and adapt everything below it back with
+async_to_sync. Every request, async views included, would then hold a thread
+until its response is ready. This subclass is async-capable. Requests that
+are not for a static file go straight to the next middleware on the event
+loop. Static files are found and opened in a thread, as WhiteNoise does.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware as SyncWhiteNoiseMiddleware
+
+
+class WhiteNoiseMiddleware(SyncWhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Looks on disk (DEBUG only)
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
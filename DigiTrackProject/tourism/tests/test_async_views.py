@@ -0,0 +1,67 @@
+from datetime import date
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Room, Booking
+from ..owner import OWNER_HOMESTAY_KEY
+from .test_owner_homestay import LOCMEM_CACHES
+
+
+class AsyncReadApiTests(TestCase):
+    """The async read APIs served through the ASGI handler."""
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Sunrise Homestay', address='Addr')
+        room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        self.booking = Booking.objects.create(homestay=self.homestay, room=room, date=date(2025, 6, 1),
+                                              check_out=date(2025, 6, 2), num_people=2, guest_name='Ana Cruz',
+                                              source='registration')
+        CustomUser.objects.create_user(username='nohome', password='pass')
+
+    async def test_calendar_data(self):
+        self.assertEqual((await self.async_client.get(reverse('calendar_data_api'))).status_code, 302)
+        await self.async_client.alogin(username='nohome', password='pass')
+        resp = await self.async_client.get(reverse('calendar_data_api'))
+        self.assertEqual(resp.status_code, 404)
+        await self.async_client.alogin(username='owner1', password='pass')
+        data = (await self.async_client.get(reverse('calendar_data_api'))).json()
+        self.assertEqual([b['id'] for b in data['bookings']], [self.booking.id])
+        self.assertEqual(len(data['rooms']), 1)
+        delta = (await self.async_client.get(reverse('calendar_data_api'), {'since': data['watermark']})).json()
+        self.assertEqual(delta['deleted'], [])
+
+    async def test_chart_data(self):
+        data = (await self.async_client.get(reverse('api_tourist_chart_data'), {'year': 2025})).json()
+        self.assertEqual(data['monthly']['Jun'], 2)
+        await self.async_client.alogin(username='owner1', password='pass')
+        data = (await self.async_client.get(reverse('api_my_tourist_chart_data'), {'year': 2025})).json()
+        self.assertEqual(data['yearly']['2025'], 2)
+
+    async def test_searches(self):
+        data = (await self.async_client.get(reverse('api_homestay_search'), {'q': 'sunrise'})).json()
+        self.assertEqual((data['total'], data['users'][0]['homestayName']), (1, 'Sunrise Homestay'))
+        data = (await self.async_client.get(reverse('api_tourist_search'), {'q': 'Ana'})).json()
+        self.assertEqual([r['id'] for r in data['results']], [self.booking.id])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, OWNER_HOMESTAY_CACHE_TIMEOUT=300)
+class AsyncOwnerHomestayCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+
+    async def test_async_lookup_fills_the_cache(self):
+        await self.async_client.alogin(username='owner1', password='pass')
+        self.assertEqual((await self.async_client.get(reverse('calendar_data_api'))).status_code, 200)
+        cached = await cache.aget(OWNER_HOMESTAY_KEY.format(user_id=self.owner.pk))
+        self.assertEqual(cached.pk, self.homestay.pk)
+
+
+class AsgiMiddlewareTests(SimpleTestCase):
+    @override_settings(DEBUG=True)
+    def test_no_middleware_is_adapted_to_sync(self):
+        # Django logs each adaptation at DEBUG; one sync-only middleware puts every request in a thread
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler().load_middleware(is_async=True)
@@ -0,0 +1,66 @@
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Room, Booking
+from ..availability import build_availability
+from datetime import date, timedelta
+
+
+class AvailabilityGridTests(TestCase):
+    def _make_homestay(self, index, rooms=3, days=20):
+        owner = CustomUser.objects.create_user(username=f'owner{index}', password='pass', name=f'Owner {index}')
+        homestay = Homestay.objects.create(owner=owner, name=f'Homestay {index}', address='Addr')
+        room_objs = [Room.objects.create(homestay=homestay, room_number=str(n), capacity=2) for n in range(rooms)]
+        start = date(2025, 3, 1)
+        for i in range(days):
+            Booking.objects.create(homestay=homestay, room=room_objs[i % rooms], date=start + timedelta(days=i),
+                                   status='reserved', guest_name='Guest', num_people=2, source='calendar')
+        return homestay
+
+    def _count_queries(self):
+        ids = list(Homestay.objects.values_list('id', flat=True))
+        with CaptureQueriesContext(connection) as ctx:
+            build_availability(ids, date(2025, 3, 1), date(2025, 4, 30))
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_flat_as_data_grows(self):
+        self._make_homestay(1, rooms=1, days=1)
+        small = self._count_queries()
+        for i in range(2, 8):
+            self._make_homestay(i, rooms=4, days=40)
+        large = self._count_queries()
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 2)
+
+    def test_room_statuses(self):
+        homestay = self._make_homestay(1, rooms=2, days=1)
+        Room.objects.create(homestay=homestay, room_number='M', capacity=2, is_under_maintenance=True)
+        grid = build_availability([homestay.id], date(2025, 3, 1), date(2025, 3, 31))[homestay.id]
+        self.assertEqual(grid['2025-03-01'], [
+            {'room_number': '0', 'status': 'reserved'},
+            {'room_number': '1', 'status': 'available'},
+            {'room_number': 'M', 'status': 'maintenance'},
+        ])
+        # Every date of the window is present, booked or not
+        self.assertEqual(len(grid), 31)
+
+    def test_availability_api_window(self):
+        homestay = self._make_homestay(1, rooms=1, days=3)
+        url = reverse('homestay_availability_api')
+        resp = self.client.get(url, {'homestay_id': homestay.id, 'start': '2025-03-01', 'end': '2025-03-07'})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(sorted(data['availability']), [f'2025-03-0{d}' for d in range(1, 8)])
+        self.assertEqual(data['availability']['2025-03-02'], [{'room_number': '0', 'status': 'reserved'}])
+        self.assertEqual(data['availability']['2025-03-05'], [{'room_number': '0', 'status': 'available'}])
+
+    def test_availability_api_rejects_bad_windows(self):
+        homestay = self._make_homestay(1, rooms=1, days=1)
+        url = reverse('homestay_availability_api')
+        resp = self.client.get(url, {'homestay_id': homestay.id, 'start': '2025-01-01', 'end': '2025-12-31'})
+        self.assertEqual(resp.status_code, 400)
+        homestay.owner.is_active = False
+        homestay.owner.save()
+        resp = self.client.get(url, {'homestay_id': homestay.id})
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..management.commands.bench_http import compare
+from ..models import CustomUser, Homestay
+
+
+def _report(**figures):
+    base = {'queries': 3, 'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'rps': 100.0, 'peak_rss_mb': 60.0}
+    return {'results': {'home': {'10': {**base, **figures}}}}
+
+
+class BenchHttpTests(TestCase):
+    def test_compare_flags_regressions_past_the_threshold(self):
+        baseline = _report()
+        self.assertEqual(compare(_report(p95_ms=23.0, rps=85.0, p99_ms=90.0), baseline, 0.2), [])
+        regressions = compare(_report(p95_ms=25.0, rps=70.0, queries=4), baseline, 0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertIn('home at 10 homestays: 4 queries per request, baseline 3', regressions)
+        # Sub-millisecond noise and endpoints missing from the baseline are ignored
+        self.assertEqual(compare(_report(p50_ms=0.9), _report(p50_ms=0.3), 0.2), [])
+        self.assertEqual(compare({'results': {'other': {'10': _report()['results']['home']['10']}}}, baseline, 0.2),
+                         [])
+
+    def test_run_writes_results_and_fails_on_regression(self):
+        path = tempfile.mkstemp(suffix='.json')[1]
+        self.addCleanup(os.remove, path)
+        args = ['--scales', '1', '--years', '0', '--requests', '2', '--warmup', '1', '--output', path,
+                '--endpoints', 'calendar_data_api', 'api_tourist_search']
+        call_command('bench_http', *args, stdout=StringIO())
+        report = json.loads(open(path).read())
+        figures = report['results']['calendar_data_api']['1']
+        self.assertEqual(figures['samples'], 2)
+        self.assertGreater(figures['queries'], 0)
+        self.assertLess(figures['columns_br_bytes'], figures['bytes'])
+        # The seeded data and the staff user are gone again
+        self.assertFalse(Homestay.objects.exists())
+        self.assertFalse(CustomUser.objects.exists())
+
+        report['results']['calendar_data_api']['1']['queries'] -= 1
+        with open(path, 'w') as f:
+            json.dump(report, f)
+        with self.assertRaisesMessage(CommandError, 'calendar_data_api at 1 homestays'):
+            call_command('bench_http', *args, '--baseline', path, stdout=StringIO())
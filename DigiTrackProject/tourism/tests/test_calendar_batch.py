@@ -0,0 +1,146 @@
+import json
+import threading
+from datetime import date
+from unittest import mock
+from django.test import Client, TestCase, TransactionTestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Room, Booking, DailyArrival
+from .. import calendar_batch
+from ..rollups import booking_key, rebuild_daily_arrivals
+
+
+class CalendarBatchTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        self.rooms = [Room.objects.create(homestay=self.homestay, room_number=str(i), capacity=2) for i in range(3)]
+        other = CustomUser.objects.create_user(username='owner2', password='pass')
+        self.foreign_room = Room.objects.create(
+            homestay=Homestay.objects.create(owner=other, name='Homestay B', address='Addr'), room_number='1', capacity=2)
+        self.client.login(username='owner1', password='pass')
+        self.url = reverse('calendar_bulk_api')
+
+    def _post(self, **data):
+        body = dict({'room_ids': [r.id for r in self.rooms], 'ranges': [{'start': '2025-07-01', 'end': '2025-07-07'}],
+                     'status': 'reserved', 'guest_name': 'Team Outing', 'num_people': 2}, **data)
+        return self.client.post(self.url, json.dumps(body), content_type='application/json')
+
+    def _rollup(self):
+        return list(DailyArrival.objects.order_by('source', 'date').values_list('source', 'date', 'arrivals', 'bookings'))
+
+    def test_week_for_three_rooms_in_one_request(self):
+        data = self._post().json()
+        self.assertEqual((data['created'], data['updated'], data['conflict']), (21, 0, 0))
+        self.assertEqual(Booking.objects.filter(status='reserved', source='calendar').count(), 21)
+        booking = Booking.objects.get(room=self.rooms[0], date=date(2025, 7, 3))
+        self.assertEqual((booking.check_out, booking.search_name), (date(2025, 7, 3), 'team outing'))
+        # Bulk writes keep the rollup in step with the bookings
+        incremental = self._rollup()
+        rebuild_daily_arrivals()
+        self.assertEqual(self._rollup(), incremental)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def queries(end):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self._post(ranges=[{'start': '2025-08-01', 'end': end}]).status_code, 200)
+            return len(ctx.captured_queries)
+        single = queries('2025-08-01')
+        Booking.objects.all().delete()
+        DailyArrival.objects.all().delete()
+        self.assertEqual(queries('2025-08-07'), single)
+
+    def test_updates_cells_and_reports_conflicts(self):
+        self._post(ranges=[{'start': '2025-07-01', 'end': '2025-07-02'}])
+        # A multi-day stay already holds room 1 on the 3rd and 4th
+        stay = Booking.objects.create(homestay=self.homestay, room=self.rooms[1], date=date(2025, 7, 3),
+                                      check_out=date(2025, 7, 4), status='reserved', num_people=2)
+        data = self._post(ranges=[{'start': '2025-07-02', 'end': '2025-07-04'}], status='available').json()
+        self.assertEqual((data['created'], data['updated'], data['conflict']), (4, 3, 2))
+        conflicts = [r for r in data['results'] if r['result'] == 'conflict']
+        self.assertEqual({(r['room_id'], r['booking_id']) for r in conflicts}, {(self.rooms[1].id, stay.id)})
+        self.assertEqual(Booking.objects.get(room=self.rooms[0], date=date(2025, 7, 2)).status, 'available')
+
+    def test_single_cell_edit_after_bulk_edit(self):
+        self._post(room_ids=[r.id for r in self.rooms[:2]], ranges=[{'start': '2026-03-01', 'end': '2026-03-01'}])
+        cell = Booking.objects.get(room=self.rooms[1], date=date(2026, 3, 1))
+        resp = self.client.post(reverse('booking_api'), json.dumps({
+            'date': '2026-03-01', 'room_id': self.rooms[1].id, 'status': 'available', 'guest_name': ''}),
+            content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.json()['created'], resp.json()['booking_id']), (False, cell.id))
+        self.assertEqual(Booking.objects.get(pk=cell.pk).status, 'available')
+        self.assertEqual(Booking.objects.get(room=self.rooms[0], date=date(2026, 3, 1)).status, 'reserved')
+        # A room without a cell that day gets its own
+        resp = self.client.post(reverse('booking_api'), json.dumps({
+            'date': '2026-03-01', 'room_id': self.rooms[2].id, 'status': 'reserved', 'guest_name': 'Walk-in'}),
+            content_type='application/json')
+        self.assertTrue(resp.json()['created'])
+        self.assertEqual(Booking.objects.filter(date=date(2026, 3, 1)).count(), 3)
+
+    def test_everything_is_validated_before_any_write(self):
+        bad = [
+            {'room_ids': [self.rooms[0].id, self.foreign_room.id]},
+            {'status': 'booked'},
+            {'ranges': [{'start': '2025-07-01', 'end': '2025-06-30'}]},
+            {'ranges': [{'start': '2025-07-01', 'end': '2025-07-02'}, {'start': 'soon'}]},
+            {'num_people': 'two'},
+            {'ranges': [{'start': '2025-01-01', 'end': '2025-12-31'}]},  # 3 rooms x 365 days > MAX_BATCH_CELLS
+        ]
+        for data in bad:
+            self.assertEqual(self._post(**data).status_code, 400, data)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_owner_only(self):
+        self.client.logout()
+        self.assertEqual(self._post().status_code, 403)
+
+
+class ConcurrentBatchTests(TransactionTestCase):
+    def setUp(self):
+        owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        self.homestay = Homestay.objects.create(owner=owner, name='Homestay A', address='Addr')
+        self.room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=6)
+        self.cell = Booking.objects.create(homestay=self.homestay, room=self.room, date=date(2025, 7, 1),
+                                           check_out=date(2025, 7, 1), status='reserved', source='calendar',
+                                           guest_name='Ana', num_people=2)
+        self.client.force_login(owner)
+
+    def test_single_cell_edit_during_a_batch_waits_for_it(self):
+        # booking_api edits the cell after the batch has read it and before it writes
+        edit = Client()
+        edit.force_login(self.homestay.owner)
+        responses = []
+
+        def edit_cell():
+            try:
+                responses.append(edit.post(reverse('booking_api'), json.dumps({
+                    'date': '2025-07-01', 'room_id': self.room.id, 'status': 'reserved', 'guest_name': 'Walk-in',
+                    'num_people': 5}), content_type='application/json'))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=edit_cell)
+
+        def key_with_concurrent_edit(booking):
+            if not thread.is_alive() and not responses:
+                thread.start()
+                thread.join(timeout=1)  # long enough to land if nothing holds it back
+            return booking_key(booking)
+
+        with mock.patch.object(calendar_batch, 'booking_key', key_with_concurrent_edit):
+            resp = self.client.post(reverse('calendar_bulk_api'), json.dumps({
+                'room_ids': [self.room.id], 'ranges': [{'start': '2025-07-01', 'end': '2025-07-02'}],
+                'status': 'available'}), content_type='application/json')
+        thread.join()
+        self.assertEqual(resp.json()['updated'], 1)
+        self.assertEqual(responses[0].status_code, 200)
+        # The edit ran after the batch, on what the batch wrote, and the rollup saw both
+        cell = Booking.objects.get(pk=self.cell.pk)
+        self.assertEqual((cell.status, cell.guest_name, cell.num_people), ('reserved', 'Walk-in', 5))
+        incremental = list(DailyArrival.objects.order_by('source', 'date')
+                           .values_list('source', 'date', 'arrivals', 'bookings'))
+        rebuild_daily_arrivals()
+        self.assertEqual(list(DailyArrival.objects.order_by('source', 'date')
+                              .values_list('source', 'date', 'arrivals', 'bookings')), incremental)
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from ..models import CustomUser, Homestay, Room, Booking, BookingTombstone
+from ..calendar_sync import TOMBSTONE_RETENTION, purge_tombstones
+from ..pagination import encode_cursor
+
+
+class CalendarSyncTests(TestCase):
+    def setUp(self):
+        owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=owner, name='Homestay A', address='Addr')
+        self.room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        self.old = Booking.objects.create(homestay=self.homestay, room=self.room, date=date(2025, 6, 1), num_people=1)
+        self.gone = Booking.objects.create(homestay=self.homestay, room=self.room, date=date(2025, 7, 1), num_people=1)
+        self.client.login(username='owner1', password='pass')
+        self.url = reverse('calendar_data_api')
+
+    def _ids(self, data):
+        return sorted(b['id'] for b in data['bookings'])
+
+    def test_full_snapshot_then_deltas(self):
+        first = self.client.get(self.url).json()
+        self.assertTrue(first['full'])
+        self.assertEqual(self._ids(first), [self.old.id, self.gone.id])
+        gone_id = self.gone.id
+        self.gone.delete()
+        new = Booking.objects.create(homestay=self.homestay, room=self.room, date=date(2025, 8, 1), num_people=2)
+        delta = self.client.get(self.url, {'since': first['watermark']}).json()
+        self.assertFalse(delta['full'])
+        self.assertEqual(self._ids(delta), [new.id])
+        self.assertEqual(delta['deleted'], [gone_id])
+        self.assertEqual(len(delta['rooms']), 1)
+
+    def test_slow_commit_is_not_missed(self):
+        first = self.client.get(self.url).json()
+        # Saved (updated_at) before the watermark was issued, committed after it
+        slow = Booking.objects.create(homestay=self.homestay, room=self.room, date=date(2025, 9, 1), num_people=1)
+        Booking.objects.filter(pk=slow.pk).update(updated_at=timezone.now() - timedelta(minutes=10))
+        delta = self.client.get(self.url, {'since': first['watermark']}).json()
+        self.assertEqual(self._ids(delta), [slow.id])
+        # Nothing new: nothing sent
+        self.assertEqual(self._ids(self.client.get(self.url, {'since': delta['watermark']}).json()), [])
+
+    def test_window_limits_the_snapshot(self):
+        data = self.client.get(self.url, {'start': '2025-06-15', 'end': '2025-07-31'}).json()
+        self.assertEqual(self._ids(data), [self.gone.id])
+
+    def test_stale_or_bad_watermarks(self):
+        stale = encode_cursor([2, (timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1)).isoformat()])
+        data = self.client.get(self.url, {'since': stale}).json()
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['bookings']), 2)
+        for since in ('nope', encode_cursor([2, '2025-01-01T00:00:00']), encode_cursor([timezone.now().isoformat()])):
+            self.assertEqual(self.client.get(self.url, {'since': since}).status_code, 400)
+
+    def test_old_tombstones_are_purged(self):
+        self.gone.delete()
+        BookingTombstone.objects.update(deleted_at=timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1))
+        self.assertEqual(purge_tombstones(), 1)
+        self.assertFalse(BookingTombstone.objects.exists())
@@ -0,0 +1,135 @@
+import gzip
+import json
+import threading
+from datetime import date, timedelta
+from unittest import mock, skipIf
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..compression import CompressionMiddleware, brotli, choose_encoding
+from ..models import Booking, CustomUser, Homestay, Room
+
+
+class ChooseEncodingTests(TestCase):
+    def test_quality_values_and_wildcard(self):
+        available = ('br', 'gzip')
+        self.assertEqual(choose_encoding('gzip, deflate, br', available), 'br')
+        self.assertEqual(choose_encoding('br;q=0.5, gzip', available), 'gzip')
+        self.assertEqual(choose_encoding('br;q=0, gzip;q=0', available), None)
+        self.assertEqual(choose_encoding('*', available), 'br')
+        self.assertEqual(choose_encoding('identity', available), None)
+        self.assertEqual(choose_encoding('GZIP;q=bad, br', ('gzip',)), None)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(username='mto', password='pass', is_staff=True)
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        self.room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        for i in range(60):
+            Booking.objects.create(homestay=self.homestay, date=date(2025, 8, 1) + timedelta(days=i),
+                                   guest_name=f'Guest {i}', contact_number='09170000000', num_people=2,
+                                   source='registration')
+        self.client.force_login(self.staff)
+        self.url = reverse('api-tourist-list')
+
+    def test_gzip_large_json(self):
+        plain = self.client.get(self.url, {'limit': 60})
+        resp = self.client.get(self.url, {'limit': 60}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        self.assertEqual(gzip.decompress(resp.content), plain.content)
+        self.assertLess(len(resp.content), len(plain.content) / 3)
+        self.assertEqual(int(resp['Content-Length']), len(resp.content))
+        self.assertNotIn('Content-Encoding', plain)
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        resp = self.client.get(self.url, {'limit': 60}, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(resp['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(resp.content), self.client.get(self.url, {'limit': 60}).content)
+
+    def test_html_is_gzipped_with_padding(self):
+        # Brotli has no BREACH padding: pages go out as gzip, with a random-length header field
+        sizes = set()
+        for _ in range(5):
+            resp = self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+            self.assertEqual(resp['Content-Encoding'], 'gzip')
+            self.assertIn(b'<html', gzip.decompress(resp.content))
+            sizes.add(len(resp.content))
+        self.assertGreater(len(sizes), 1)
+        self.assertEqual(self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='br').get('Content-Encoding'), None)
+
+    async def test_async_requests_are_compressed_on_the_event_loop(self):
+        # Not a MiddlewareMixin: nothing is handed to the thread-sensitive executor under ASGI
+        threads = []
+        process_response = CompressionMiddleware.process_response
+
+        def record_thread(middleware, request, response):
+            threads.append(threading.get_ident())
+            return process_response(middleware, request, response)
+
+        with mock.patch.object(CompressionMiddleware, 'process_response', record_thread):
+            resp = await self.async_client.get(reverse('api_tourist_search'), {'q': 'guest'},
+                                               headers={'accept-encoding': 'gzip'})
+        self.assertEqual(threads, [threading.get_ident()])
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertTrue(json.loads(gzip.decompress(resp.content))['results'])
+
+    def test_small_responses_are_not_compressed(self):
+        with override_settings(COMPRESSION_MIN_BYTES=10 ** 6):
+            resp = self.client.get(self.url, {'limit': 60}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', resp)
+
+    def test_streamed_csv_is_compressed(self):
+        resp = self.client.get(reverse('export_tourists_all_csv'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        body = gzip.decompress(b''.join(resp.streaming_content)).decode()
+        self.assertEqual(len(body.splitlines()), 61)
+        # Already gzipped by the view (?gzip=1): left alone
+        resp = self.client.get(reverse('export_tourists_all_csv'), {'gzip': '1'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', resp)
+
+    def test_etag_is_weakened(self):
+        self.client.force_login(self.owner)
+        resp = self.client.get(reverse('calendar_data_api'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertTrue(resp['ETag'].startswith('W/"'))
+        # The weak tag still revalidates
+        resp = self.client.get(reverse('calendar_data_api'), HTTP_ACCEPT_ENCODING='gzip',
+                               HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+
+class ColumnsFormatTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        self.room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        for i in range(3):
+            Booking.objects.create(homestay=self.homestay, room=self.room, date=date(2025, 8, 1) + timedelta(days=i),
+                                   guest_name=f'Ana {i}', contact_number='09170000000', num_people=2,
+                                   source='registration')
+        self.client.force_login(self.owner)
+
+    def _same_rows(self, rows, columns):
+        self.assertEqual(list(columns), list(rows[0]))
+        self.assertEqual([dict(zip(columns, values)) for values in zip(*columns.values())], rows)
+
+    def test_list_endpoints(self):
+        for url, params in ((reverse('api-tourist-list'), {}), (reverse('api_tourist_search'), {'q': 'ana'})):
+            rows = self.client.get(url, params).json()
+            columns = self.client.get(url, {**params, 'format': 'columns'}).json()
+            self.assertEqual(len(rows['results']), 3)
+            self._same_rows(rows['results'], columns['results'])
+            self.assertEqual(self.client.get(url, {**params, 'format': 'xml'}).status_code, 400)
+
+    def test_calendar(self):
+        url = reverse('calendar_data_api')
+        rows = self.client.get(url).json()
+        columns = self.client.get(url, {'format': 'columns'}).json()
+        self._same_rows(rows['rooms'], columns['rooms'])
+        self._same_rows(rows['bookings'], columns['bookings'])
+        self.assertEqual(self.client.get(url, {'format': 'xml'}).status_code, 400)
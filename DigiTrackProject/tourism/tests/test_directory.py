@@ -0,0 +1,65 @@
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Booking
+from datetime import date
+
+
+# No metrics flush in the middle of a counted request
+@override_settings(METRICS_FLUSH_SECONDS=24 * 60 * 60)
+class HomestayDirectoryTests(TestCase):
+    def _make_homestay(self, index, guests, active=True):
+        owner = CustomUser.objects.create_user(username=f'owner{index}', password='pass', name=f'Owner {index}',
+                                               is_active=active)
+        homestay = Homestay.objects.create(owner=owner, name=f'Homestay {index}', address='Addr')
+        for day in range(1, guests + 1):
+            Booking.objects.create(homestay=homestay, date=date(2025, 5, day), guest_name='Guest', num_people=1,
+                                   source='registration')
+        return homestay
+
+    def _users(self, url_name, **params):
+        resp = self.client.get(reverse(url_name), params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_query_count_is_flat_as_homestays_grow(self):
+        self._make_homestay(1, guests=1)
+        with CaptureQueriesContext(connection) as small:
+            self._users('homestay_user_list_api')
+        for i in range(2, 12):
+            self._make_homestay(i, guests=3)
+        with CaptureQueriesContext(connection) as large:
+            data = self._users('homestay_user_list_api')
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(data['total'], 11)
+
+    def test_sort_and_pagination(self):
+        self._make_homestay(1, guests=2)
+        self._make_homestay(2, guests=5, active=False)
+        self._make_homestay(3, guests=0)
+        data = self._users('homestay_user_list_api', sort='-guests', limit=2)
+        self.assertEqual([u['totalGuests'] for u in data['users']], [5, 2])
+        self.assertEqual((data['total'], data['limit'], data['offset']), (3, 2, 0))
+        data = self._users('homestay_user_list_api', sort='-guests', limit=2, offset=2)
+        self.assertEqual([u['homestayName'] for u in data['users']], ['Homestay 3'])
+        data = self._users('homestay_user_list_api', sort='status')
+        self.assertEqual(data['users'][-1]['status'], 'Inactive')
+
+    def test_search_is_paged_and_rejects_bad_params(self):
+        for i in range(1, 4):
+            self._make_homestay(i, guests=i)
+        data = self._users('api_homestay_search', q='owner', sort='-name', limit=1)
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['users'][0]['homestayName'], 'Homestay 3')
+        self.assertEqual(data['users'][0]['totalGuests'], 3)
+        for params in ({'limit': 'x'}, {'offset': -1}, {'sort': 'password'}):
+            resp = self.client.get(reverse('api_homestay_search'), params)
+            self.assertEqual(resp.status_code, 400)
+
+    def test_staff_accounts_are_bounded(self):
+        for i in range(3):
+            CustomUser.objects.create_user(username=f'staff{i}', password='pass', is_staff=True)
+        data = self._users('homestay_user_list_api', limit=2)
+        self.assertEqual(len(data['mto_accounts']), 2)
+        self.assertEqual(data['mto_total'], 3)
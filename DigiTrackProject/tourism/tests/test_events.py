@@ -0,0 +1,153 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+from datetime import date
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Room, Booking
+from ..events import RESYNC, Broker, LocalBroker, RedisBroker, get_broker
+
+
+class BrokerTests(TestCase):
+    def test_events_reach_matching_channels_across_threads(self):
+        broker = LocalBroker()
+
+        async def listen():
+            owner = broker.subscribe(['homestay:1'])
+            staff = broker.subscribe(['staff'])
+            thread = threading.Thread(target=broker.publish, args=(['homestay:2', 'staff'], {'type': 'booking'}))
+            thread.start()
+            thread.join()
+            event = await asyncio.wait_for(staff.queue.get(), 1)
+            self.assertTrue(owner.queue.empty())
+            broker.unsubscribe(owner)
+            broker.unsubscribe(staff)
+            return event
+
+        self.assertEqual(asyncio.run(listen()), {'type': 'booking'})
+        self.assertEqual(broker.subscriber_count, 0)
+
+    def test_slow_clients_are_told_to_resync(self):
+        broker = LocalBroker()
+
+        async def flood():
+            subscription = broker.subscribe(['staff'])
+            for i in range(150):
+                broker.publish(['staff'], {'type': 'booking', 'id': i})
+            await asyncio.sleep(0)
+            return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+
+        events = asyncio.run(flood())
+        self.assertIn({'type': 'resync'}, events)
+        self.assertLessEqual(len(events), 100)
+
+    def test_broker_without_publish_cannot_be_created(self):
+        class Incomplete(Broker):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class FakeRedis:
+    """Redis.publish/pubsub() over in-process queues, shared by the brokers of one test."""
+    def __init__(self):
+        self.listeners = []
+        self.fail_next_listen = False
+
+    def publish(self, channel, message):
+        for listener in list(self.listeners):
+            listener.put({'type': 'message', 'channel': channel, 'data': message})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        fake = self
+
+        class PubSub:
+            def subscribe(self, channel):
+                # The round trip to Redis: events published meanwhile are not received
+                time.sleep(0.05)
+                self.messages = queue.Queue()
+                fake.listeners.append(self.messages)
+
+            def listen(self):
+                if fake.fail_next_listen:
+                    fake.fail_next_listen = False
+                    raise ConnectionError('Redis went away')
+                while True:
+                    yield self.messages.get()
+        return PubSub()
+
+
+class RedisBrokerTests(TestCase):
+    def test_events_reach_streams_of_other_workers(self):
+        fake = FakeRedis()
+        fake.fail_next_listen = True
+        with mock.patch('redis.Redis.from_url', return_value=fake), \
+                mock.patch('DigiTrackProject.tourism.events.REDIS_RETRY_SECONDS', 0):
+            publisher, worker = RedisBroker('redis://test'), RedisBroker('redis://test')
+
+        async def listen():
+            owner = worker.subscribe(['homestay:1'])
+            # The first connection fails: the stream is told to resync once the listener is back
+            self.assertEqual(await asyncio.wait_for(owner.queue.get(), 5), RESYNC)
+            publisher.publish(['homestay:2', 'staff'], {'type': 'booking', 'id': 1})
+            publisher.publish(['homestay:1', 'staff'], {'type': 'room', 'id': 2})
+            return await asyncio.wait_for(owner.queue.get(), 5)
+
+        self.assertEqual(asyncio.run(listen()), {'type': 'room', 'id': 2})
+        self.assertFalse(publisher.subscriber_count)
+
+
+class ModelEventTests(TestCase):
+    def setUp(self):
+        owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        self.homestay = Homestay.objects.create(owner=owner, name='Homestay A', address='Addr')
+
+    def test_changes_are_published_after_commit(self):
+        with mock.patch.object(LocalBroker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+                Booking.objects.create(homestay=self.homestay, date=date(2025, 6, 1), num_people=2)
+                self.assertFalse(publish.called)
+        sent = [(c.args[0], c.args[1]['type'], c.args[1]['action']) for c in publish.call_args_list]
+        channels = [f'homestay:{self.homestay.id}', 'staff']
+        self.assertEqual(sent, [(channels, 'room', 'saved'), (channels, 'registration', 'saved')])
+        self.assertEqual(publish.call_args_list[0].args[1]['id'], room.id)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        self.staff = CustomUser.objects.create_user(username='mto', password='pass', is_staff=True)
+        self.nohome = CustomUser.objects.create_user(username='nohome', password='pass')
+        self.url = reverse('event_stream')
+
+    def test_needs_asgi(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(self.url).status_code, 503)
+
+    async def test_access_rules(self):
+        self.assertEqual((await self.async_client.get(self.url)).status_code, 403)
+        await self.async_client.aforce_login(self.nohome)
+        self.assertEqual((await self.async_client.get(self.url)).status_code, 404)
+
+    async def test_owner_receives_own_homestay_events(self):
+        await self.async_client.aforce_login(self.owner)
+        resp = await self.async_client.get(self.url)
+        self.assertEqual(resp['Content-Type'], 'text/event-stream')
+        broker = get_broker()
+        # Nothing is subscribed until the stream starts, so a client gone before then leaves nothing behind
+        self.assertEqual(broker.subscriber_count, 0)
+        frames = aiter(resp.streaming_content)
+        self.assertEqual(await anext(frames), b'retry: 5000\n\n')
+        self.assertEqual(broker.subscriber_count, 1)
+        broker.publish(['homestay:0', 'staff'], {'type': 'booking', 'id': 1})
+        broker.publish([f'homestay:{self.homestay.id}', 'staff'], {'type': 'room', 'id': 2})
+        frame = (await asyncio.wait_for(anext(frames), 1)).decode()
+        self.assertTrue(frame.startswith('event: room\n'))
+        self.assertEqual(json.loads(frame.split('data: ')[1]), {'type': 'room', 'id': 2})
+        await frames.aclose()
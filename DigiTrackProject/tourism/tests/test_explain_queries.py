@@ -0,0 +1,15 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from ..models import CustomUser, Homestay
+
+
+class ExplainQueriesCommandTests(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        Homestay.objects.create(owner=user, name='Test Homestay', address='Addr')
+
+    def test_endpoint_queries_use_booking_indexes(self):
+        out = StringIO()
+        call_command('explain_queries', '--fail', stdout=out)
+        self.assertIn('No sequential scans on tourism_booking, tourism_dailyarrival', out.getvalue())
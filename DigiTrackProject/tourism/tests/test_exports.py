@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Booking
+from datetime import date, timedelta
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(username='mto', password='pass', is_staff=True)
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        other = CustomUser.objects.create_user(username='owner2', password='pass', name='Owner Two')
+        self.other = Homestay.objects.create(owner=other, name='Homestay B', address='Addr')
+        for i in range(10):
+            Booking.objects.create(homestay=self.homestay if i % 2 else self.other, date=date(2025, 8, 1) + timedelta(days=i),
+                                   guest_name=f'Guest {i}', contact_number='09170000000', num_people=2,
+                                   source='registration')
+
+    def _rows(self, response):
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content)
+        if response['Content-Type'] == 'application/gzip':
+            body = gzip.decompress(body)
+        return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+    def test_all_export_streams_with_joined_homestay_names(self):
+        self.client.login(username='mto', password='pass')
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self._rows(self.client.get(reverse('export_tourists_all_csv')))
+        self.assertEqual(rows[0][2], 'homestay_name')
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[1][:3], ['Guest 9', '09170000000', 'Homestay A'])
+        # One query for the rows, not one per homestay name (the rest is session/auth)
+        self.assertEqual(sum('tourism_booking' in q['sql'] for q in ctx.captured_queries), 1)
+
+    def test_date_range_and_gzip(self):
+        self.client.login(username='mto', password='pass')
+        resp = self.client.get(reverse('export_tourists_all_csv'),
+                               {'start': '2025-08-03', 'end': '2025-08-05', 'gzip': '1'})
+        self.assertIn('.csv.gz', resp['Content-Disposition'])
+        self.assertEqual([r[0] for r in self._rows(resp)[1:]], ['Guest 4', 'Guest 3', 'Guest 2'])
+        resp = self.client.get(reverse('export_tourists_all_csv'), {'start': 'yesterday'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_owner_export_is_scoped_to_own_homestay(self):
+        self.client.login(username='owner1', password='pass')
+        rows = self._rows(self.client.get(reverse('export_tourists_csv'), {'homestay_id': self.other.id}))
+        self.assertEqual({r[2] for r in rows[1:]}, {'Homestay A'})
+        self.assertEqual(len(rows), 6)
+
+    async def test_asgi_export_streams_from_an_async_iterator(self):
+        await self.async_client.aforce_login(self.staff)
+        for params, encoding in (({}, ''), ({'gzip': '1'}, ''), ({}, 'gzip')):
+            resp = await self.async_client.get(reverse('export_tourists_all_csv'), params,
+                                               headers={'accept-encoding': encoding})
+            # Served from the async iterator: not read into a list before the first byte
+            self.assertTrue(resp.is_async)
+            body = b''.join([chunk async for chunk in resp.streaming_content])
+            if params or encoding:
+                body = gzip.decompress(body)
+            self.assertEqual(len(body.decode('utf-8').splitlines()), 11)
@@ -0,0 +1,57 @@
+from django.test import TestCase, Client
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Room, Booking, HomestayFeature
+from ..home_cache import HOME_CONTEXT_VERSION_KEY, get_home_payload
+from django.core.cache import cache
+from datetime import date
+
+
+class HomeCacheTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.user, name='Test Homestay', address='Addr')
+        self.room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+
+    def test_payload_is_served_from_cache(self):
+        get_home_payload()
+        with CaptureQueriesContext(connection) as ctx:
+            get_home_payload()
+        # Only the cache lookups remain (version + payload)
+        self.assertTrue(all('tourism_homestay' not in q['sql'] for q in ctx.captured_queries))
+
+    def test_booking_write_invalidates_payload(self):
+        get_home_payload()
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(homestay=self.homestay, room=self.room, date=date(2025, 1, 5), status='reserved',
+                                   guest_name='Alice', num_people=3, source='registration')
+        payload = get_home_payload()
+        self.assertEqual(payload['homestay_rankings'][0]['total_arrivals'], 3)
+
+    def test_feature_and_owner_changes_invalidate_payload(self):
+        get_home_payload()
+        with self.captureOnCommitCallbacks(execute=True):
+            HomestayFeature.objects.create(homestay=self.homestay, name='Pool', type='boolean', value='true')
+        self.assertIn('Pool', get_home_payload()['dynamic_features_json'])
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(get_home_payload()['homestays'], [])
+
+    def test_version_is_bumped_on_commit(self):
+        # A request rebuilding the payload before the commit must not store it under the new version
+        get_home_payload()
+        version = cache.get(HOME_CONTEXT_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(homestay=self.homestay, room_number='2', capacity=2)
+            self.assertEqual(cache.get(HOME_CONTEXT_VERSION_KEY), version)
+        self.assertEqual(cache.get(HOME_CONTEXT_VERSION_KEY), version + 1)
+
+    def test_login_flags_are_merged_per_request(self):
+        self.client.post(reverse('login'), {'username': 'owner1', 'password': 'wrong'})
+        resp = self.client.get(reverse('login'))
+        self.assertTrue(resp.context['login_error'])
+        resp = self.client.get(reverse('login'))
+        self.assertFalse(resp.context['login_error'])
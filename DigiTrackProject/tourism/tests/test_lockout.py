@@ -0,0 +1,128 @@
+import threading
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.urls import reverse
+from ..models import CustomUser, LoginLockout
+from ..lockout import CacheLockoutBackend, DatabaseLockoutBackend, LockoutBackend, get_lockout_backend
+
+THRESHOLD = 4
+PARALLEL = 12
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'lockout-tests'},
+}
+
+
+def parallel_failures(make_backend, key, close_connections=False):
+    """PARALLEL simultaneous failed logins, each through its own backend instance ("worker")."""
+    barrier = threading.Barrier(PARALLEL)
+    results, errors = [], []
+
+    def attempt():
+        backend = make_backend()
+        try:
+            barrier.wait()
+            results.append(backend.register_failure(key))
+        except Exception as e:  # pragma: no cover - reported by the assertion below
+            errors.append(e)
+        finally:
+            if close_connections:
+                connection.close()
+
+    threads = [threading.Thread(target=attempt) for _ in range(PARALLEL)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+@override_settings(CACHES=LOCMEM_CACHES, LOGIN_LOCK_THRESHOLD=THRESHOLD, LOGIN_LOCK_TIMEOUT=300)
+class CacheLockoutTests(TestCase):
+    def setUp(self):
+        CacheLockoutBackend().reset('alice')
+
+    def test_parallel_failures_lock_exactly_at_threshold(self):
+        results, errors = parallel_failures(CacheLockoutBackend, 'alice')
+        self.assertEqual(errors, [])
+        # Exactly THRESHOLD - 1 attempts were merely counted; the THRESHOLD-th and later ones see the lock
+        self.assertEqual(sum(1 for r in results if r == 0), THRESHOLD - 1)
+        self.assertTrue(CacheLockoutBackend().locked_for('alice') > 0)
+        self.assertEqual(CacheLockoutBackend().cache.get('login_count_user:alice'), PARALLEL)
+
+    def test_reset_clears_lock(self):
+        backend = CacheLockoutBackend()
+        for _ in range(THRESHOLD):
+            backend.register_failure('alice')
+        backend.reset('alice')
+        self.assertEqual(backend.locked_for('alice'), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                           'LOCATION': 'tourism_cache'}})
+    def test_rejects_caches_without_atomic_incr(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CacheLockoutBackend()
+
+
+class IncompleteBackend(LockoutBackend):
+    # No reset()
+    def locked_for(self, key):
+        return 0
+
+    def register_failure(self, key):
+        return 0
+
+
+class LockoutBackendTests(TestCase):
+    @override_settings(LOGIN_LOCKOUT_BACKEND='DigiTrackProject.tourism.tests.test_lockout.IncompleteBackend')
+    def test_incomplete_backend_fails_when_created(self):
+        with self.assertRaises(TypeError):
+            get_lockout_backend()
+
+
+@override_settings(LOGIN_LOCK_THRESHOLD=THRESHOLD, LOGIN_LOCK_TIMEOUT=300)
+class DatabaseLockoutTests(TransactionTestCase):
+    def test_parallel_failures_lock_exactly_at_threshold(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Shared-cache in-memory SQLite reports table locks instead of waiting on them;
+            # a file or server database (as deployed) serialises the writers.
+            self.skipTest('needs a file-backed or server test database')
+        results, errors = parallel_failures(DatabaseLockoutBackend, 'bob', close_connections=True)
+        self.assertEqual(errors, [])
+        self.assertEqual(sum(1 for r in results if r == 0), THRESHOLD - 1)
+        self.assertEqual(LoginLockout.objects.get(key='bob').failures, PARALLEL)
+        self.assertTrue(DatabaseLockoutBackend().locked_for('bob') > 0)
+
+    def test_expired_window_starts_over(self):
+        backend = DatabaseLockoutBackend()
+        for _ in range(THRESHOLD - 1):
+            backend.register_failure('bob')
+        LoginLockout.objects.filter(key='bob').update(window_expires='2000-01-01T00:00:00Z')
+        self.assertEqual(backend.register_failure('bob'), 0)
+        self.assertEqual(LoginLockout.objects.get(key='bob').failures, 1)
+
+
+@override_settings(LOGIN_LOCK_THRESHOLD=THRESHOLD, LOGIN_LOCK_TIMEOUT=300,
+                   LOGIN_LOCKOUT_BACKEND='DigiTrackProject.tourism.lockout.DatabaseLockoutBackend')
+class LoginViewLockoutTests(TestCase):
+    def setUp(self):
+        CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+
+    def _post(self, password):
+        return self.client.post(reverse('login'), {'username': 'Owner1', 'password': password},
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+
+    def test_lock_trips_at_threshold_and_blocks_good_password(self):
+        for _ in range(THRESHOLD - 1):
+            self.assertFalse(self._post('wrong')['blocked'])
+        self.assertTrue(self._post('wrong')['blocked'])
+        blocked = self._post('pass')
+        self.assertTrue(blocked['blocked'])
+        self.assertGreater(blocked['remaining'], 0)
+
+    def test_successful_login_resets_counter(self):
+        for _ in range(THRESHOLD - 1):
+            self._post('wrong')
+        self.client.post(reverse('login'), {'username': 'owner1', 'password': 'pass'})
+        self.assertFalse(LoginLockout.objects.filter(key='owner1').exists())
@@ -0,0 +1,74 @@
+import io
+import json
+import logging
+from contextlib import redirect_stdout
+from datetime import date
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..logs import JsonFormatter, QueueingHandler, RateLimitFilter
+from ..models import CustomUser, Homestay, Booking
+
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord('tourism.test', level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class LogsTests(TestCase):
+    def test_rate_limit_counts_what_it_dropped(self):
+        limit = RateLimitFilter(rate=2, per=60)
+        with mock.patch('DigiTrackProject.tourism.logs.time.monotonic', return_value=100):
+            passed = [limit.filter(make_record('Login failed')) for _ in range(5)]
+            self.assertTrue(limit.filter(make_record('Other message')))
+            self.assertTrue(limit.filter(make_record('Login failed', level=logging.WARNING)))
+        self.assertEqual(passed, [True, True, False, False, False])
+        with mock.patch('DigiTrackProject.tourism.logs.time.monotonic', return_value=161):
+            record = make_record('Login failed')
+            self.assertTrue(limit.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_rate_key_gets_its_own_budget(self):
+        limit = RateLimitFilter(rate=1, per=60)
+        with mock.patch('DigiTrackProject.tourism.logs.time.monotonic', return_value=100):
+            self.assertTrue(limit.filter(make_record('Login failed', rate_key='ana')))
+            self.assertFalse(limit.filter(make_record('Login failed', rate_key='ana')))
+            self.assertTrue(limit.filter(make_record('Login failed', rate_key='ben')))
+        # The key is not written out as a field of its own
+        self.assertNotIn('rate_key', JsonFormatter().format(make_record('Login failed', rate_key='ana')))
+
+    def test_queued_json_lines(self):
+        stream = io.StringIO()
+        handler = QueueingHandler(stream)
+        handler.setFormatter(JsonFormatter())
+        handler.handle(make_record('Feature %s created', 7, homestay_id=3))
+        handler.close()
+        line = json.loads(stream.getvalue())
+        self.assertEqual((line['level'], line['message'], line['homestay_id']), ('INFO', 'Feature 7 created', 3))
+
+
+class ViewLoggingTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        Booking.objects.create(homestay=homestay, date=date(2025, 6, 1), num_people=2, source='registration')
+
+    def test_dashboard_and_login_do_not_print(self):
+        out = io.StringIO()
+        with redirect_stdout(out), self.assertLogs('DigiTrackProject.tourism.views', 'INFO') as logs:
+            self.client.post(reverse('login'), {'username': 'owner1', 'password': 'wrong'})
+            self.client.post(reverse('login'), {'username': 'owner1', 'password': 'pass'})
+            self.assertEqual(self.client.get(reverse('homestay')).status_code, 200)
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual([r.getMessage() for r in logs.records], ['Login failed', 'Login succeeded'])
+        self.assertEqual(logs.records[1].username, 'owner1')
+
+    @override_settings(LOGIN_LOCK_THRESHOLD=2)
+    def test_lockout_is_logged_as_warning(self):
+        with self.assertLogs('DigiTrackProject.tourism.views', 'INFO') as logs:
+            for _ in range(2):
+                self.client.post(reverse('login'), {'username': 'owner1', 'password': 'wrong'})
+        self.assertEqual([(r.levelname, r.getMessage()) for r in logs.records],
+                         [('INFO', 'Login failed'), ('INFO', 'Login failed'), ('WARNING', 'Login locked')])
+        self.assertEqual(logs.records[0].rate_key, 'owner1')
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from .. import metrics
+from ..models import CustomUser, Homestay
+from .test_owner_homestay import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES, METRICS_TOKEN='scrape-token')
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics._totals.clear()
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        self.staff = CustomUser.objects.create_user(username='mto', password='pass', is_staff=True)
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.force_login(self.owner)
+        resp = self.client.get(reverse('room_list_api'))
+        self.client.get(reverse('room_list_api'))
+        totals = metrics._totals['room_list_api']
+        self.assertEqual(totals['count'], 2)
+        self.assertEqual(sum(totals['buckets']), 2)
+        self.assertEqual(totals['bytes'], 2 * len(resp.content))
+        # Session, user, homestay and rooms
+        self.assertGreaterEqual(totals['queries'], 2 * 3)
+        self.assertNotIn('Server-Timing', resp)
+
+    async def test_async_views_count_their_queries(self):
+        await self.async_client.get(reverse('api_homestay_search'))
+        self.assertEqual(metrics._totals['api_homestay_search']['queries'], 2)
+
+    def test_server_timing_for_staff(self):
+        self.client.force_login(self.staff)
+        resp = self.client.get(reverse('api_tourist_search'), {'q': 'ana'})
+        self.assertRegex(resp['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_endpoint_reports_each_worker(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.get(reverse('api_tourist_chart_data'))
+        # Another worker's flushed snapshot
+        other = metrics._empty()
+        other.update(count=3, queries=6, latency=0.3, buckets=[0, 0, 0, 0, 3] + [0] * 6)
+        cache.set(metrics.WORKER_KEY.format(worker='other:1'), {'api_tourist_chart_data': other})
+        cache.set(metrics.WORKERS_KEY, ['other:1', 'gone:2'])
+        resp = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = resp.content.decode()
+        # One series per worker: a worker whose snapshot expires ends its series instead of
+        # lowering a sum, which Prometheus would read as a counter reset
+        self.assertIn('digitrack_http_requests_total{view="api_tourist_chart_data",worker="other:1"} 3\n', body)
+        self.assertIn(f'digitrack_http_requests_total{{view="api_tourist_chart_data",worker="{metrics.WORKER_ID}"}} '
+                      f'1\n', body)
+        self.assertIn('digitrack_http_request_duration_seconds_bucket{view="api_tourist_chart_data",worker="other:1",'
+                      'le="+Inf"} 3\n', body)
+        self.assertIn('# TYPE digitrack_db_queries_total counter\n', body)
+        self.assertEqual(sorted(cache.get(metrics.WORKERS_KEY)), sorted(['other:1', metrics.WORKER_ID]))
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
@@ -0,0 +1,70 @@
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from datetime import date
+from ..models import CustomUser, Homestay, Room, Booking
+from ..owner import OWNER_HOMESTAY_KEY
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'owner-homestay-tests'},
+}
+
+
+def homestay_queries(ctx):
+    return [q['sql'] for q in ctx.captured_queries if 'FROM "tourism_homestay"' in q['sql']]
+
+
+class OwnerHomestayTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        for day in (1, 2):
+            Booking.objects.create(homestay=self.homestay, room=room, date=date(2025, 6, day), num_people=1)
+        CustomUser.objects.create_user(username='nohome', password='pass')
+
+    def test_homestay_is_looked_up_once_per_request(self):
+        self.client.login(username='owner1', password='pass')
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('calendar_data_api'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(homestay_queries(ctx)), 1)
+        # Bookings report their room id without loading the room
+        self.assertFalse(any('FROM "tourism_room" WHERE "tourism_room"."id"' in q['sql'] for q in ctx.captured_queries))
+
+    def test_missing_homestay_is_a_json_404(self):
+        self.assertEqual(self.client.post(reverse('room_api'), '{}', content_type='application/json').status_code, 403)
+        self.client.login(username='nohome', password='pass')
+        for name in ('room_list_api', 'calendar_data_api', 'get_homestay_features_api'):
+            resp = self.client.get(reverse(name))
+            self.assertEqual(resp.status_code, 404, name)
+            self.assertEqual(resp.json(), {'success': False, 'error': 'Homestay not found.'})
+        self.assertEqual(self.client.get(reverse('api_my_tourists')).json(), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, OWNER_HOMESTAY_CACHE_TIMEOUT=300)
+class OwnerHomestayCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        self.client.login(username='owner1', password='pass')
+
+    def test_cached_between_requests(self):
+        self.client.get(reverse('room_list_api'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(reverse('room_list_api')).status_code, 200)
+        self.assertEqual(homestay_queries(ctx), [])
+
+    def test_homestay_changes_invalidate_old_and_new_owner(self):
+        other = CustomUser.objects.create_user(username='owner2', password='pass')
+        self.client.get(reverse('room_list_api'))
+        cache.set(OWNER_HOMESTAY_KEY.format(user_id=other.pk), 'none')
+        homestay = Homestay.objects.get(pk=self.homestay.pk)
+        homestay.owner = other
+        homestay.save()
+        self.assertIsNone(cache.get(OWNER_HOMESTAY_KEY.format(user_id=self.owner.pk)))
+        self.assertIsNone(cache.get(OWNER_HOMESTAY_KEY.format(user_id=other.pk)))
+        self.assertEqual(self.client.get(reverse('room_list_api')).status_code, 404)
@@ -0,0 +1,311 @@
+"""
+Query budgets for every URL in tourism/urls.py.
+
+Each endpoint is requested against a scaled fixture (HOMESTAYS homestays with
+rooms, features and a year of registrations and calendar reservations) and
+must stay within its maximum number of queries and of rows fetched. The
+on-commit work a write schedules (version stamps, home cache, events) is run
+and counted with it. Every endpoint is then measured again after the fixture is
+doubled and must run exactly as many queries, so an N+1 fails even where it
+still fits the budget. The failure message lists the SQL that ran, with the
+statements past the budget marked ``+`` and repeated statements counted. New
+URLs must be given a budget in BUDGETS.
+"""
+import json
+from datetime import date, timedelta
+from functools import partial
+
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import urls
+from ..models import CustomUser, Homestay, HomestayFeature, Room, Booking
+from ..home_cache import HOME_CONTEXT_VERSION_KEY
+from ..rollups import rebuild_daily_arrivals
+from ..versions import current_version
+from ..normalize import fold_text
+
+HOMESTAYS = 20
+ROOMS_PER_HOMESTAY = 5
+YEAR = 2025
+
+# url name -> request and budget. ``as``: anon, owner (of the first homestay), staff or superuser.
+# ``json`` bodies are POSTed as application/json, ``form`` bodies as a form. Query budgets are
+# what the endpoint runs today (savepoints, on-commit work and database cache statements
+# included); row budgets leave about 10% headroom. Raise a budget only together with the change
+# that needs it.
+#
+# Writes run 16 more statements once they commit: with the database cache (no REDIS_URL) the
+# home cache version is read, then it and the two data version stamps are written at five
+# statements each (cull count, savepoint, select, update, release). The rest is each write's own.
+BUDGETS = {
+    # Public pages and APIs
+    'home': {'as': 'anon', 'queries': 10, 'rows': 120},
+    'login': {'as': 'anon', 'form': {'username': '{owner}', 'password': 'pass'}, 'status': 302,
+              'queries': 11, 'rows': 10},
+    'register_tourist': {'as': 'anon', 'status': 302, 'queries': 0, 'rows': 0},
+    # Homestay lock, overlap check, calendar sequence, the stay and its daily rollup upsert
+    'api_register_tourist': {'as': 'anon', 'json': {
+        'name': 'New Guest', 'homestayName': '{homestay_name}', 'contactNumber': '09171234567', 'region': 'Region',
+        'province': 'Province', 'city': 'City', 'barangay': 'Barangay', 'dateArrival': '2026-01-10',
+        'dateDeparture': '2026-01-12', 'numTourist': 2}, 'queries': 28, 'rows': 15},
+    'homestay_availability_api': {'as': 'anon', 'params': {
+        'homestay_id': '{homestay}', 'start': '2025-06-01', 'end': '2025-06-30'}, 'queries': 3, 'rows': 30},
+    'api_tourist_chart_data': {'as': 'anon', 'params': {'year': '2025'}, 'queries': 3, 'rows': 20},
+    # Homestay owner dashboard
+    'homestay': {'as': 'owner', 'queries': 7, 'rows': 150},
+    'logout': {'as': 'owner', 'status': 302, 'queries': 4, 'rows': 10},
+    'calendar_data_api': {'as': 'owner', 'queries': 7, 'rows': 350},
+    'room_list_api': {'as': 'owner', 'queries': 5, 'rows': 10},
+    'room_api': {'as': 'owner', 'json': {'room_number': '99', 'capacity': 2, 'status': 'Not Under Maintenance'},
+                 'queries': 20, 'rows': 13},
+    'update_room_api': {'as': 'owner', 'json': {
+        'room_id': '{room}', 'room_number': '1A', 'capacity': 3, 'status': 'Not Under Maintenance'},
+        'queries': 18, 'rows': 10},
+    'delete_room_api': {'as': 'owner', 'json': {'room_id': '{room}'}, 'queries': 18, 'rows': 10},
+    # Homestay lock, cell lock, calendar sequence, the write and its daily rollup upsert
+    'booking_api': {'as': 'owner', 'json': {
+        'date': '2026-02-01', 'status': 'reserved', 'guest_name': 'Walk-in', 'num_people': 2, 'room_id': '{room}'},
+        'queries': 30, 'rows': 17},
+    'reserve_room_api': {'as': 'owner', 'json': {
+        'room_id': '{room}', 'date': '2026-02-02', 'guest_name': 'Walk-in', 'num_people': 2,
+        'contact_number': '09170000000'}, 'queries': 27, 'rows': 15},
+    # Constant in the number of cells: homestay lock, one read of the cells, one sequence value,
+    # one bulk write and one bulk rollup write
+    'calendar_bulk_api': {'as': 'owner', 'json': {
+        'room_ids': ['{room}'], 'ranges': [{'start': '2026-03-01', 'end': '2026-03-31'}], 'status': 'reserved',
+        'guest_name': 'Group', 'num_people': 2}, 'queries': 30, 'rows': 80},
+    'api_my_tourists': {'as': 'owner', 'queries': 5, 'rows': 140},
+    'api_my_tourist_chart_data': {'as': 'owner', 'params': {'year': '2025'}, 'queries': 7, 'rows': 20},
+    'export_tourists_csv': {'as': 'owner', 'queries': 4, 'rows': 140},
+    'get_homestay_features_api': {'as': 'owner', 'queries': 5, 'rows': 10},
+    'add_homestay_feature_api': {'as': 'owner', 'json': {
+        'featureName': 'Pool', 'featureType': 'text', 'featureValue': 'yes'}, 'queries': 20, 'rows': 13},
+    'update_homestay_feature_api': {'as': 'owner', 'json': {'featureId': '{feature}', 'featureValue': 'no'},
+                                    'queries': 20, 'rows': 10},
+    'delete_homestay_feature_api': {'as': 'owner', 'json': {'featureId': '{feature}'}, 'queries': 20, 'rows': 10},
+    'update_homestay_features': {'as': 'owner', 'json': {'max_guests': 6, 'wifi_available': True},
+                                 'queries': 20, 'rows': 10},
+    'change_password_api': {'as': 'owner', 'json': {'current_password': 'pass', 'new_password': 'newpass123'},
+                            'queries': 3, 'rows': 10},
+    # MTO staff
+    'mto-admin': {'as': 'staff', 'queries': 3, 'rows': 30},
+    'api-tourist-list': {'as': 'staff', 'queries': 11, 'rows': 70},
+    'api_tourist_groups': {'as': 'staff', 'queries': 4, 'rows': 60},
+    'api_tourist_search': {'as': 'staff', 'params': {'q': 'guest 1'}, 'queries': 3, 'rows': 60},
+    'api_homestay_search': {'as': 'staff', 'params': {'q': 'homestay 1'}, 'queries': 2, 'rows': 20},
+    # Streams every registration by design
+    'export_tourists_all_csv': {'as': 'staff', 'queries': 3, 'rows': 2680},
+    # Needs the ASGI server; under the test client it answers 503
+    'event_stream': {'as': 'staff', 'status': 503, 'queries': 0, 'rows': 0},
+    'metrics': {'as': 'staff', 'queries': 15, 'rows': 10},
+    # Superuser account management
+    'homestay_user_list_api': {'as': 'superuser', 'queries': 3, 'rows': 30},
+    'add_homestay_user_api': {'as': 'superuser', 'json': {
+        'username': 'newowner', 'password': 'secret123', 'homestayName': 'New Homestay', 'ownerName': 'New Owner',
+        'address': 'Somewhere'}, 'queries': 19, 'rows': 10},
+    'edit_homestay_user_api': {'as': 'superuser', 'json': {
+        'username': '{owner}', 'homestayName': 'Renamed Homestay', 'ownerName': 'Owner Zero', 'address': 'New street',
+        'status': 'Active'}, 'queries': 20, 'rows': 10},
+    'edit_user_api': {'as': 'superuser', 'json': {'username': '{owner}', 'name': 'Owner Zero'},
+                      'queries': 2, 'rows': 10},
+    'admin_log_user_entries_api': {'as': 'superuser', 'queries': 3, 'rows': 30},
+}
+
+
+class QueryRecorder:
+    """Execute wrapper recording each statement and how many rows were fetched from it."""
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        entry = {'sql': sql, 'rows': 0}
+        self.queries.append(entry)
+        cursor = context['cursor']
+        cursor._budget_entry = entry
+        if 'fetchmany' not in vars(cursor):
+            for name in ('fetchone', 'fetchmany', 'fetchall'):
+                setattr(cursor, name, partial(self._fetch, cursor, getattr(cursor.cursor, name)))
+        return execute(sql, params, many, context)
+
+    @staticmethod
+    def _fetch(cursor, fetch, *args):
+        result = fetch(*args)
+        if isinstance(result, list):
+            cursor._budget_entry['rows'] += len(result)
+        elif result is not None:
+            cursor._budget_entry['rows'] += 1
+        return result
+
+    @property
+    def rows(self):
+        return sum(q['rows'] for q in self.queries)
+
+    def report(self, max_queries):
+        """The statements that ran, past ``max_queries`` marked with +, repeats counted."""
+        seen = {}
+        for q in self.queries:
+            seen[q['sql']] = seen.get(q['sql'], 0) + 1
+        lines = []
+        for i, q in enumerate(self.queries, 1):
+            sql = q['sql'] if len(q['sql']) <= 300 else q['sql'][:300] + '...'
+            repeats = f'  [same statement x{seen[q["sql"]]}]' if seen[q['sql']] > 1 else ''
+            lines.append(f"{'+' if i > max_queries else ' '} {i:>3}. {q['rows']:>6} rows  {sql}{repeats}")
+        return '\n'.join(lines)
+
+
+def bookings_for(i, homestay, rooms, phase=0):
+    """A registration every third day and a calendar reservation per room every tenth day of YEAR."""
+    start = date(YEAR, 1, 1)
+    bookings = []
+    for day in range((i + phase) % 3, 365, 3):
+        bookings.append(Booking(
+            homestay=homestay, date=start + timedelta(days=day), check_out=start + timedelta(days=day + 1),
+            num_people=1 + day % 4, guest_name=f'Guest {i}-{phase}-{day}', contact_number=f'0917{i:03d}{day:04d}',
+            source='registration', status='available',
+        ))
+    for room in rooms:
+        for day in range(room.id % 10, 365, 10):
+            bookings.append(Booking(
+                homestay=homestay, room=room, date=start + timedelta(days=day), check_out=start + timedelta(days=day),
+                num_people=2, guest_name=f'Reserved {room.id}-{day}', source='calendar', status='reserved',
+            ))
+    for booking in bookings:
+        booking.fill_search_fields()
+    return bookings
+
+
+def populate(first, count, superuser):
+    """``count`` owners with a homestay each, with rooms, features, bookings and admin log entries."""
+    password = make_password('pass')
+    owners = CustomUser.objects.bulk_create([
+        CustomUser(username=f'owner{i}', name=f'Owner {i}', password=password) for i in range(first, first + count)
+    ])
+    homestays = Homestay.objects.bulk_create([
+        Homestay(owner=owner, name=f'Homestay {i}', search_name=fold_text(f'Homestay {i}'), address=f'Street {i}')
+        for i, owner in enumerate(owners, first)
+    ])
+    rooms = Room.objects.bulk_create([
+        Room(homestay=h, room_number=str(n + 1), capacity=2 + n % 3)
+        for h in homestays for n in range(ROOMS_PER_HOMESTAY)
+    ])
+    HomestayFeature.objects.bulk_create([
+        HomestayFeature(homestay=h, name=name, type='text', value='yes')
+        for h in homestays for name in ('Parking', 'Breakfast', 'Garden')
+    ])
+    bookings = []
+    for n, h in enumerate(homestays):
+        bookings += bookings_for(first + n, h, rooms[n * ROOMS_PER_HOMESTAY:(n + 1) * ROOMS_PER_HOMESTAY])
+    Booking.objects.bulk_create(bookings, batch_size=500)
+    content_type = ContentType.objects.get_for_model(CustomUser)
+    LogEntry.objects.bulk_create([
+        LogEntry(user=superuser, content_type=content_type, object_id=str(o.pk), object_repr=o.username,
+                 action_flag=ADDITION, change_message='[]')
+        for o in owners
+    ])
+    return owners, homestays, rooms
+
+
+# No metrics flush in the middle of a measured request
+@override_settings(METRICS_FLUSH_SECONDS=24 * 60 * 60)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        password = make_password('pass')
+        cls.staff = CustomUser.objects.create(username='mto', name='MTO', password=password, is_staff=True)
+        cls.superuser = CustomUser.objects.create(username='root', name='Root', password=password, is_staff=True,
+                                                  is_superuser=True)
+        owners, homestays, rooms = populate(0, HOMESTAYS, cls.superuser)
+        rebuild_daily_arrivals()
+        cls.owner, cls.homestay = owners[0], homestays[0]
+        cls.room = rooms[0]
+        cls.feature = HomestayFeature.objects.filter(homestay=cls.homestay).first()
+
+    def grow(self):
+        """Twice the homestays, and twice the rooms, features and bookings of the owner's homestay."""
+        populate(HOMESTAYS, HOMESTAYS, self.superuser)
+        rooms = Room.objects.bulk_create([
+            Room(homestay=self.homestay, room_number=str(n + 1), capacity=2 + n % 3)
+            for n in range(ROOMS_PER_HOMESTAY, 2 * ROOMS_PER_HOMESTAY)
+        ])
+        HomestayFeature.objects.bulk_create([
+            HomestayFeature(homestay=self.homestay, name=name, type='text', value='yes')
+            for name in ('Pool', 'Kitchen', 'Terrace')
+        ])
+        Booking.objects.bulk_create(bookings_for(0, self.homestay, rooms, phase=1), batch_size=500)
+        rebuild_daily_arrivals()
+
+    def users(self):
+        return {'anon': None, 'owner': self.owner, 'staff': self.staff, 'superuser': self.superuser}
+
+    def fill(self, value):
+        """Substitute fixture values for the {placeholders} of a request body or query."""
+        if isinstance(value, dict):
+            return {k: self.fill(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.fill(v) for v in value]
+        if isinstance(value, str) and value.startswith('{') and value.endswith('}'):
+            return {'room': self.room.id, 'feature': self.feature.id, 'homestay': self.homestay.id,
+                    'homestay_name': self.homestay.name, 'owner': self.owner.username}[value[1:-1]]
+        return value
+
+    def measure(self, name, spec):
+        # Cold payload caches, but the home version key and the data version stamps exist
+        # as they do in a running site
+        cache.clear()
+        cache.add(HOME_CONTEXT_VERSION_KEY, 1, None)
+        current_version()
+        current_version(self.homestay.id)
+        self.client.logout()
+        user = self.users()[spec['as']]
+        if user is not None:
+            self.client.force_login(user)
+        url = reverse(name)
+        recorder = QueryRecorder()
+        with transaction.atomic():
+            with connection.execute_wrapper(recorder):
+                with self.captureOnCommitCallbacks() as callbacks:
+                    if 'json' in spec:
+                        response = self.client.post(url, json.dumps(self.fill(spec['json'])),
+                                                    content_type='application/json')
+                    elif 'form' in spec:
+                        response = self.client.post(url, self.fill(spec['form']))
+                    else:
+                        response = self.client.get(url, self.fill(spec.get('params', {})))
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                # The work deferred to the commit (version stamps, home cache, events) counts too
+                for callback in callbacks:
+                    callback()
+            transaction.set_rollback(True)
+        return response, recorder
+
+    def test_every_url_has_a_budget(self):
+        names = {p.name for p in urls.urlpatterns}
+        self.assertEqual(sorted(names - set(BUDGETS)), [], 'URLs without a query budget')
+        self.assertEqual(sorted(set(BUDGETS) - names), [], 'Budgets for URLs that no longer exist')
+
+    def test_endpoints_stay_within_budget(self):
+        # Within budget on the fixture, and the same number of queries on twice the data
+        counts = {}
+        for name, spec in BUDGETS.items():
+            with self.subTest(name):
+                response, recorder = self.measure(name, spec)
+                self.assertEqual(response.status_code, spec.get('status', 200), getattr(response, 'content', b'')[:300])
+                queries = counts[name] = len(recorder.queries)
+                if queries > spec['queries'] or recorder.rows > spec['rows']:
+                    self.fail(f"{name} ran {queries} queries (budget {spec['queries']}) and fetched "
+                              f"{recorder.rows} rows (budget {spec['rows']}):\n{recorder.report(spec['queries'])}")
+        self.grow()
+        for name, spec in BUDGETS.items():
+            with self.subTest(name, data='doubled'):
+                response, recorder = self.measure(name, spec)
+                self.assertEqual(response.status_code, spec.get('status', 200), getattr(response, 'content', b'')[:300])
+                if len(recorder.queries) != counts.get(name):
+                    self.fail(f"{name} ran {len(recorder.queries)} queries on twice the data, {counts.get(name)} "
+                              f"before:\n{recorder.report(counts.get(name) or 0)}")
@@ -0,0 +1,98 @@
+import json
+import threading
+from datetime import date
+from django.test import TestCase, TransactionTestCase
+from django.db import connection
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Room, Booking
+from ..reservations import ReservationConflict, register_stay, reserve_room
+
+PARALLEL = 12
+
+
+def race(action):
+    """Run ``action`` in PARALLEL threads released together; returns (wins, conflicts, errors)."""
+    barrier = threading.Barrier(PARALLEL)
+    wins, conflicts, errors = [], [], []
+
+    def attempt(i):
+        try:
+            barrier.wait()
+            wins.append(action(i))
+        except ReservationConflict:
+            conflicts.append(i)
+        except Exception as e:  # pragma: no cover - reported by the assertion below
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=attempt, args=(i,)) for i in range(PARALLEL)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return wins, conflicts, errors
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Shared-cache in-memory SQLite reports table locks instead of waiting on them
+            self.skipTest('needs a file-backed or server test database')
+        owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        self.homestay = Homestay.objects.create(owner=owner, name='Homestay A', address='Addr')
+        self.room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        self.other_room = Room.objects.create(homestay=self.homestay, room_number='2', capacity=2)
+
+    def test_one_winner_per_room_and_date(self):
+        day = date(2025, 7, 1)
+        wins, conflicts, errors = race(lambda i: reserve_room(self.room, day, guest_name=f'Guest {i}', num_people=1))
+        self.assertEqual(errors, [])
+        self.assertEqual((len(wins), len(conflicts)), (1, PARALLEL - 1))
+        self.assertEqual(Booking.objects.filter(room=self.room, date=day, status='reserved').count(), 1)
+
+    def test_other_rooms_are_not_blocked(self):
+        day = date(2025, 7, 1)
+        wins, conflicts, errors = race(
+            lambda i: reserve_room(self.room if i % 2 else self.other_room, day, num_people=1))
+        self.assertEqual(errors, [])
+        self.assertEqual(len(wins), 2)
+
+    def test_one_overlapping_registration_wins(self):
+        immediate = connection.settings_dict['OPTIONS'].get('transaction_mode') == 'IMMEDIATE'
+        if not (connection.features.has_select_for_update or immediate):
+            # SQLite has no row locks; IMMEDIATE transactions (settings.py) serialise the writers instead
+            self.skipTest('registrations are serialised with SELECT ... FOR UPDATE')
+        wins, conflicts, errors = race(
+            lambda i: register_stay(self.homestay, date(2025, 8, 1 + i % 3), date(2025, 8, 5), num_people=1))
+        self.assertEqual(errors, [])
+        self.assertEqual(len(wins), 1)
+
+
+class ReservationApiTests(TestCase):
+    def setUp(self):
+        owner = CustomUser.objects.create_user(username='owner1', password='pass')
+        self.homestay = Homestay.objects.create(owner=owner, name='Homestay A', address='Addr')
+        self.room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        self.client.login(username='owner1', password='pass')
+
+    def _reserve(self, **data):
+        body = dict({'room_id': self.room.id, 'date': '2025-07-01', 'guest_name': 'Ana', 'num_people': 2}, **data)
+        return self.client.post(reverse('reserve_room_api'), json.dumps(body), content_type='application/json')
+
+    def test_second_reservation_is_a_conflict(self):
+        self.assertEqual(self._reserve().status_code, 200)
+        resp = self._reserve(guest_name='Ben')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()['error'], 'Room already reserved for this date.')
+        self.assertEqual(self._reserve(date='2025-07-02').status_code, 200)
+        self.assertEqual(self._reserve(date='July 3').status_code, 400)
+
+    def test_overlapping_registration_is_a_conflict(self):
+        body = {'name': 'Ana', 'homestayName': 'Homestay A', 'contactNumber': '09171234567', 'region': 'R',
+                'province': 'P', 'city': 'C', 'barangay': 'B', 'dateArrival': '2025-08-01',
+                'dateDeparture': '2025-08-03', 'numTourist': 2}
+        url = reverse('api_register_tourist')
+        self.assertEqual(self.client.post(url, json.dumps(body), content_type='application/json').status_code, 200)
+        body.update(dateArrival='2025-08-03', dateDeparture='2025-08-04')
+        self.assertEqual(self.client.post(url, json.dumps(body), content_type='application/json').status_code, 409)
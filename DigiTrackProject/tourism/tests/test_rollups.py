@@ -0,0 +1,46 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Booking, DailyArrival
+from ..rollups import rebuild_daily_arrivals
+from datetime import date
+
+
+class DailyArrivalRollupTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.user, name='Test Homestay', address='Addr')
+
+    def _rows(self):
+        return list(DailyArrival.objects.order_by('source', 'date').values_list('source', 'date', 'arrivals', 'bookings'))
+
+    def test_rollup_follows_booking_writes(self):
+        b = Booking.objects.create(homestay=self.homestay, date=date(2025, 2, 1), num_people=3, source='registration')
+        Booking.objects.create(homestay=self.homestay, date=date(2025, 2, 1), num_people='2', source='registration')
+        self.assertEqual(self._rows(), [('registration', date(2025, 2, 1), 5, 2)])
+        b.num_people = 4
+        b.save()
+        self.assertEqual(self._rows(), [('registration', date(2025, 2, 1), 6, 2)])
+        b.date = date(2025, 3, 1)
+        b.save()
+        self.assertEqual(self._rows(), [('registration', date(2025, 2, 1), 2, 1), ('registration', date(2025, 3, 1), 4, 1)])
+        b.delete()
+        self.assertEqual(self._rows(), [('registration', date(2025, 2, 1), 2, 1), ('registration', date(2025, 3, 1), 0, 0)])
+
+    def test_rebuild_matches_incremental_rollup(self):
+        Booking.objects.create(homestay=self.homestay, date=date(2025, 2, 1), num_people=3, source='registration')
+        Booking.objects.create(homestay=self.homestay, date=date(2025, 2, 9), num_people=None, source='calendar')
+        incremental = self._rows()
+        DailyArrival.objects.all().delete()
+        self.assertEqual(rebuild_daily_arrivals(), 2)
+        self.assertEqual(self._rows(), incremental)
+
+    def test_chart_apis_read_rollup(self):
+        Booking.objects.create(homestay=self.homestay, date=date(2025, 2, 1), num_people=3, source='registration')
+        Booking.objects.create(homestay=self.homestay, date=date(2025, 2, 5), num_people=2, source='calendar')
+        data = self.client.get(reverse('api_tourist_chart_data'), {'year': 2025}).json()
+        self.assertEqual(data['monthly']['Feb'], 3)
+        self.assertEqual(data['yearly']['2025'], 3)
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('api_my_tourist_chart_data'), {'year': 2025}).json()
+        self.assertEqual(data['monthly']['Feb'], 5)
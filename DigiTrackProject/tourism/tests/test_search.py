@@ -1,6 +1,11 @@
-from django.test import TestCase, Client
+from unittest import mock
+from django.test import TestCase, Client, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from ..models import CustomUser, Homestay, Booking
+from ..normalize import fold_text, digits_only
+from .. import search
 from datetime import date
 
 
@@ -18,7 +23,7 @@ class SearchApiTests(TestCase):
         url = reverse('api_tourist_search')
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        data = resp.json()
+        data = resp.json()['results']
         # should return at least the two bookings
         self.assertTrue(isinstance(data, list))
         self.assertGreaterEqual(len(data), 2)
@@ -27,7 +32,7 @@ class SearchApiTests(TestCase):
         url = reverse('api_tourist_search') + '?q=alice'
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        data = resp.json()
+        data = resp.json()['results']
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['guest_name'], 'Alice')
 
@@ -39,3 +44,86 @@ class SearchApiTests(TestCase):
         self.assertTrue(data.get('success'))
         users = data.get('users')
         self.assertTrue(any(u['homestayName'] == 'Test Homestay' for u in users))
+
+
+class TouristSearchTests(TestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(username='mto', password='pass', is_staff=True)
+        owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=owner, name='Casa Peña', address='Addr')
+        other = CustomUser.objects.create_user(username='owner2', password='pass', name='Owner Two')
+        self.other = Homestay.objects.create(owner=other, name='Blue Lagoon', address='Addr')
+        for name, contact, homestay in [('José Rizal', '0917-123-4567', self.homestay),
+                                        ('Maria Josefa', '0918 555 0000', self.other),
+                                        ('Anjo Santos', '+63 917 999 1111', self.other),
+                                        ('Jose', '0920 000 1234', self.other)]:
+            Booking.objects.create(homestay=homestay, date=date(2025, 7, 1), guest_name=name, contact_number=contact,
+                                   num_people=2, source='registration')
+        self.client.login(username='mto', password='pass')
+        self.url = reverse('api_tourist_search')
+
+    def _names(self, **params):
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, 200)
+        return [r['guest_name'] for r in resp.json()['results']]
+
+    def test_normalisation(self):
+        self.assertEqual(fold_text(' Peña,  JOSÉ '), 'pena jose')
+        self.assertEqual(digits_only('+63 917-123'), '63917123')
+        booking = Booking.objects.get(guest_name='José Rizal')
+        self.assertEqual((booking.search_name, booking.search_contact), ('jose rizal', '09171234567'))
+        self.assertEqual(self.homestay.search_name, 'casa pena')
+
+    def test_ranked_accent_insensitive_matches(self):
+        # Exact name, then word prefix, then substring
+        names = self._names(q='JOSE')
+        self.assertEqual(names[0], 'Jose')
+        self.assertEqual(sorted(names[1:]), ['José Rizal', 'Maria Josefa'])
+        self.assertEqual(self._names(q='pena'), ['José Rizal'])
+        self.assertEqual(self._names(q='0917 123'), ['José Rizal'])
+        self.assertEqual(sorted(self._names(q='917')), ['Anjo Santos', 'José Rizal'])
+
+    def test_short_queries_fall_back_to_like(self):
+        self.assertEqual(sorted(self._names(q='jo')), ['Anjo Santos', 'Jose', 'José Rizal', 'Maria Josefa'])
+
+    def test_index_follows_updates_and_deletes(self):
+        booking = Booking.objects.get(guest_name='Jose')
+        booking.guest_name = 'Emilio'
+        booking.save(update_fields=['guest_name'])
+        self.assertEqual(self._names(q='emilio'), ['Emilio'])
+        booking.delete()
+        self.assertEqual(self._names(q='emilio'), [])
+
+    def test_pagination_and_owner_scope(self):
+        data = self.client.get(self.url, {'q': 'jos', 'limit': 2}).json()
+        self.assertEqual((len(data['results']), data['has_more']), (2, True))
+        data = self.client.get(self.url, {'q': 'jos', 'limit': 2, 'offset': 2}).json()
+        self.assertEqual((len(data['results']), data['has_more']), (1, False))
+        self.client.login(username='owner1', password='pass')
+        self.assertEqual(self._names(q='jos'), ['José Rizal'])
+
+    def test_sqlite_uses_fts_table(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite FTS5 path')
+        with CaptureQueriesContext(connection) as ctx:
+            self._names(q='rizal')
+        self.assertTrue(any(f'{search.FTS_TABLE} MATCH' in q['sql'] for q in ctx.captured_queries))
+
+    def test_latency_budget_aborts_slow_queries(self):
+        slow = {
+            'sqlite': 'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 1000000) SELECT count(*) FROM c',
+            'postgresql': 'SELECT pg_sleep(1)',
+        }.get(connection.vendor)
+        if slow is None:
+            self.skipTest('No budget enforcement on this database')
+        with self.assertRaises(search.SearchTimeout):
+            with search.query_budget(50):
+                with connection.cursor() as cursor:
+                    cursor.execute(slow)
+
+    @override_settings(TOURIST_SEARCH_BUDGET_MS=50)
+    def test_timeout_maps_to_503(self):
+        with mock.patch('DigiTrackProject.tourism.views.search_tourists', side_effect=search.SearchTimeout('Too slow.')):
+            resp = self.client.get(self.url, {'q': 'jose'})
+        self.assertEqual(resp.status_code, 503)
+        self.assertFalse(resp.json()['success'])
@@ -0,0 +1,80 @@
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+
+from ..home_cache import HOME_CONTEXT_VERSION_KEY
+from ..models import Booking, CustomUser, DailyArrival, Homestay
+from ..normalize import digits_only, fold_text
+from ..rollups import rebuild_daily_arrivals
+from ..search import matching_bookings
+from ..seeding import CURVES, parse_curve, seed_load
+
+TODAY = date(2025, 6, 30)
+
+
+class SeedLoadTests(TestCase):
+    def _rollup(self):
+        return sorted(DailyArrival.objects.values_list('homestay_id', 'source', 'date', 'arrivals', 'bookings'))
+
+    def _bookings(self, prefix):
+        return list(Booking.objects.filter(homestay__owner__username__startswith=prefix)
+                    .order_by('homestay__owner__username', 'date', 'room__room_number')
+                    .values_list('homestay__name', 'room__room_number', 'date', 'check_out', 'source',
+                                 'num_people', 'guest_name', 'contact_number'))
+
+    def test_seeds_what_save_and_signals_would_keep(self):
+        cache.set(HOME_CONTEXT_VERSION_KEY, 1, None)
+        counts = seed_load(homestays=3, rooms=2, years=1, seed=7, today=TODAY)
+        self.assertEqual((counts['homestays'], counts['rooms']), (3, 6))
+        self.assertEqual(Booking.objects.count(), counts['bookings'])
+        self.assertGreater(counts['bookings'], 3 * 365 * 0.3)
+        self.assertTrue(CustomUser.objects.get(username='seed0').check_password('seedpass'))
+        self.assertEqual(cache.get(HOME_CONTEXT_VERSION_KEY), 2)
+        for booking in Booking.objects.all()[:50]:
+            self.assertEqual(booking.search_name, fold_text(booking.guest_name))
+            self.assertEqual(booking.search_contact, digits_only(booking.contact_number))
+            self.assertEqual(booking.created_at.date(), booking.date)
+        rollup = self._rollup()
+        rebuild_daily_arrivals()
+        self.assertEqual(rollup, self._rollup())
+        # Indexed for the tourist search
+        self.assertEqual(matching_bookings('Peña', Booking.objects.all()).count(),
+                         Booking.objects.filter(search_name__contains='pena').count())
+
+    def test_bookings_do_not_conflict(self):
+        seed_load(homestays=2, rooms=3, years=1, seed=1, today=TODAY)
+        # Registered groups take the whole homestay; a room is reserved at most once a day
+        for stay in Booking.objects.filter(source='registration'):
+            self.assertFalse(Booking.objects.filter(homestay_id=stay.homestay_id, date__lte=stay.check_out,
+                                                    check_out__gte=stay.date).exclude(pk=stay.pk).exists())
+        self.assertFalse(Booking.objects.filter(source='calendar').values('room', 'date')
+                         .annotate(n=Count('id')).filter(n__gt=1).exists())
+
+    def test_same_seed_same_data(self):
+        seed_load(homestays=2, rooms=2, years=1, seed=3, prefix='a', today=TODAY)
+        seed_load(homestays=2, rooms=2, years=1, seed=3, prefix='b', today=TODAY)
+        self.assertEqual(self._bookings('a'), self._bookings('b'))
+        seed_load(homestays=2, rooms=2, years=1, seed=4, prefix='c', today=TODAY)
+        self.assertNotEqual(self._bookings('a'), self._bookings('c'))
+
+    def test_command_replaces_only_with_replace(self):
+        other = CustomUser.objects.create_user(username='seedling', password='pass', name='Not seeded')
+        Homestay.objects.create(owner=other, name='Kept', address='Addr')
+        call_command('seed_load', '--homestays=2', '--rooms=1', '--years=0', '--days-ahead=5', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, '--replace'):
+            call_command('seed_load', '--homestays=1', stdout=StringIO())
+        call_command('seed_load', '--homestays=1', '--rooms=1', '--years=0', '--days-ahead=5', '--replace',
+                     stdout=StringIO())
+        self.assertEqual(sorted(Homestay.objects.values_list('owner__username', flat=True)), ['seed0', 'seedling'])
+
+    def test_curves(self):
+        self.assertEqual(parse_curve('flat'), CURVES['flat'])
+        self.assertEqual(parse_curve(','.join(['0.1'] * 12)), (0.1,) * 12)
+        for bad in ('0.5,0.5', ','.join(['2'] * 12), 'winter'):
+            with self.assertRaises(ValueError):
+                parse_curve(bad)
@@ -0,0 +1,70 @@
+from django.test import TestCase, Client
+from django.apps import apps
+from django.urls import reverse
+from django.db.models import F
+from ..models import CustomUser, Homestay, Room, Booking
+from ..availability import build_availability
+from datetime import date, timedelta
+from importlib import import_module
+import json
+
+
+class StayBookingTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.user, name='Test Homestay', address='Addr')
+
+    def _register(self, arrival, departure):
+        payload = {
+            'name': 'Guest', 'homestayName': self.homestay.name, 'contactNumber': '09171234567',
+            'region': 'NCR', 'province': 'Metro', 'city': 'City', 'barangay': 'Barangay',
+            'dateArrival': arrival, 'dateDeparture': departure, 'numTourist': 2,
+        }
+        return self.client.post(reverse('api_register_tourist'), data=json.dumps(payload), content_type='application/json')
+
+    def test_registration_stores_one_row_per_stay(self):
+        resp = self._register('2025-05-01', '2025-05-04')
+        self.assertEqual(resp.status_code, 200)
+        booking = Booking.objects.get()
+        self.assertEqual((booking.date, booking.check_out, booking.nights), (date(2025, 5, 1), date(2025, 5, 4), 4))
+
+    def test_overlapping_registration_is_rejected(self):
+        self._register('2025-05-01', '2025-05-04')
+        self.assertEqual(self._register('2025-05-04', '2025-05-06').status_code, 409)
+        self.assertEqual(self._register('2025-05-05', '2025-05-06').status_code, 200)
+        self.assertEqual(self._register('2025-05-10', '2025-05-08').status_code, 400)
+
+    def test_availability_expands_room_stays(self):
+        room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        Booking.objects.create(homestay=self.homestay, room=room, date=date(2025, 5, 2), check_out=date(2025, 5, 3),
+                               status='reserved', source='calendar')
+        grid = build_availability([self.homestay.id], date(2025, 5, 1), date(2025, 5, 4))[self.homestay.id]
+        self.assertEqual([grid[f'2025-05-0{d}'][0]['status'] for d in range(1, 5)],
+                         ['available', 'reserved', 'reserved', 'available'])
+
+    def test_migration_folds_per_day_rows(self):
+        fold_stays = import_module('DigiTrackProject.tourism.migrations.0019_fold_booking_stays').fold_stays
+        for day in (1, 2, 3, 7):
+            Booking.objects.create(homestay=self.homestay, date=date(2025, 6, day), guest_name='Ana', num_people=2,
+                                   status='reserved', source='registration')
+        Booking.objects.create(homestay=self.homestay, date=date(2025, 6, 2), guest_name='Ben', num_people=1,
+                               status='reserved', source='registration')
+        fold_stays(apps, None)
+        stays = list(Booking.objects.order_by('guest_name', 'date').values_list('guest_name', 'date', 'check_out'))
+        self.assertEqual(stays, [
+            ('Ana', date(2025, 6, 1), date(2025, 6, 3)),
+            ('Ana', date(2025, 6, 7), date(2025, 6, 7)),
+            ('Ben', date(2025, 6, 2), date(2025, 6, 2)),
+        ])
+
+    def test_migration_keeps_back_to_back_registrations_apart(self):
+        fold_stays = import_module('DigiTrackProject.tourism.migrations.0019_fold_booking_stays').fold_stays
+        # The same guest registered for 1-2 June, then again an hour later for 3-4 June
+        for day in (1, 2, 3, 4):
+            Booking.objects.create(homestay=self.homestay, date=date(2025, 6, day), guest_name='Ana', num_people=2,
+                                   status='reserved', source='registration')
+        Booking.objects.filter(date__gte=date(2025, 6, 3)).update(created_at=F('created_at') + timedelta(hours=1))
+        fold_stays(apps, None)
+        stays = list(Booking.objects.order_by('date').values_list('date', 'check_out'))
+        self.assertEqual(stays, [(date(2025, 6, 1), date(2025, 6, 2)), (date(2025, 6, 3), date(2025, 6, 4))])
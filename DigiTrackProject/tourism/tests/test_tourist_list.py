@@ -0,0 +1,113 @@
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import CustomUser, Homestay, Booking
+from datetime import date, timedelta
+
+
+class TouristListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = CustomUser.objects.create_user(username='mto', password='pass', is_staff=True)
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Homestay A', address='Addr')
+        other = CustomUser.objects.create_user(username='owner2', password='pass', name='Owner Two')
+        self.other = Homestay.objects.create(owner=other, name='Homestay B', address='Addr')
+        start = date(2025, 6, 1)
+        for i in range(7):
+            Booking.objects.create(homestay=self.homestay if i % 2 == 0 else self.other, date=start + timedelta(days=i),
+                                   guest_name=f'Guest {i}', num_people=2, source='registration')
+        # Calendar reservations are not tourists
+        Booking.objects.create(homestay=self.homestay, date=start, guest_name='Cal', num_people=1, source='calendar')
+        self.url = reverse('api-tourist-list')
+
+    def _all_pages(self, **params):
+        names, cursor = [], None
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            data = self.client.get(self.url, query).json()
+            names += [r['guest_name'] for r in data['results']]
+            cursor = data['next_cursor']
+            if not cursor:
+                return names, data
+
+    def test_requires_login_and_scopes_owners(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.login(username='owner1', password='pass')
+        names, data = self._all_pages(homestay_id=self.other.id)
+        self.assertEqual(names, ['Guest 6', 'Guest 4', 'Guest 2', 'Guest 0'])
+        self.assertEqual(data['total_guests'], 8)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        self.client.login(username='mto', password='pass')
+        names, data = self._all_pages(limit=3)
+        self.assertEqual(names, [f'Guest {i}' for i in range(6, -1, -1)])
+        self.assertEqual(data['total'], 7)
+        self.assertEqual(data['total_guests'], 14)
+
+    def test_page_size_is_capped_and_filters_apply(self):
+        self.client.login(username='mto', password='pass')
+        with override_settings(TOURIST_LIST_MAX_PAGE_SIZE=2):
+            data = self.client.get(self.url, {'limit': 1000}).json()
+        self.assertEqual((data['limit'], len(data['results'])), (2, 2))
+        names, data = self._all_pages(start='2025-06-02', end='2025-06-04', homestay_id=self.other.id)
+        self.assertEqual(names, ['Guest 3', 'Guest 1'])
+        self.assertEqual(data['total'], 2)
+        for params in ({'cursor': 'bm9wZQ'}, {'start': '2025-13-01'}, {'start': '2025-06-05', 'end': '2025-06-01'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_totals_are_cached_between_pages(self):
+        self.client.login(username='mto', password='pass')
+        first = self.client.get(self.url, {'limit': 2}).json()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, {'limit': 2, 'cursor': first['next_cursor']})
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+
+class GuestGroupTests(TestCase):
+    def setUp(self):
+        self.staff = CustomUser.objects.create_user(username='mto', password='pass', is_staff=True)
+        owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=owner, name='Homestay A', address='Addr')
+        suspended = CustomUser.objects.create_user(username='owner2', password='pass', is_active=False)
+        hidden = Homestay.objects.create(owner=suspended, name='Homestay Z', address='Addr')
+        for day, people, status in [(1, 2, 'available'), (10, 3, 'reserved')]:
+            Booking.objects.create(homestay=self.homestay, date=date(2025, 9, day), check_out=date(2025, 9, day + 2),
+                                   guest_name='Ana Cruz', num_people=people, status=status, source='registration')
+        for i in range(4):
+            Booking.objects.create(homestay=self.homestay, date=date(2025, 10, 1 + i), guest_name=f'Guest {i}',
+                                   num_people=1, source='registration')
+        Booking.objects.create(homestay=hidden, date=date(2025, 9, 1), guest_name='Hidden', num_people=1,
+                               source='registration')
+        self.client.login(username='mto', password='pass')
+        self.url = reverse('api_tourist_groups')
+
+    def test_groups_are_aggregated_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(self.url, {'q': 'ana'}).json()
+        self.assertEqual(data['results'], [{
+            'homestay_id': self.homestay.id, 'homestay': 'Homestay A', 'guest_name': 'Ana Cruz',
+            'check_in': '2025-09-01', 'check_out': '2025-09-12', 'num_people': 3, 'status': 'reserved', 'stays': 2,
+        }])
+        # count + page
+        self.assertEqual(sum('tourism_booking' in q['sql'] for q in ctx.captured_queries), 2)
+
+    def test_paging_sorting_and_filters(self):
+        data = self.client.get(self.url, {'limit': 2}).json()
+        self.assertEqual(data['total'], 5)
+        self.assertEqual([r['guest_name'] for r in data['results']], ['Guest 3', 'Guest 2'])
+        data = self.client.get(self.url, {'sort': 'guest', 'limit': 1, 'offset': 1}).json()
+        self.assertEqual(data['results'][0]['guest_name'], 'Guest 0')
+        data = self.client.get(self.url, {'start': '2025-10-02', 'end': '2025-10-03'}).json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(self.client.get(self.url, {'sort': 'contact'}).status_code, 400)
+
+    def test_staff_only_and_dashboard_reads_no_bookings(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('mto-admin'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(any('tourism_booking' in q['sql'] for q in ctx.captured_queries))
+        self.client.login(username='owner1', password='pass')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -0,0 +1,107 @@
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Booking, CustomUser, Homestay, HomestayFeature, Room
+from ..versions import HOMESTAY_VERSION_KEY
+
+DATA_TABLES = ('tourism_booking', 'tourism_room', 'tourism_homestayfeature', 'tourism_dailyarrival')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner1', password='pass', name='Owner One')
+        self.homestay = Homestay.objects.create(owner=self.owner, name='Sunrise Homestay', address='Addr')
+        self.room = Room.objects.create(homestay=self.homestay, room_number='1', capacity=2)
+        Booking.objects.create(homestay=self.homestay, date=date(2025, 6, 1), check_out=date(2025, 6, 2),
+                               num_people=2, guest_name='Ana Cruz', source='registration')
+        other = CustomUser.objects.create_user(username='owner2', password='pass', name='Owner Two')
+        self.other = Homestay.objects.create(owner=other, name='Other Homestay', address='Addr')
+        self.client.login(username='owner1', password='pass')
+
+    def test_unchanged_data_is_not_modified_without_touching_data_tables(self):
+        for name in ('calendar_data_api', 'room_list_api', 'get_homestay_features_api', 'api_my_tourists',
+                     'api_my_tourist_chart_data', 'api_tourist_chart_data'):
+            with self.subTest(name):
+                first = self.client.get(reverse(name))
+                self.assertEqual(first.status_code, 200)
+                self.assertIn('no-cache', first['Cache-Control'])
+                with CaptureQueriesContext(connection) as queries:
+                    again = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again['ETag'], first['ETag'])
+                self.assertEqual([q['sql'] for q in queries if any(t in q['sql'] for t in DATA_TABLES)], [])
+
+    def test_writes_change_the_etag_after_commit(self):
+        etag = self.client.get(reverse('room_list_api'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Room.objects.create(homestay=self.homestay, room_number='2', capacity=4)
+        resp = self.client.get(reverse('room_list_api'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['rooms']), 2)
+        etag = resp['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            HomestayFeature.objects.create(homestay=self.homestay, name='Parking', type='boolean', value='yes')
+        self.assertEqual(self.client.get(reverse('room_list_api'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_other_homestays_only_change_the_global_stamp(self):
+        mine = self.client.get(reverse('api_my_tourists'))['ETag']
+        everyone = self.client.get(reverse('api_tourist_chart_data'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(homestay=self.other, date=date(2025, 7, 1), check_out=date(2025, 7, 1),
+                                   num_people=3, source='registration')
+        self.assertEqual(self.client.get(reverse('api_my_tourists'), HTTP_IF_NONE_MATCH=mine).status_code, 304)
+        self.assertEqual(self.client.get(reverse('api_tourist_chart_data'), HTTP_IF_NONE_MATCH=everyone).status_code,
+                         200)
+
+    def test_rolled_back_write_keeps_the_stamp(self):
+        etag = self.client.get(reverse('room_list_api'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Room.objects.create(homestay=self.homestay, room_number='3', capacity=1)
+                raise RuntimeError
+        self.assertEqual(self.client.get(reverse('room_list_api'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_follows_query_string(self):
+        etag = self.client.get(reverse('api_tourist_chart_data'), {'year': 2025})['ETag']
+        resp = self.client.get(reverse('api_tourist_chart_data'), {'year': 2024}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['year'], 2024)
+
+    def test_calendar_polls_revalidate_across_watermarks(self):
+        url = reverse('calendar_data_api')
+        first = self.client.get(url)
+        poll = self.client.get(url, {'since': first.json()['watermark']}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(poll.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Booking.objects.create(homestay=self.homestay, room=self.room, date=date(2025, 6, 5),
+                                             check_out=date(2025, 6, 5), status='reserved', num_people=1,
+                                             source='calendar')
+        poll = self.client.get(url, {'since': first.json()['watermark']}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(poll.status_code, 200)
+        self.assertIn(booking.id, [b['id'] for b in poll.json()['bookings']])
+        # Other parameters still change the tag
+        self.assertEqual(self.client.get(url, {'format': 'columns'}, HTTP_IF_NONE_MATCH=poll['ETag']).status_code, 200)
+
+    def test_last_modified(self):
+        # Not sent while the stamp's second is still running
+        self.assertFalse(self.client.get(reverse('room_list_api')).has_header('Last-Modified'))
+        cache.set(HOMESTAY_VERSION_KEY.format(homestay_id=self.homestay.id), (time.time() - 60, 'older'), None)
+        resp = self.client.get(reverse('room_list_api'))
+        self.assertTrue(resp.has_header('Last-Modified'))
+        again = self.client.get(reverse('room_list_api'), HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_no_homestay_and_anonymous_are_answered_by_the_view(self):
+        CustomUser.objects.create_user(username='nohome', password='pass')
+        self.client.login(username='nohome', password='pass')
+        self.assertEqual(self.client.get(reverse('room_list_api')).status_code, 404)
+        self.client.logout()
+        resp = self.client.get(reverse('get_homestay_features_api'))
+        self.assertEqual(resp.status_code, 403)
+        self.assertFalse(resp.has_header('ETag'))
@@ -0,0 +1,150 @@
+"""
+Registered-tourist list behind /api/tourist-list/.
+
+Pages are keyset-paginated newest first on (created_at, id), served by the
+partial booking_reg_created_idx index, so every page costs the same however
+deep the client scrolls. The filtered total count and guest sum are cached
+for TOURIST_LIST_COUNT_TIMEOUT seconds: they are dashboard figures, not part
+of paging, and need not be exact to the second.
+
+guest_groups_page() serves the MTO tourist management grouping: one row per
+guest and homestay with the first check-in and last check-out, aggregated by a
+single GROUP BY query and paged with limit/offset.
+"""
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Sum
+
+from .models import Booking, DailyArrival
+from .normalize import fold_text
+from .pagination import PageError, decode_cursor, encode_cursor, keyset_after, parse_format, parse_page, to_columns
+
+DEFAULT_PAGE_SIZE = 50
+GROUP_SORTS = {'check_in': 'check_in', 'guest': 'guest_name', 'homestay': 'homestay__name'}
+FIELDS = ('id', 'guest_name', 'contact_number', 'homestay__name', 'date', 'check_out', 'num_people', 'status')
+KEY_FIELDS = ('created_at', 'id')
+
+
+def parse_filters(params):
+    """``{'homestay_id', 'start', 'end'}`` from ?homestay_id=&start=&end= (check-in dates, inclusive)."""
+    filters = {'homestay_id': None, 'start': None, 'end': None}
+    try:
+        if params.get('homestay_id'):
+            filters['homestay_id'] = int(params['homestay_id'])
+    except ValueError:
+        raise PageError('Invalid homestay ID.')
+    try:
+        for name in ('start', 'end'):
+            if params.get(name):
+                filters[name] = datetime.strptime(params[name], '%Y-%m-%d').date()
+    except ValueError:
+        raise PageError('Invalid date.')
+    if filters['start'] and filters['end'] and filters['end'] < filters['start']:
+        raise PageError('end must not be before start.')
+    return filters
+
+
+def apply_filters(queryset, filters):
+    """Narrow a Booking or DailyArrival queryset by parse_filters() output."""
+    if filters['homestay_id'] is not None:
+        queryset = queryset.filter(homestay_id=filters['homestay_id'])
+    if filters['start']:
+        queryset = queryset.filter(date__gte=filters['start'])
+    if filters['end']:
+        queryset = queryset.filter(date__lte=filters['end'])
+    return queryset
+
+
+def tourist_totals(filters):
+    """``(total, total_guests)`` for the filters, cached per filter combination."""
+    digest = hashlib.md5(repr(sorted(filters.items())).encode()).hexdigest()
+    key = f'tourist_list:totals:{digest}'
+    totals = cache.get(key)
+    if totals is None:
+        total = apply_filters(Booking.objects.filter(num_people__gt=0, source='registration'), filters).count()
+        # Guest sum from the daily rollup, which only counts positive num_people like the list
+        guests = apply_filters(DailyArrival.objects.filter(source='registration'), filters) \
+            .aggregate(total=Sum('arrivals'))['total'] or 0
+        totals = (total, guests)
+        cache.set(key, totals, settings.TOURIST_LIST_COUNT_TIMEOUT)
+    return totals
+
+
+def tourist_page(params, homestay_id=None):
+    """
+    The JSON body for one page of registered tourists. ``homestay_id`` forces the
+    homestay filter (owners only ever see their own homestay).
+    """
+    limit, _ = parse_page(params, DEFAULT_PAGE_SIZE, settings.TOURIST_LIST_MAX_PAGE_SIZE)
+    columns = parse_format(params)
+    filters = parse_filters(params)
+    if homestay_id is not None:
+        filters['homestay_id'] = homestay_id
+    bookings = apply_filters(Booking.objects.filter(num_people__gt=0, source='registration'), filters)
+    if params.get('cursor'):
+        values = decode_cursor(params['cursor'])
+        try:
+            created_at, pk = datetime.fromisoformat(values[0]), int(values[1])
+        except (IndexError, TypeError, ValueError):
+            raise PageError('Invalid cursor.')
+        bookings = bookings.filter(keyset_after(KEY_FIELDS, (created_at, pk)))
+    rows = list(bookings.order_by('-created_at', '-id').values('created_at', *FIELDS)[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]['created_at'].isoformat(), rows[-1]['id']])
+    results = []
+    for row in rows:
+        del row['created_at']
+        row['date'] = row['date'].isoformat() if row['date'] else ''
+        row['check_out'] = row['check_out'].isoformat() if row['check_out'] else ''
+        results.append(row)
+    total, total_guests = tourist_totals(filters)
+    return {'results': to_columns(results, FIELDS) if columns else results, 'next_cursor': next_cursor,
+            'limit': limit, 'total': total, 'total_guests': total_guests}
+
+
+def guest_groups_page(params):
+    """
+    One page of registered guests grouped per homestay, for ?q=&homestay_id=&start=&end=
+    &sort=check_in|guest|homestay (- for descending, default -check_in)&limit=&offset=.
+    Each row has the first check-in, last check-out, largest party size, number of
+    stays and 'reserved' if any of the guest's stays is reserved.
+    """
+    limit, offset = parse_page(params, DEFAULT_PAGE_SIZE, settings.TOURIST_LIST_MAX_PAGE_SIZE)
+    filters = parse_filters(params)
+    sort = params.get('sort') or '-check_in'
+    if sort.lstrip('-') not in GROUP_SORTS:
+        raise PageError(f"sort must be one of: {', '.join(GROUP_SORTS)}.")
+    order = ('-' if sort.startswith('-') else '') + GROUP_SORTS[sort.lstrip('-')]
+
+    # Only homestays whose owner accounts are active (suspended accounts are hidden)
+    bookings = apply_filters(Booking.objects.filter(source='registration', homestay__owner__is_active=True), filters)
+    bookings = bookings.exclude(guest_name__isnull=True).exclude(guest_name='')
+    q = fold_text(params.get('q'))
+    if q:
+        bookings = bookings.filter(search_name__contains=q)
+    groups = (
+        bookings.values('homestay_id', 'homestay__name', 'guest_name')
+        .annotate(check_in=Min('date'), check_out=Max('check_out'), num_people=Max('num_people'),
+                  status=Max('status'), stays=Count('id'))
+        .order_by(order, 'homestay__name', 'guest_name')
+    )
+    total = groups.count()
+    results = []
+    for row in groups[offset:offset + limit]:
+        results.append({
+            'homestay_id': row['homestay_id'],
+            'homestay': row['homestay__name'],
+            'guest_name': row['guest_name'],
+            'check_in': row['check_in'].isoformat(),
+            'check_out': row['check_out'].isoformat(),
+            'num_people': row['num_people'],
+            'status': row['status'],
+            'stays': row['stays'],
+        })
+    return {'results': results, 'total': total, 'limit': limit, 'offset': offset}
@@ -11,9 +11,11 @@ urlpatterns = [
     path('api/tourist-chart-data/', views.api_tourist_chart_data, name='api_tourist_chart_data'),
     path('api/my-tourist-chart-data/', api_my_tourist_chart_data, name='api_my_tourist_chart_data'),
     path('api/tourist-list/', views.api_tourist_list, name='api-tourist-list'),
+    path('api/tourist-groups/', views.api_tourist_groups, name='api_tourist_groups'),
     path('api/tourist-search/', views.api_tourist_search, name='api_tourist_search'),
     path('api/my-tourists/', views.api_my_tourists, name='api_my_tourists'),
     path('', views.home_view, name='home'),
+    path('api/homestay-availability/', views.homestay_availability_api, name='homestay_availability_api'),
     path('login/', views.login_view, name='login'),
     path('api/export-tourists/', views.export_tourists_csv, name='export_tourists_csv'),
     path('api/export-tourists-all/', views.export_tourists_all_csv, name='export_tourists_all_csv'),
@@ -22,6 +24,9 @@ urlpatterns = [
     path('homestay/', views.homestay_view, name='homestay'),
     path('logout/', views.logout_view, name='logout'),
     path('api/booking/', views.booking_api, name='booking_api'),
+    path('api/calendar/bulk/', views.calendar_bulk_api, name='calendar_bulk_api'),
+    path('api/events/', views.event_stream, name='event_stream'),
+    path('metrics/', views.metrics_view, name='metrics'),
     path('api/room/', views.room_api, name='room_api'),
     path('api/rooms/', views.room_list_api, name='room_list_api'),
     path('api/add_homestay_user/', views.add_homestay_user_api, name='add_homestay_user_api'),
@@ -0,0 +1,139 @@
+"""
+Data version stamps behind the conditional GETs of the polled dashboard APIs.
+
+Each homestay has a stamp, and one more covers all data. Both are bumped
+(see signals.py) when a booking, room, feature or homestay is written, once
+the transaction commits, so no request can pair a new stamp with data read
+before the commit. Stamps live in the shared cache, so every worker sees
+the same one; a stamp that is missing (never written, or evicted) is
+replaced by a fresh one, which only costs clients a full response.
+
+@conditional('homestay') or @conditional('global') gives a view an ETag
+(the stamp, the homestay, today's date and the full path) and a
+Last-Modified (the time of the stamp), and answers If-None-Match and
+If-Modified-Since with 304 before the view runs. Responses are marked
+``private, no-cache`` so browsers revalidate on every poll instead of
+reusing them on a heuristic lifetime.
+
+Parameters listed in ``ignore`` are left out of the ETag. The calendar polls
+with a new ?since= watermark every time, so its URL never repeats; without
+``since`` in the tag, a client that sends back the ETag of its last response
+gets 304 whenever nothing has changed since then.
+"""
+import datetime
+import hashlib
+import secrets
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, urlencode
+
+from .owner import aget_request_homestay, get_request_homestay
+
+GLOBAL_VERSION_KEY = 'data_version:global'
+HOMESTAY_VERSION_KEY = 'data_version:homestay:{homestay_id}'
+
+
+def _new_stamp():
+    # (time of the change, token unique to this bump)
+    return time.time(), secrets.token_hex(8)
+
+
+def _key(homestay_id):
+    return GLOBAL_VERSION_KEY if homestay_id is None else HOMESTAY_VERSION_KEY.format(homestay_id=homestay_id)
+
+
+def bump_versions(homestay_id=None):
+    """Give ``homestay_id`` (if any) and all data a new stamp once the transaction commits."""
+    def write():
+        stamp = _new_stamp()
+        cache.set_many({_key(None): stamp, **({_key(homestay_id): stamp} if homestay_id is not None else {})},
+                       None)
+    transaction.on_commit(write)
+
+
+def current_version(homestay_id=None):
+    """The stamp of ``homestay_id``, or of all data when None."""
+    key = _key(homestay_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        stamp = _new_stamp()
+        if not cache.add(key, stamp, None):
+            # Another worker stored one first
+            stamp = cache.get(key, stamp)
+    return stamp
+
+
+async def acurrent_version(homestay_id=None):
+    key = _key(homestay_id)
+    stamp = await cache.aget(key)
+    if stamp is None:
+        stamp = _new_stamp()
+        if not await cache.aadd(key, stamp, None):
+            stamp = await cache.aget(key, stamp)
+    return stamp
+
+
+def _validators(request, stamp, homestay_id, ignore):
+    changed_at, token = stamp
+    params = [(k, v) for k, v in request.GET.lists() if k not in ignore]
+    tag = f'{token}:{homestay_id}:{datetime.date.today()}:{request.path}?{urlencode(params, doseq=True)}'
+    etag = '"%s"' % hashlib.md5(tag.encode(), usedforsecurity=False).hexdigest()
+    # HTTP dates have one-second resolution: while the stamp's second is still running,
+    # a later change in the same second would not move Last-Modified, so leave it out
+    last_modified = int(changed_at) if time.time() - changed_at >= 1 else None
+    return etag, last_modified
+
+
+def _finish(request, response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional(scope, ignore=()):
+    """
+    ETag/Last-Modified for a GET view from the stamp of request.user's homestay
+    (``scope='homestay'``) or of all data (``'global'``); 304 when the client's copy
+    is current. Query parameters in ``ignore`` do not change the ETag. With no
+    homestay the view runs as usual (and answers 403/404 itself).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                homestay_id = None
+                if scope == 'homestay':
+                    homestay = await aget_request_homestay(request)
+                    if homestay is None:
+                        return await view(request, *args, **kwargs)
+                    homestay_id = homestay.id
+                etag, last_modified = _validators(request, await acurrent_version(homestay_id), homestay_id, ignore)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(request, response, etag, last_modified)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            homestay_id = None
+            if scope == 'homestay':
+                homestay = get_request_homestay(request)
+                if homestay is None:
+                    return view(request, *args, **kwargs)
+                homestay_id = homestay.id
+            etag, last_modified = _validators(request, current_version(homestay_id), homestay_id, ignore)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _finish(request, response, etag, last_modified)
+        return wrapper
+    return decorator
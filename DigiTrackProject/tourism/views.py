@@ -1,6 +1,32 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.csrf import csrf_exempt
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_POST
+from .owner import aget_request_homestay, get_request_homestay, homestay_required
+from .reservations import ReservationConflict, lock_homestay, register_stay, reserve_room
+from .calendar_batch import BatchError, apply_batch, parse_batch
+from .calendar_sync import booking_changes, make_watermark
+from .events import event_frames
+from .pagination import COMPACT_JSON, PageError, parse_format, to_columns
+from .versions import conditional
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Keys of the calendar_data_api rows, in order (?format=columns)
+CALENDAR_ROOM_FIELDS = ('id', 'room_number', 'capacity', 'status', 'is_under_maintenance')
+CALENDAR_BOOKING_FIELDS = ('id', 'room_id', 'date', 'check_out', 'status', 'guest_name', 'num_people',
+                           'contact_number')
+
+
 # AJAX endpoint to delete a room
 @csrf_exempt
 @require_POST
@@ -76,36 +102,45 @@ def reserve_room_api(request):
         contact_number = data.get('contact_number')
         if not (room_id and date and guest_name and num_people):
             return JsonResponse({'success': False, 'error': 'Missing required fields.'}, status=400)
+        try:
+            date = parse_date(date)
+        except ValueError:
+            date = None
+        if date is None:
+            return JsonResponse({'success': False, 'error': 'Invalid date.'}, status=400)
         room = Room.objects.get(id=room_id)
-        homestay = room.homestay
-        # Check if already reserved
-        if Booking.objects.filter(room=room, date=date, status='reserved').exists():
-            return JsonResponse({'success': False, 'error': 'Room already reserved for this date.'}, status=409)
-        booking = Booking.objects.create(
-            homestay=homestay,
-            room=room,
-            date=date,
-            status='reserved',
-            guest_name=guest_name,
-            num_people=num_people,
-            contact_number=contact_number,
-            source='calendar'
-        )
+        # No check-then-insert: the database rejects a second reservation of the room/date
+        booking = reserve_room(room, date, guest_name=guest_name, num_people=num_people,
+                               contact_number=contact_number)
         return JsonResponse({'success': True, 'booking_id': booking.id})
+    except ReservationConflict as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
     except Room.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Room not found.'}, status=404)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 @login_required(login_url='/login/')
+@homestay_required
 @require_GET
-def calendar_data_api(request):
+# The client sends back the ETag of its last response with a new ?since= each poll
+@conditional('homestay', ignore=('since',))
+async def calendar_data_api(request):
     """
-    Returns JSON with all rooms and their bookings for the current homestay owner.
+    Returns JSON with all rooms and the bookings of the current homestay owner.
+    ?start=&end= limit the bookings to stays overlapping that window; ?since=<watermark
+    from the previous response> returns only bookings changed since then plus the ids
+    of deleted ones (see calendar_sync.py). ?format=columns sends rooms and bookings as
+    one array per field.
     """
     try:
-        homestay = Homestay.objects.get(owner=request.user)
-        rooms = Room.objects.filter(homestay=homestay)
-        bookings = Booking.objects.filter(homestay=homestay)
+        columns = parse_format(request.GET)
+        bookings, deleted, sequence, full = booking_changes(request.homestay, request.GET)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    try:
+        # Before the bookings: everything up to the watermark must be in this response
+        watermark = make_watermark(await sequence.afirst())
+        rooms = Room.objects.filter(homestay=request.homestay)
         # Build room list
         room_list = [
             {
@@ -115,35 +150,45 @@ def calendar_data_api(request):
                 'status': 'Under Maintenance' if room.is_under_maintenance else 'Not Under Maintenance',
                 'is_under_maintenance': room.is_under_maintenance
             }
-            for room in rooms
+            async for room in rooms
         ]
         # Build booking list
         booking_list = [
             {
                 'id': booking.id,
-                'room_id': booking.room.id if booking.room else None,
+                'room_id': booking.room_id,
                 'date': booking.date.strftime('%Y-%m-%d'),
+                'check_out': booking.check_out.strftime('%Y-%m-%d'),
                 'status': booking.status,
                 'guest_name': booking.guest_name,
                 'num_people': booking.num_people,
                 'contact_number': booking.contact_number
             }
-            for booking in bookings
+            async for booking in bookings.only('id', 'room_id', 'date', 'check_out', 'status', 'guest_name',
+                                               'num_people', 'contact_number')
         ]
-        return JsonResponse({'success': True, 'rooms': room_list, 'bookings': booking_list})
-    except Homestay.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
+        deleted = [booking_id async for booking_id in deleted]
+        if columns:
+            room_list = to_columns(room_list, CALENDAR_ROOM_FIELDS)
+            booking_list = to_columns(booking_list, CALENDAR_BOOKING_FIELDS)
+        return JsonResponse({'success': True, 'rooms': room_list, 'bookings': booking_list, 'deleted': deleted,
+                             'watermark': watermark, 'full': full}, json_dumps_params=COMPACT_JSON)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 # API endpoint to get bookings for calendar (GET)
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET
 @login_required(login_url='/login/')
+@homestay_required
 @require_GET
 def booking_list_api(request):
-    homestay = Homestay.objects.get(owner=request.user)
+    """Calendar bookings of the owner's homestay; takes ?room_id= and the calendar_data_api ?since=&start=&end=."""
+    try:
+        qs, deleted, sequence, full = booking_changes(request.homestay, request.GET)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    watermark = make_watermark(sequence.first())
     room_id = request.GET.get('room_id')
-    qs = Booking.objects.filter(homestay=homestay)
     if room_id:
         qs = qs.filter(room_id=room_id)
     bookings = [
@@ -153,12 +198,13 @@ def booking_list_api(request):
             'guest_name': b.guest_name or '',
             'num_people': b.num_people or 1,
             'start': b.date.strftime('%Y-%m-%d'),
-            'end': b.date.strftime('%Y-%m-%d'),
-            'room_id': b.room.id if b.room else None
+            'end': b.check_out.strftime('%Y-%m-%d'),
+            'room_id': b.room_id
         }
-        for b in qs
+        for b in qs.only('id', 'status', 'guest_name', 'num_people', 'date', 'check_out', 'room_id')
     ]
-    return JsonResponse({'success': True, 'bookings': bookings})
+    return JsonResponse({'success': True, 'bookings': bookings, 'deleted': list(deleted), 'watermark': watermark,
+                         'full': full})
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 @csrf_exempt
@@ -167,10 +213,7 @@ def update_homestay_feature_api(request):
     """
     Update a single dynamic homestay feature (name, type, value).
     """
-    import logging
-    logger = logging.getLogger('django')
     if not request.user.is_authenticated:
-        logger.warning(f"[DEBUG] Update Feature failed: not authenticated")
         return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
     try:
         data = json.loads(request.body.decode('utf-8'))
@@ -178,7 +221,7 @@ def update_homestay_feature_api(request):
         name = data.get('featureName')
         type_ = data.get('featureType')
         value = data.get('featureValue')
-        logger.info(f"[DEBUG] Update Feature: user={request.user}, id={feature_id}, name={name}, type={type_}, value={value}")
+        logger.debug('Update feature %s for %s: name=%r type=%r value=%r', feature_id, request.user, name, type_, value)
         feature = HomestayFeature.objects.get(id=feature_id, homestay__owner=request.user)
         if name:
             feature.name = name
@@ -187,13 +230,13 @@ def update_homestay_feature_api(request):
         if value is not None:
             feature.value = value
         feature.save()
-        logger.info(f"[DEBUG] Feature updated: id={feature.id}, value={feature.value}")
+        logger.info('Feature %s updated', feature.id, extra={'user_id': request.user.id})
         return JsonResponse({'success': True})
     except HomestayFeature.DoesNotExist:
-        logger.error(f"[DEBUG] Update Feature failed: Feature not found id={feature_id}")
+        logger.info('Update feature failed: feature %s not found', feature_id, extra={'user_id': request.user.id})
         return JsonResponse({'success': False, 'error': 'Feature not found.'}, status=404)
     except Exception as e:
-        logger.error(f"[DEBUG] Update Feature error: {e}")
+        logger.exception('Update feature failed')
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
@@ -218,21 +261,21 @@ def delete_homestay_feature_api(request):
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET, require_POST
-from django.db.models import Sum
+from django.db.models import Sum, Max
 from .models import CustomUser, Homestay, Room, Booking
-from .models import HomestayFeature
+from .models import HomestayFeature, DailyArrival
 
 # AJAX endpoint to get all features for the current homestay
 from django.views.decorators.http import require_GET
 @require_GET
+@conditional('homestay')
 def get_homestay_features_api(request):
-    import logging
-    logger = logging.getLogger('django')
     if not request.user.is_authenticated:
-        logger.warning(f"[DEBUG] Get Features failed: not authenticated")
         return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
+    homestay = get_request_homestay(request)
+    if homestay is None:
+        return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
     try:
-        homestay = Homestay.objects.get(owner=request.user)
         features = HomestayFeature.objects.filter(homestay=homestay)
         features_list = [
             {
@@ -242,13 +285,10 @@ def get_homestay_features_api(request):
                 'value': f.value
             } for f in features
         ]
-        logger.info(f"[DEBUG] Get Features: user={request.user}, count={len(features_list)}")
+        logger.debug('Homestay %s has %d features', homestay.id, len(features_list))
         return JsonResponse({'success': True, 'features': features_list})
-    except Homestay.DoesNotExist:
-        logger.error(f"[DEBUG] Get Features failed: Homestay not found for user {request.user}")
-        return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
     except Exception as e:
-        logger.error(f"[DEBUG] Get Features error: {e}")
+        logger.exception('Get features failed')
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 import json
 import calendar
@@ -259,23 +299,21 @@ from django.views.decorators.csrf import csrf_exempt
 @csrf_exempt
 @require_POST
 def add_homestay_feature_api(request):
-    import logging
-    logger = logging.getLogger('django')
     if not request.user.is_authenticated:
-        logger.warning(f"[DEBUG] Add Feature failed: not authenticated")
         return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
     try:
         data = json.loads(request.body.decode('utf-8'))
         name = data.get('featureName', '').strip()
         type_ = data.get('featureType', 'text')
         value = data.get('featureValue', '')
-        logger.info(f"[DEBUG] Add Feature: user={request.user}, name={name}, type={type_}, value={value}")
+        logger.debug('Add feature for %s: name=%r type=%r value=%r', request.user, name, type_, value)
         if not name or not type_:
-            logger.warning(f"[DEBUG] Add Feature failed: missing required fields")
             return JsonResponse({'success': False, 'error': 'Missing required fields.'}, status=400)
-        homestay = Homestay.objects.get(owner=request.user)
+        homestay = get_request_homestay(request)
+        if homestay is None:
+            return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
         feature = HomestayFeature.objects.create(homestay=homestay, name=name, type=type_, value=value)
-        logger.info(f"[DEBUG] Feature created: id={feature.id}")
+        logger.info('Feature %s created', feature.id, extra={'homestay_id': homestay.id})
         return JsonResponse({
             'success': True,
             'feature': {
@@ -285,43 +323,41 @@ def add_homestay_feature_api(request):
                 'value': feature.value
             }
         })
-    except Homestay.DoesNotExist:
-        logger.error(f"[DEBUG] Add Feature failed: Homestay not found for user {request.user}")
-        return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
     except Exception as e:
-        logger.error(f"[DEBUG] Add Feature error: {e}")
+        logger.exception('Add feature failed')
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 # API for dashboard chart data (monthly/yearly tourist counts) for the logged-in homestay
 @login_required(login_url='/login/')
 @require_GET
-def api_my_tourist_chart_data(request):
+@conditional('homestay')
+async def api_my_tourist_chart_data(request):
     import calendar
     import datetime
     now = datetime.date.today()
     year = int(request.GET.get('year', now.year))
     # Always start yearly chart at 2024
     min_year = 2024
+    homestay = await aget_request_homestay(request)
+    if homestay is None:
+        return JsonResponse({'monthly': {}, 'yearly': {}, 'year': year, 'year_range': year - min_year + 1})
     # Find the latest year with a booking for this homestay
-    latest_booking = Booking.objects.filter(homestay__owner=request.user).order_by('-date').first()
+    latest = await DailyArrival.objects.filter(homestay=homestay, bookings__gt=0).aaggregate(latest=Max('date'))
+    latest_date = latest['latest']
     max_year = year
-    if latest_booking:
-        max_year = max(year, latest_booking.date.year)
+    if latest_date:
+        max_year = max(year, latest_date.year)
     # For dropdowns, always show 2024 to max_year
     year_range = max_year - min_year + 1
-    try:
-        homestay = Homestay.objects.get(owner=request.user)
-    except Homestay.DoesNotExist:
-        return JsonResponse({'monthly': {}, 'yearly': {}, 'year': year, 'year_range': year_range})
-    # Monthly aggregation for selected year
-    monthly = Booking.objects.filter(homestay=homestay, date__year=year, num_people__gt=0)
-    monthly = monthly.values_list('date__month').annotate(total=Sum('num_people'))
-    monthly_dict = {calendar.month_abbr[m]: t for m, t in monthly}
+    # Monthly aggregation for selected year (served from the daily arrivals rollup)
+    monthly = DailyArrival.objects.filter(homestay=homestay, date__year=year, arrivals__gt=0)
+    monthly = monthly.values_list('date__month').annotate(total=Sum('arrivals'))
+    monthly_dict = {calendar.month_abbr[m]: t async for m, t in monthly}
     monthly_data = {calendar.month_abbr[m]: monthly_dict.get(calendar.month_abbr[m], 0) for m in range(1, 13)}
     # Yearly aggregation for all years from 2024 to max_year
-    yearly = Booking.objects.filter(homestay=homestay, date__year__gte=min_year, num_people__gt=0)
-    yearly = yearly.values_list('date__year').annotate(total=Sum('num_people'))
-    yearly_dict = {str(y): t for y, t in yearly}
+    yearly = DailyArrival.objects.filter(homestay=homestay, date__year__gte=min_year, arrivals__gt=0)
+    yearly = yearly.values_list('date__year').annotate(total=Sum('arrivals'))
+    yearly_dict = {str(y): t async for y, t in yearly}
     yearly_data = {str(y): yearly_dict.get(str(y), 0) for y in range(min_year, max_year + 1)}
     return JsonResponse({
         'monthly': monthly_data,
@@ -336,25 +372,26 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET
 @login_required(login_url='/login/')
 @require_GET
+@conditional('homestay')
 def api_my_tourists(request):
-    try:
-        homestay = Homestay.objects.get(owner=request.user)
-        # Only include bookings from registration form
-        bookings = Booking.objects.filter(homestay=homestay, source='registration').order_by('-date')
-        data = [
-            {
-                'guest_name': b.guest_name or '-',
-                'contact_number': b.contact_number or '-',
-                'homestay_name': homestay.name,
-                'date': b.date.strftime('%Y-%m-%d'),
-                'num_people': b.num_people or '-',
-                'status': b.status
-            }
-            for b in bookings
-        ]
-        return JsonResponse(data, safe=False)
-    except Homestay.DoesNotExist:
+    homestay = get_request_homestay(request)
+    if homestay is None:
         return JsonResponse([], safe=False)
+    # Only include bookings from registration form
+    bookings = Booking.objects.filter(homestay=homestay, source='registration').order_by('-date')
+    data = [
+        {
+            'guest_name': b.guest_name or '-',
+            'contact_number': b.contact_number or '-',
+            'homestay_name': homestay.name,
+            'date': b.date.strftime('%Y-%m-%d'),
+            'check_out': b.check_out.strftime('%Y-%m-%d'),
+            'num_people': b.num_people or '-',
+            'status': b.status
+        }
+        for b in bookings
+    ]
+    return JsonResponse(data, safe=False)
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 @csrf_exempt
@@ -479,8 +516,8 @@ from django.views.decorators.http import require_GET
 
 # API for dashboard chart data (monthly/yearly tourist counts)
 @require_GET
-def api_tourist_chart_data(request):
-    from .models import Booking
+@conditional('global')
+async def api_tourist_chart_data(request):
     import calendar
     import datetime
     now = datetime.date.today()
@@ -489,17 +526,18 @@ def api_tourist_chart_data(request):
     year_range = int(request.GET.get('year_range', 5))
     # Monthly aggregation for selected year
     # Only consider bookings created via the registration (exclude calendar reservations)
-    monthly = Booking.objects.filter(date__year=year, num_people__gt=0, source='registration')
-    monthly = monthly.values_list('date__month').annotate(total=Sum('num_people'))
-    monthly_dict = {calendar.month_abbr[m]: t for m, t in monthly}
+    # Served from the daily arrivals rollup instead of aggregating raw bookings
+    monthly = DailyArrival.objects.filter(date__year=year, arrivals__gt=0, source='registration')
+    monthly = monthly.values_list('date__month').annotate(total=Sum('arrivals'))
+    monthly_dict = {calendar.month_abbr[m]: t async for m, t in monthly}
     # Fill missing months with 0
     monthly_data = {calendar.month_abbr[m]: monthly_dict.get(calendar.month_abbr[m], 0) for m in range(1, 13)}
     # Yearly aggregation for last N years
     # Only include registration-sourced bookings (exclude calendar reservations)
     start_year = year - year_range + 1
-    yearly = Booking.objects.filter(date__year__gte=start_year, num_people__gt=0, source='registration')
-    yearly = yearly.values_list('date__year').annotate(total=Sum('num_people'))
-    yearly_dict = {str(y): t for y, t in yearly}
+    yearly = DailyArrival.objects.filter(date__year__gte=start_year, arrivals__gt=0, source='registration')
+    yearly = yearly.values_list('date__year').annotate(total=Sum('arrivals'))
+    yearly_dict = {str(y): t async for y, t in yearly}
     yearly_data = {str(y): yearly_dict.get(str(y), 0) for y in range(start_year, year + 1)}
     return JsonResponse({
         'monthly': monthly_data,
@@ -511,58 +549,53 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
 # API endpoint for AJAX tourist table
-@csrf_exempt
 @require_GET
 def api_tourist_list(request):
-    from .models import Booking
-    # Only include tourists that were created through the registration flow (exclude calendar reservations)
-    bookings = Booking.objects.filter(num_people__gt=0, source='registration').order_by('-created_at').values(
-        'guest_name', 'contact_number', 'homestay__name', 'date', 'num_people', 'status'
-    )
-    # Convert date to string
-    data = []
-    for b in bookings:
-        d = dict(b)
-        d['date'] = d['date'].isoformat() if d['date'] else ''
-        data.append(d)
-    # DEBUG: print to server log
-    print('API /api/tourist-list/ returns:', data)
-    return JsonResponse(data, safe=False)
+    """
+    One page of registration-sourced tourists, newest first.
+    Use ?limit=&cursor=<next_cursor>&homestay_id=&start=YYYY-MM-DD&end=YYYY-MM-DD,
+    and ?format=columns for one array per field.
+    Staff see every homestay; homestay owners only their own.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
+    homestay_id = None
+    if not (user.is_staff or user.is_superuser):
+        homestay = get_request_homestay(request)
+        if homestay is None:
+            return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
+        homestay_id = homestay.id
+    try:
+        payload = tourist_page(request.GET, homestay_id=homestay_id)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, **payload}, json_dumps_params=COMPACT_JSON)
 
 
 # Server-side search for tourists (bookings created via registration)
 @require_GET
-def api_tourist_search(request):
-    """Search tourists by guest name, contact number, or homestay name. Use ?q=..."""
-    from .models import Booking
-    q = (request.GET.get('q') or '').strip()
-    # Base queryset: registration-sourced bookings
-    bookings = Booking.objects.filter(num_people__gt=0, source='registration').order_by('-created_at')
-
+async def api_tourist_search(request):
+    """
+    Ranked search over tourists by guest name, contact number or homestay name.
+    Use ?q=...&limit=&offset=&format=columns. Homestay owners only search their own homestay.
+    """
     # If the caller is an authenticated homestay owner (not staff), restrict results
     # to that owner's homestay so homestay pages don't see other homestays' bookings.
+    homestay_id = None
+    user = await request.auser()
+    if user.is_authenticated and not (user.is_staff or user.is_superuser):
+        homestay = await aget_request_homestay(request)
+        homestay_id = homestay.id if homestay else None
     try:
-        from .models import Homestay
-        user = getattr(request, 'user', None)
-        if user and user.is_authenticated and not (user.is_staff or user.is_superuser):
-            homestay = Homestay.objects.filter(owner=user).first()
-            if homestay:
-                bookings = bookings.filter(homestay=homestay)
-    except Exception:
-        # If anything goes wrong, fall back to global search (safe default)
-        pass
-
-    if q:
-        bookings = bookings.filter(
-            Q(guest_name__icontains=q) | Q(contact_number__icontains=q) | Q(homestay__name__icontains=q)
-        )
-    bookings = bookings.values('guest_name', 'contact_number', 'homestay__name', 'date', 'num_people', 'status')
-    data = []
-    for b in bookings:
-        d = dict(b)
-        d['date'] = d['date'].isoformat() if d['date'] else ''
-        data.append(d)
-    return JsonResponse(data, safe=False)
+        # query_budget() sets the timeout on the connection that runs the search,
+        # so the whole search stays in one worker thread
+        payload = await sync_to_async(search_tourists)(request.GET, homestay_id=homestay_id)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    except SearchTimeout as e:
+        return JsonResponse({'success': False, 'error': f'{e} Try a longer query.'}, status=503)
+    return JsonResponse({'success': True, **payload}, json_dumps_params=COMPACT_JSON)
 @csrf_exempt
 @require_POST
 def api_register_tourist(request):
@@ -591,28 +624,23 @@ def api_register_tourist(request):
     from datetime import datetime
     try:
         booking_date = datetime.strptime(date_arrival, '%Y-%m-%d').date()
+        check_out = datetime.strptime(date_departure, '%Y-%m-%d').date()
     except Exception:
         return JsonResponse({'success': False, 'error': 'Invalid date.'}, status=400)
-    # Prevent duplicate: same homestay and date (matches DB unique constraint)
-    if Booking.objects.filter(homestay=homestay, date=booking_date).exists():
-        return JsonResponse({'success': False, 'error': 'A booking for this homestay and date already exists. Please choose another date.'}, status=409)
-    Booking.objects.create(
-        homestay=homestay,
-        date=booking_date,
-        status='reserved',
-        guest_name=name,
-        num_people=num_tourist,
-        contact_number=contact,
-        source='registration'
-    )
+    if check_out < booking_date:
+        return JsonResponse({'success': False, 'error': 'Departure date must not be before arrival date.'}, status=400)
+    # Prevent duplicate: any existing booking for this homestay overlapping the stay
+    try:
+        register_stay(homestay, booking_date, check_out, guest_name=name, num_people=num_tourist,
+                      contact_number=contact)
+    except ReservationConflict as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=409)
     return JsonResponse({'success': True, 'message': 'Tourist registered successfully!'})
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.http import JsonResponse
-import time
-from django.core.cache import cache
 from django.urls import reverse
 from .models import CustomUser, Homestay, Room, Booking
 from django.http import JsonResponse
@@ -645,25 +673,26 @@ def tourist_registration(request):
         except Homestay.DoesNotExist:
             messages.error(request, 'Homestay not found.')
             return redirect('mto-admin')
-        # Save as Booking (one per day)
-        from datetime import datetime, timedelta
+        # Save as a single Booking covering the whole stay
+        from datetime import datetime
         try:
             start_date = datetime.strptime(date_arrival, '%Y-%m-%d').date()
             end_date = datetime.strptime(date_departure, '%Y-%m-%d').date()
         except Exception:
             messages.error(request, 'Invalid date.')
             return redirect('mto-admin')
-        days = (end_date - start_date).days + 1
-        for i in range(days):
-            day = start_date + timedelta(days=i)
-            Booking.objects.create(
-                homestay=homestay,
-                date=day,
-                status='reserved',
-                guest_name=name,
-                num_people=num_tourist,
-                source='registration'
-            )
+        if end_date < start_date:
+            messages.error(request, 'Departure date must not be before arrival date.')
+            return redirect('mto-admin')
+        Booking.objects.create(
+            homestay=homestay,
+            date=start_date,
+            check_out=end_date,
+            status='reserved',
+            guest_name=name,
+            num_people=num_tourist,
+            source='registration'
+        )
     messages.success(request, 'Tourist registered successfully!')
     # Add ?show=management to URL to activate the tab
     return redirect('/mto-admin/?show=management')
@@ -673,83 +702,59 @@ def tourist_registration(request):
 
 # Update homestay features API
 @login_required(login_url='/login/')
+@homestay_required
 @require_POST
 def update_homestay_features(request):
     try:
         data = json.loads(request.body.decode('utf-8'))
-        homestay = Homestay.objects.get(owner=request.user)
+        homestay = request.homestay
         homestay.max_guests = int(data.get('max_guests', 4))
         homestay.wifi_available = bool(data.get('wifi_available', False))
         homestay.videoke_available = bool(data.get('videoke_available', False))
         homestay.pet_friendly = bool(data.get('pet_friendly', False))
         homestay.beach_front = bool(data.get('beach_front', False))
-        homestay.save()
+        # Only these columns: the homestay may come from the owner cache
+        homestay.save(update_fields=['max_guests', 'wifi_available', 'videoke_available', 'pet_friendly', 'beach_front'])
         return JsonResponse({'success': True})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 @require_GET
 def homestay_user_list_api(request):
+    """One page of homestay accounts plus MTO staff. ?q=&sort=guests|name|status (- for desc)&limit=&offset="""
+    try:
+        payload = directory_page(request.GET)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     try:
-        # Only users with a homestay account
-        homestays = Homestay.objects.select_related('owner').all()
-        from django.db.models import Sum
-        user_list = []
-        for h in homestays:
-            # Count total guests who booked this homestay
-            total_guests = Booking.objects.filter(homestay=h, num_people__gt=0).aggregate(total=Sum('num_people'))['total'] or 0
-            user_list.append({
-                'homestayName': h.name,
-                'ownerName': h.owner.name,
-                'address': h.address,
-                'username': h.owner.username,
-                'status': 'Active' if h.owner.is_active else 'Inactive',
-                'totalGuests': total_guests
+        # Also include MTO staff and admin accounts for superuser view, bounded like the homestays
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+        mto_qs = User.objects.filter(Q(is_staff=True) | Q(is_superuser=True)).order_by('username')
+        mto_accounts = []
+        for u in mto_qs[:payload['limit']]:
+            mto_accounts.append({
+                'username': u.username,
+                'name': getattr(u, 'name', '') or u.get_full_name(),
+                'email': u.email,
+                'role': 'Superuser' if u.is_superuser else 'Staff',
+                'status': 'Active' if u.is_active else 'Inactive'
             })
-        # Also include MTO staff and admin accounts for superuser view
-        try:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            mto_accounts = []
-            # include staff and superusers
-            mto_qs = User.objects.filter(Q(is_staff=True) | Q(is_superuser=True)).order_by('username')
-            for u in mto_qs:
-                mto_accounts.append({
-                    'username': u.username,
-                    'name': getattr(u, 'name', '') or (u.get_full_name() if hasattr(u, 'get_full_name') else ''),
-                    'email': getattr(u, 'email', '') if hasattr(u, 'email') else '',
-                    'role': 'Superuser' if u.is_superuser else 'Staff',
-                    'status': 'Active' if u.is_active else 'Inactive'
-                })
-        except Exception:
-            mto_accounts = []
-
-        return JsonResponse({'success': True, 'users': user_list, 'mto_accounts': mto_accounts})
+        mto_total = mto_qs.count() if len(mto_accounts) == payload['limit'] else len(mto_accounts)
+        return JsonResponse({'success': True, **payload, 'mto_accounts': mto_accounts, 'mto_total': mto_total})
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
 # Server-side search for homestays/users
 @require_GET
-def api_homestay_search(request):
-    """Search homestays by homestay name or owner name. Use ?q=..."""
-    q = (request.GET.get('q') or '').strip()
-    homestays = Homestay.objects.select_related('owner').all()
-    if q:
-        homestays = homestays.filter(Q(name__icontains=q) | Q(owner__name__icontains=q) | Q(owner__username__icontains=q))
-    from django.db.models import Sum
-    user_list = []
-    for h in homestays:
-        total_guests = Booking.objects.filter(homestay=h, num_people__gt=0).aggregate(total=Sum('num_people'))['total'] or 0
-        user_list.append({
-            'homestayName': h.name,
-            'ownerName': h.owner.name if h.owner else '',
-            'address': h.address,
-            'username': h.owner.username if h.owner else '',
-            'status': 'Active' if h.owner and h.owner.is_active else 'Inactive',
-            'totalGuests': total_guests
-        })
-    return JsonResponse({'success': True, 'users': user_list})
+async def api_homestay_search(request):
+    """Search homestays by homestay name or owner name. Use ?q=... (paged and sorted like homestay_user_list_api)"""
+    try:
+        payload = await adirectory_page(request.GET)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, **payload})
 
 
 # API endpoint to add a new homestay user (admin creates homestay account)
@@ -809,13 +814,12 @@ def add_homestay_user_api(request):
 
 # API endpoint to get all rooms for the current homestay owner
 @csrf_exempt
+@homestay_required
 @require_GET
+@conditional('homestay')
 def room_list_api(request):
-    if not request.user.is_authenticated:
-        return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
     try:
-        homestay = Homestay.objects.get(owner=request.user)
-        rooms = Room.objects.filter(homestay=homestay)
+        rooms = Room.objects.filter(homestay=request.homestay)
         room_list = [
             {
                 'id': room.id,
@@ -826,18 +830,15 @@ def room_list_api(request):
             for room in rooms
         ]
         return JsonResponse({'success': True, 'rooms': room_list})
-    except Homestay.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
 # API endpoint for adding a new room via AJAX
 @csrf_exempt
+@homestay_required
 @require_POST
 def room_api(request):
-    if not request.user.is_authenticated:
-        return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
     try:
         data = json.loads(request.body.decode('utf-8'))
         room_number = data.get('room_number')
@@ -850,9 +851,8 @@ def room_api(request):
             is_under_maintenance = data.get('is_under_maintenance', False)
         if not room_number or not capacity:
             return JsonResponse({'success': False, 'error': 'Missing required fields.'}, status=400)
-        homestay = Homestay.objects.get(owner=request.user)
         room = Room.objects.create(
-            homestay=homestay,
+            homestay=request.homestay,
             room_number=room_number,
             capacity=capacity,
             is_under_maintenance=is_under_maintenance
@@ -867,8 +867,6 @@ def room_api(request):
                 'status': 'maintenance' if room.is_under_maintenance else 'not_maintenance'
             }
         })
-    except Homestay.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 from django.shortcuts import render, redirect, get_object_or_404
@@ -883,187 +881,75 @@ from django.views.decorators.http import require_POST
 import json
 from datetime import datetime, timedelta
 from .models import Homestay, Room, Booking  # Import your models
+from .home_cache import get_home_payload
+from .directory import adirectory_page, directory_page
+from .pagination import COMPACT_JSON, PageError, parse_format, to_columns
+from .tourist_list import tourist_page, guest_groups_page, parse_filters, apply_filters
+from .exports import streaming_csv_response
+from .search import search_tourists, SearchTimeout
+from .lockout import get_lockout_backend
+from .availability import build_availability, default_window, MAX_WINDOW_DAYS
+from django.utils.cache import patch_cache_control
 
 
 def home_view(request):
     """
     Render the home page with only registered homestays (with user accounts).
     """
-    import json
-    homestays = Homestay.objects.filter(owner__isnull=False, owner__is_active=True)
-    # Build a dict: {homestay_id: {date: [ {room_number, status}, ... ] } }
-    homestay_bookings = {}
-    homestay_features = {}
-    homestay_dynamic_features = {}
-    for homestay in homestays:
-        rooms = homestay.rooms.all()
-        bookings = homestay.bookings.all()
-        # Build a mapping: date -> list of rooms with their statuses
-        date_room_status = {}
-        # Get all unique dates from bookings
-        all_dates = set(b.date for b in bookings)
-        for date in all_dates:
-            date_str = date.strftime('%Y-%m-%d')
-            date_room_status[date_str] = []
-            for room in rooms:
-                # Find booking for this room and date
-                booking = bookings.filter(room=room, date=date).first()
-                if booking:
-                    status = booking.status
-                elif room.is_under_maintenance:
-                    status = 'maintenance'
-                else:
-                    status = 'available'
-                date_room_status[date_str].append({
-                    'room_number': room.room_number,
-                    'status': status
-                })
-        # Also add all rooms as available for dates in the current month with no bookings
-        from datetime import date as dt_date, timedelta
-        import calendar
-        today = dt_date.today()
-        for month_offset in range(0, 2):  # current and next month
-            month = (today.month + month_offset - 1) % 12 + 1
-            year = today.year + ((today.month + month_offset - 1) // 12)
-            days_in_month = calendar.monthrange(year, month)[1]
-            for day in range(1, days_in_month + 1):
-                d = dt_date(year, month, day)
-                date_str = d.strftime('%Y-%m-%d')
-                if date_str not in date_room_status:
-                    date_room_status[date_str] = []
-                    for room in rooms:
-                        status = 'maintenance' if room.is_under_maintenance else 'available'
-                        date_room_status[date_str].append({
-                            'room_number': room.room_number,
-                            'status': status
-                        })
-            homestay_bookings[homestay.id] = date_room_status
-            homestay_features[homestay.id] = {
-            'max_guests': homestay.max_guests,
-            'wifi_available': homestay.wifi_available,
-            'videoke_available': homestay.videoke_available,
-            'pet_friendly': homestay.pet_friendly,
-            'beach_front': homestay.beach_front,
-        }
-        # Add dynamic features
-        homestay_dynamic_features[homestay.id] = list(homestay.features.values('id', 'name', 'type', 'value'))
-
-    # --- Homestay Performance Rankings ---
-    from django.db.models import Sum, Count
-    from django.db.models import Case, When, IntegerField
-    rankings = (
-        Homestay.objects.filter(owner__isnull=False, owner__is_active=True)
-        .annotate(
-            total_arrivals=Sum(
-                Case(
-                    When(bookings__source='registration', then='bookings__num_people'),
-                    default=0,
-                    output_field=IntegerField()
-                )
-            )
-        )
-        .order_by('-total_arrivals')
-    )
-    # If num_people is null, fallback to count of bookings with source='registration'
-    for h in rankings:
-        if h.total_arrivals is None:
-            h.total_arrivals = h.bookings.filter(source='registration').count()
-
-    bookings_json = json.dumps(homestay_bookings)
-    features_json = json.dumps(homestay_features)
-    dynamic_features_json = json.dumps(homestay_dynamic_features)
-    return render(request, 'tourism/home.html', {
-        'homestays': homestays,
-        'bookings_json': bookings_json,
-        'features_json': features_json,
-        'dynamic_features_json': dynamic_features_json,
-        'homestay_rankings': rankings,
-    })
+    return render(request, 'tourism/home.html', get_home_payload())
 
 
 def get_home_context(request):
     """Build and return the context dict used by the home page.
-    This duplicates the data assembly in home_view so other views can render
-    the full page (for example, after a failed login) without losing content.
+    The shared payload comes from the home page cache; the per-session login
+    flags are merged in fresh so other views can render the full page (for
+    example, after a failed login) without losing content.
     """
-    import json
-    homestays = Homestay.objects.filter(owner__isnull=False, owner__is_active=True)
-    homestay_bookings = {}
-    homestay_features = {}
-    homestay_dynamic_features = {}
-    for homestay in homestays:
-        rooms = homestay.rooms.all()
-        bookings = homestay.bookings.all()
-        date_room_status = {}
-        all_dates = set(b.date for b in bookings)
-        from datetime import date as dt_date, timedelta
-        import calendar
-        for date in all_dates:
-            date_str = date.strftime('%Y-%m-%d')
-            date_room_status[date_str] = []
-            for room in rooms:
-                booking = bookings.filter(room=room, date=date).first()
-                if booking:
-                    status = booking.status
-                elif room.is_under_maintenance:
-                    status = 'maintenance'
-                else:
-                    status = 'available'
-                date_room_status[date_str].append({'room_number': room.room_number, 'status': status})
-        today = dt_date.today()
-        for month_offset in range(0, 2):
-            month = (today.month + month_offset - 1) % 12 + 1
-            year = today.year + ((today.month + month_offset - 1) // 12)
-            days_in_month = calendar.monthrange(year, month)[1]
-            for day in range(1, days_in_month + 1):
-                d = dt_date(year, month, day)
-                date_str = d.strftime('%Y-%m-%d')
-                if date_str not in date_room_status:
-                    date_room_status[date_str] = []
-                    for room in rooms:
-                        status = 'maintenance' if room.is_under_maintenance else 'available'
-                        date_room_status[date_str].append({'room_number': room.room_number, 'status': status})
-        homestay_bookings[homestay.id] = date_room_status
-        homestay_features[homestay.id] = {
-            'max_guests': homestay.max_guests,
-            'wifi_available': homestay.wifi_available,
-            'videoke_available': homestay.videoke_available,
-            'pet_friendly': homestay.pet_friendly,
-            'beach_front': homestay.beach_front,
-        }
-        homestay_dynamic_features[homestay.id] = list(homestay.features.values('id', 'name', 'type', 'value'))
-
-    # Rankings
-    from django.db.models import Sum, Case, When, IntegerField
-    rankings = (
-        Homestay.objects.filter(owner__isnull=False, owner__is_active=True)
-        .annotate(
-            total_arrivals=Sum(
-                Case(
-                    When(bookings__source='registration', then='bookings__num_people'),
-                    default=0,
-                    output_field=IntegerField()
-                )
-            )
-        )
-        .order_by('-total_arrivals')
-    )
-    for h in rankings:
-        if h.total_arrivals is None:
-            h.total_arrivals = h.bookings.filter(source='registration').count()
-
-    return {
-        'homestays': homestays,
-        'bookings_json': json.dumps(homestay_bookings),
-        'features_json': json.dumps(homestay_features),
-        'dynamic_features_json': json.dumps(homestay_dynamic_features),
-        'homestay_rankings': rankings,
+    context = dict(get_home_payload())
+    context.update({
         # PRG flags for login modal (if present in session)
         'login_error': request.session.pop('login_error', False),
         'login_username': request.session.pop('login_username', ''),
         'login_locked': request.session.pop('login_locked', False),
         'failed_login_attempts': request.session.pop('failed_login_attempts', 0),
-    }
+    })
+    return context
+
+
+@require_GET
+def homestay_availability_api(request):
+    """
+    Public room availability for one homestay and a date window.
+    Use ?homestay_id=...&start=YYYY-MM-DD&end=YYYY-MM-DD (defaults to the
+    current and next month). Returns {date: [{room_number, status}, ...]}.
+    """
+    try:
+        homestay_id = int(request.GET.get('homestay_id') or '')
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Missing or invalid homestay ID.'}, status=400)
+    start, end = default_window()
+    try:
+        if request.GET.get('start'):
+            start = datetime.strptime(request.GET['start'], '%Y-%m-%d').date()
+        if request.GET.get('end'):
+            end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid date.'}, status=400)
+    if end < start or (end - start).days + 1 > MAX_WINDOW_DAYS:
+        return JsonResponse({'success': False, 'error': f'Date window must be 1 to {MAX_WINDOW_DAYS} days.'}, status=400)
+    # Same visibility rule as the home page: only homestays with an active owner
+    if not Homestay.objects.filter(id=homestay_id, owner__is_active=True).exists():
+        return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
+    availability = build_availability([homestay_id], start, end)[homestay_id]
+    response = JsonResponse({
+        'success': True,
+        'homestay_id': homestay_id,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'availability': availability,
+    })
+    patch_cache_control(response, public=True, max_age=60)
+    return response
 
 
 @csrf_exempt
@@ -1075,32 +961,18 @@ def login_view(request):
     next_url = request.GET.get('next', '')
     # Read current failed attempts from session (per-session counter)
     failed = int(request.session.get('failed_login_attempts', 0) or 0)
-    # Lockout configuration
-    LOCK_THRESHOLD = 4
-    LOCK_TIMEOUT = 5 * 60  # 5 minutes in seconds
-
-    # We intentionally only apply username-based temporary lockouts (not IP/device-based)
+    # We intentionally only apply username-based temporary lockouts (not IP/device-based);
+    # the counter lives in a store shared by all workers (settings.LOGIN_LOCKOUT_BACKEND)
+    lockout = get_lockout_backend()
 
     if request.method == 'POST':
         username = (request.POST.get('username') or '').strip()
         password = request.POST.get('password')
         user_key = username.lower() if username else 'unknown'
-        user_count_key = f'login_count_user:{user_key}'
-        user_block_key = f'login_block_user:{user_key}'
 
         # If username is already locked, show lock message and don't attempt auth
-        blocked_user = cache.get(user_block_key)
-        if blocked_user:
-            # compute remaining time from username-only block-until
-            try:
-                now = int(time.time())
-                user_until = cache.get(f'login_block_until_user:{user_key}')
-                rem = 0
-                if user_until:
-                    rem = max(0, int(user_until) - now)
-            except Exception:
-                rem = 0
-
+        rem = lockout.locked_for(user_key)
+        if rem:
             if request.META.get('HTTP_X_REQUESTED_WITH') == 'XMLHttpRequest':
                 return JsonResponse({'success': False, 'blocked': True, 'remaining': rem, 'message': 'Your account has been temporarily locked. Please contact MTO staff for assistance.'})
             else:
@@ -1113,77 +985,50 @@ def login_view(request):
                 return redirect('home')
 
         user = authenticate(request, username=username, password=password)
-        print(f"DEBUG: Attempt login for {username}, authenticated: {user is not None}")
         if user is not None:
             # Reset failed attempts on successful login
             request.session['failed_login_attempts'] = 0
-            # Clear cache counters/locks for this IP and username and any block-until keys
+            # Clear the failure counter and any lock for this username
             try:
-                    cache.delete(user_count_key)
-                    cache.delete(user_block_key)
-                    cache.delete(f'login_block_until_user:{user_key}')
+                lockout.reset(user_key)
             except Exception:
                 pass
             login(request, user)
-            print(f"DEBUG: Logged in as {user.username}, is_superuser={user.is_superuser}, is_staff={user.is_staff}")
+            logger.info('Login succeeded', extra={'username': user.username, 'staff': user.is_staff,
+                                                  'superuser': user.is_superuser})
             next_url = request.POST.get('next') or request.GET.get('next')
             if next_url:
-                print(f"DEBUG: Redirecting to next_url: {next_url}")
                 return redirect(next_url)
             # Redirect admin to admin.html, staff to mtoadmin.html, others to homestay.html
             if user.is_superuser:
-                print("DEBUG: Redirecting to admin.html")
                 return render(request, 'tourism/admin.html')
             elif user.is_staff:
-                print("DEBUG: Redirecting to mto-admin")
                 return redirect('mto-admin')
             else:
-                print("DEBUG: Redirecting to homestay")
                 return redirect('homestay')
         else:
             # Increment failed attempts and persist in session
             failed += 1
             request.session['failed_login_attempts'] = failed
             request.session.modified = True
-            print(f"DEBUG: Invalid username or password. Failed attempts={failed}")
+            # Budgeted per username: a burst against many accounts must not hide the others
+            logger.info('Login failed', extra={'username': username, 'session_failures': failed,
+                                               'rate_key': user_key})
 
-            # Increment counters in cache for both username and IP (with expiry)
+            # Count the failure for this username (atomic across workers); locks at the threshold
             try:
-                # User count
-                ucount = cache.get(user_count_key)
-                if ucount is None:
-                    cache.set(user_count_key, 1, LOCK_TIMEOUT)
-                    ucount = 1
-                else:
-                    try:
-                        ucount = int(ucount) + 1
-                    except Exception:
-                        ucount = 1
-                    cache.set(user_count_key, ucount, LOCK_TIMEOUT)
-
-                # If user count reached threshold, set username-based block key and store 'until' timestamp
-                locked = False
-                now = int(time.time())
-                if ucount >= LOCK_THRESHOLD:
-                    cache.set(user_block_key, True, LOCK_TIMEOUT)
-                    cache.set(f'login_block_until_user:{user_key}', now + LOCK_TIMEOUT, LOCK_TIMEOUT)
-                    locked = True
-            except Exception as e:
-                print(f"DEBUG: cache error: {e}")
-                locked = False
+                rem = lockout.register_failure(user_key)
+            except Exception:
+                logger.warning('Lockout store error', exc_info=True)
+                rem = 0
+            locked = rem > 0
 
             # Return appropriate message
             if locked:
+                # WARNING: never rate-limited
+                logger.warning('Login locked', extra={'username': username, 'locked_for': rem})
                 # If AJAX, respond with blocked info
                 if request.META.get('HTTP_X_REQUESTED_WITH') == 'XMLHttpRequest':
-                    now = int(time.time())
-                    user_until = cache.get(f'login_block_until_user:{user_key}')
-                    rem = 0
-                    try:
-                        if user_until:
-                            rem = max(rem, int(user_until) - now)
-                    except Exception:
-                        rem = 0
                     return JsonResponse({'success': False, 'blocked': True, 'remaining': rem, 'message': 'Your account has been temporarily locked. Please contact MTO staff for assistance.'})
                 # Set session flags then redirect to home (PRG)
                 request.session['login_error'] = True
@@ -1227,59 +1072,81 @@ def admin_view(request):
         return render(request, 'tourism/admin.html')
     else:
         # Only show homestays whose owner accounts are active (hide suspended accounts)
-        homestays = Homestay.objects.filter(owner__is_active=True).order_by('name')
-        # Tourist List: only Booking entries created via registration (exclude calendar reservations)
-        from .models import Booking
-        all_tourists = list(
-            Booking.objects.filter(source='registration').order_by('-created_at').values(
-                'guest_name', 'contact_number', 'homestay__name', 'date', 'num_people', 'status'
-            )
-        )
-        # Convert date to string for template rendering
-        for t in all_tourists:
-            if t['date']:
-                t['date'] = t['date'].isoformat()
-        # Grouped tourists for management (existing logic)
-        from collections import defaultdict
-        grouped_tourists = []
-        for homestay in homestays:
-            # Only consider registration-sourced bookings for tourist management/grouping
-            bookings = homestay.bookings.filter(source='registration').order_by('guest_name', 'date')
-            guest_map = defaultdict(list)
-            for b in bookings:
-                if b.guest_name:
-                    guest_map[b.guest_name].append(b)
-            for guest, bks in guest_map.items():
-                if bks:
-                    check_in = min(b.date for b in bks)
-                    check_out = max(b.date for b in bks)
-                    grouped_tourists.append({
-                        'homestay': homestay.name,
-                        'guest_name': guest,
-                        'check_in': check_in,
-                        'check_out': check_out,
-                        'num_people': bks[0].num_people,
-                        'status': bks[0].status,
-                    })
+        homestays = Homestay.objects.filter(owner__is_active=True).order_by('name').only('id', 'name')
+        # The tourist tables are loaded page by page from /api/tourist-list/ and
+        # /api/tourist-groups/, so no bookings are read when the dashboard renders.
         show_management = request.GET.get('show') == 'management'
         return render(request, 'tourism/mtoadmin.html', {
             'homestays': homestays,
-            'grouped_tourists': grouped_tourists,
-            'all_tourists': all_tourists,
             'all_homestays': homestays,
             'show_management': show_management,
         })
 
 
+@login_required(login_url='/login/')
+@require_GET
+def api_tourist_groups(request):
+    """
+    Staff-only: registered guests grouped per homestay (first check-in, last check-out),
+    paged and filtered server-side. See tourist_list.guest_groups_page for parameters.
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        return JsonResponse({'success': False, 'error': 'Staff access required.'}, status=403)
+    try:
+        payload = guest_groups_page(request.GET)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, **payload})
+
+
+@require_GET
+async def event_stream(request):
+    """
+    Server-sent events for the dashboards: booking, registration and room changes of the
+    owner's homestay, or of every homestay for staff. Served by the ASGI application only.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'success': False, 'error': 'The event stream needs the ASGI server.'}, status=503)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
+    if user.is_staff or user.is_superuser:
+        channels = ['staff']
+    else:
+        homestay = await aget_request_homestay(request)
+        if homestay is None:
+            return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
+        channels = [f'homestay:{homestay.id}']
+    response = StreamingHttpResponse(event_frames(channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # no proxy buffering of the stream
+    return response
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Request metrics of all workers in the Prometheus text format (see metrics.py).
+    Staff only; scrapers authenticate with ``Authorization: Bearer <METRICS_TOKEN>``.
+    """
+    token = settings.METRICS_TOKEN
+    bearer = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not (request.user.is_staff or (token and constant_time_compare(bearer, token))):
+        return HttpResponse('Staff access required.\n', status=403, content_type='text/plain')
+    metrics.flush()
+    return HttpResponse(metrics.render(metrics.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @login_required(login_url='/login/')
 def homestay_view(request):
     """
     Homestay dashboard view.
     Shows rooms and stats for the logged-in homestay owner.
     """
-    print(f"DEBUG: Entered homestay_view for user {request.user.username} (ID: {request.user.id})")
     # Load homestay and rooms for the logged-in homestay owner
-    homestay = Homestay.objects.get(owner=request.user)
+    homestay = get_request_homestay(request)
+    if homestay is None:
+        raise Http404('Homestay not found.')
     rooms = Room.objects.filter(homestay=homestay)
 
     total_rooms = rooms.count()
@@ -1297,18 +1164,14 @@ def homestay_view(request):
             'guest_name': booking.guest_name or '',
             'num_people': booking.num_people or 1,
             'start': booking.date.strftime('%Y-%m-%d'),
-            'end': booking.date.strftime('%Y-%m-%d')
+            'end': booking.check_out.strftime('%Y-%m-%d')
         })
     bookings_json = json.dumps(bookings_data)
 
     from django.db.models import Sum
     # Show total tourists (registration-sourced only) regardless of status for management/dashboard
     tourist_bookings = Booking.objects.filter(homestay=homestay, source='registration').order_by('-date')
-    print("[DEBUG] All bookings for total_tourists:")
-    for b in tourist_bookings:
-        print(f"  Booking ID: {b.id}, guest_name: {b.guest_name}, num_people: {b.num_people}, status: {b.status}")
     total_tourists = tourist_bookings.aggregate(total=Sum('num_people'))['total'] or 0
-    print(f"[DEBUG] Computed total_tourists: {total_tourists}")
     context = {
         'homestay': homestay,
         'rooms': rooms,
@@ -1325,8 +1188,7 @@ def homestay_view(request):
         'beach_front': homestay.beach_front,
     # 'room_form': room_form,  # removed, not needed for manual room management
     }
-    print("[DEBUG] Bookings passed to template:", bookings)
-    print("[DEBUG] Total tourists:", total_tourists)
+    logger.debug('Homestay dashboard for homestay %s: %d tourists', homestay.id, total_tourists)
     return render(request, 'tourism/homestay.html', context)
 
 
@@ -1335,33 +1197,22 @@ def homestay_view(request):
 def export_tourists_csv(request):
     """
     Export registration-sourced bookings for the logged-in homestay owner as CSV.
-    Columns: guest_name, contact_number, homestay_name, date, num_people, status
+    Columns: guest_name, contact_number, homestay_name, date, check_out, num_people, status
+    Optional query params: start / end (check-in dates, YYYY-MM-DD) and gzip=1.
     """
-    try:
-        homestay = Homestay.objects.get(owner=request.user)
-    except Homestay.DoesNotExist:
+    homestay = get_request_homestay(request)
+    if homestay is None:
         return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
+    try:
+        filters = parse_filters(request.GET)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    filters['homestay_id'] = homestay.id
 
-    bookings = Booking.objects.filter(homestay=homestay, source='registration').order_by('-date')
-
-    # Create the HttpResponse with CSV header
-    response = HttpResponse(content_type='text/csv')
-    filename = f"tourists_{homestay.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.csv"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    writer = csv.writer(response)
-    writer.writerow(['guest_name', 'contact_number', 'homestay_name', 'date', 'num_people', 'status'])
-    for b in bookings:
-        writer.writerow([
-            b.guest_name or '',
-            b.contact_number or '',
-            homestay.name or '',
-            b.date.isoformat() if b.date else '',
-            b.num_people or '',
-            b.status or '',
-        ])
-
-    return response
+    bookings = apply_filters(Booking.objects.filter(source='registration'), filters).order_by('-date', '-id')
+    filename = f"tourists_{homestay.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}"
+    return streaming_csv_response(bookings, filename, gzip=request.GET.get('gzip') == '1',
+                                  asynchronous=isinstance(request, ASGIRequest))
 
 
 @login_required(login_url='/login/')
@@ -1370,34 +1221,20 @@ def export_tourists_csv(request):
 def export_tourists_all_csv(request):
     """
     Staff-only: export all registration-sourced bookings as CSV.
-    Optional query params: homestay_id or homestay_name to filter.
+    Optional query params: homestay_id or homestay_name to filter, start / end
+    (check-in dates, YYYY-MM-DD) and gzip=1.
     """
     try:
-        qs = Booking.objects.filter(source='registration').order_by('-date')
-        hid = request.GET.get('homestay_id')
-        hname = request.GET.get('homestay_name')
-        if hid:
-            qs = qs.filter(homestay_id=hid)
-        elif hname:
-            qs = qs.filter(homestay__name__icontains=hname)
-
-        response = HttpResponse(content_type='text/csv')
-        filename = f"tourists_all_{datetime.now().strftime('%Y%m%d')}.csv"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        writer = csv.writer(response)
-        writer.writerow(['guest_name', 'contact_number', 'homestay_name', 'date', 'num_people', 'status'])
-        for b in qs:
-            writer.writerow([
-                b.guest_name or '',
-                b.contact_number or '',
-                b.homestay.name if b.homestay else '',
-                b.date.isoformat() if b.date else '',
-                b.num_people or '',
-                b.status or '',
-            ])
-        return response
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+        filters = parse_filters(request.GET)
+    except PageError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    qs = apply_filters(Booking.objects.filter(source='registration'), filters).order_by('-date', '-id')
+    hname = request.GET.get('homestay_name')
+    if filters['homestay_id'] is None and hname:
+        qs = qs.filter(homestay__name__icontains=hname)
+    filename = f"tourists_all_{datetime.now().strftime('%Y%m%d')}"
+    return streaming_csv_response(qs, filename, gzip=request.GET.get('gzip') == '1',
+                                  asynchronous=isinstance(request, ASGIRequest))
 
 
 def logout_view(request):
@@ -1438,10 +1275,9 @@ def change_password_api(request):
 
 # API endpoint for booking calendar AJAX (create/update booking)
 @csrf_exempt
+@homestay_required
 @require_POST
 def booking_api(request):
-    if not request.user.is_authenticated:
-        return JsonResponse({'success': False, 'error': 'Authentication required.'}, status=403)
     try:
         data = json.loads(request.body.decode('utf-8'))
         date_str = data.get('date')
@@ -1452,38 +1288,67 @@ def booking_api(request):
         if not date_str or not status:
             return JsonResponse({'success': False, 'error': 'Missing required fields.'}, status=400)
         date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        homestay = Homestay.objects.get(owner=request.user)
+        homestay = request.homestay
         room = None
         if room_id:
             try:
                 room = Room.objects.get(id=room_id, homestay=homestay)
             except Room.DoesNotExist:
                 return JsonResponse({'success': False, 'error': 'Room not found.'}, status=404)
-        # Update or create booking
-        booking, created = Booking.objects.update_or_create(
-            homestay=homestay,
-            date=date,
-            defaults={
-                'status': status,
-                'guest_name': guest_name,
-                'num_people': num_people,
-                'room': room,
-                # Mark bookings created/updated through the calendar UI as 'calendar'
-                'source': 'calendar'
-            }
-        )
+        # Update or create the cell: the room's single-day calendar booking for that date,
+        # as calendar_batch defines it (the oldest one, should there be several)
+        try:
+            with transaction.atomic():
+                # Queue behind other calendar writers of the homestay (see reservations.py)
+                lock_homestay(homestay.id)
+                booking = Booking.objects.select_for_update().filter(
+                    homestay=homestay, room=room, date=date, check_out=date, source='calendar',
+                ).order_by('id').first()
+                created = booking is None
+                if created:
+                    booking = Booking(homestay=homestay, room=room, date=date, check_out=date, source='calendar')
+                booking.status = status
+                booking.guest_name = guest_name
+                booking.num_people = num_people
+                booking.save()
+        except IntegrityError:
+            # booking_room_reserved_uniq: the room is already reserved that day
+            return JsonResponse({'success': False, 'error': 'Room already reserved for this date.'}, status=409)
         return JsonResponse({'success': True, 'created': created, 'booking_id': booking.id})
-    except Homestay.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'Homestay not found.'}, status=404)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+@homestay_required
+@require_POST
+def calendar_bulk_api(request):
+    """
+    Set many calendar cells at once. Expects JSON: {room_ids: [...], ranges: [{start, end}, ...],
+    status, guest_name, num_people, contact_number}. Returns one result per room/date cell.
+    """
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON.'}, status=400)
+    try:
+        rooms, dates, fields = parse_batch(request.homestay, data)
+    except BatchError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    try:
+        results = apply_batch(request.homestay, rooms, dates, fields)
+    except IntegrityError:
+        # A single-cell reservation won a race with this batch; nothing was saved
+        return JsonResponse({'success': False, 'error': 'The calendar changed while saving. Reload and try again.'},
+                            status=409)
+    counts = {name: sum(1 for r in results if r['result'] == name) for name in ('created', 'updated', 'conflict')}
+    return JsonResponse({'success': True, 'results': results, **counts})
+
 @csrf_exempt
+@homestay_required
 @require_POST
 def add_homestay_feature(request):
     try:
         data = json.loads(request.body.decode('utf-8'))
-        homestay = Homestay.objects.get(owner=request.user)
+        homestay = request.homestay
         name = data.get('featureName')
         type_ = data.get('featureType')
         value = data.get('featureValue', '')
@@ -1499,11 +1364,11 @@ def add_homestay_feature(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
+@homestay_required
 @require_GET
 def get_homestay_features(request):
     try:
-        homestay = Homestay.objects.get(owner=request.user)
-        features = HomestayFeature.objects.filter(homestay=homestay).order_by('-created_at')
+        features = HomestayFeature.objects.filter(homestay=request.homestay).order_by('-created_at')
         features_list = [
             {
                 'id': f.id,